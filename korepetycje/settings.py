@@ -77,6 +77,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "panel.context_processors.site_config",
             ],
         },
     },
@@ -154,10 +155,13 @@ if (BASE_DIR / "static").exists():
 
 # Django 5.2: używamy STORAGES['staticfiles'] zamiast STATICFILES_STORAGE
 STORAGES = {
+    # lokalnie MEDIA na dysku; przy USE_S3 nadpisujemy niżej na S3Boto3Storage
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
-    # "default" (MEDIA) dopiszemy niżej warunkowo przy USE_S3
 }
 
 # === MEDIA: S3 (OVH) jeśli ENV ustawione, inaczej lokalnie ===
@@ -237,6 +241,8 @@ AUTH_PASSWORD_VALIDATORS = []
 FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024      # 2 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024      # 5 MB
 FILE_UPLOAD_PERMISSIONS = 0o640
+# Upload bezpośrednio do S3 (POST policy) – ważność podpisu w sekundach
+DIRECT_UPLOAD_EXPIRES = int(os.getenv("DIRECT_UPLOAD_EXPIRES", "900"))
 
 # === LOGI ===
 LOGGING = {
@@ -251,11 +257,29 @@ LOGGING = {
     },
 }
 
+# === AUDYT ===
+# AuditLog zapisywany po COMMIT, paczkami w wątku w tle (0 = od razu, np. w komendach)
+AUDIT_LOG_ASYNC = os.getenv("AUDIT_LOG_ASYNC", "1") == "1"
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "200"))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL", "1.0"))
+# Partycje miesięczne AuditLog (tylko Postgres; komenda auditlog_partitions) i katalog archiwów w storage
+AUDIT_LOG_PARTITIONED = os.getenv("AUDIT_LOG_PARTITIONED", "0") == "1"
+AUDIT_LOG_ARCHIVE_DIR = os.getenv("AUDIT_LOG_ARCHIVE_DIR", "audit-archive")
+
+# === CZAT AI: ekstrakcja tekstu z załączników (panel.extraction) ===
+# Procesy puli (0 = w procesie serwera) i limit czasu na plik w sekundach
+AI_EXTRACT_WORKERS = int(os.getenv("AI_EXTRACT_WORKERS", "2"))
+AI_EXTRACT_TIMEOUT = float(os.getenv("AI_EXTRACT_TIMEOUT", "20"))
+
 # === PŁATNOŚCI / FAKTURY ===
 AUTOPAY_WEBHOOK_SECRET = os.getenv("AUTOPAY_WEBHOOK_SECRET", "change-me")
 INVOICE_PLACE_DEFAULT = os.getenv("INVOICE_PLACE_DEFAULT", "Warszawa")
 DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "PLN")
 
+# Render PDF (rachunki): "auto" | "wkhtmltopdf" | "weasyprint"; rozmiar puli rendererów
+PDF_RENDER_BACKEND = os.getenv("PDF_RENDER_BACKEND", "auto")
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+
 # (opcjonalnie) e-mail nadawcy
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "PolubiszTo.pl <no-reply@polubiszto.pl>")
 
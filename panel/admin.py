@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import Profil, WolnyTermin, Rezerwacja
-from .models import Payment, Invoice
+from .models import Payment, Invoice, InvoiceJob
 from .models import SiteLegalConfig
 
 @admin.register(Profil)
@@ -28,6 +28,12 @@ class InvoiceAdmin(admin.ModelAdmin):
     search_fields = ("number","student__username","student__email")
     date_hierarchy = "issue_date"
 
+@admin.register(InvoiceJob)
+class InvoiceJobAdmin(admin.ModelAdmin):
+    list_display = ("payment","status","attempts","run_after","updated_at")
+    list_filter = ("status",)
+    readonly_fields = ("created_at","updated_at","last_error")
+
 @admin.register(SiteLegalConfig)
 class SiteLegalConfigAdmin(admin.ModelAdmin):
     list_display = ("site_owner", "site_email", "updated_at", "updated_by")
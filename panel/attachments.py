@@ -0,0 +1,65 @@
+# panel/attachments.py
+"""
+Załączniki czatu AI: magazyn adresowany treścią i cache ekstrakcji.
+
+Uczniowie wielokrotnie wrzucają ten sam arkusz – liczymy SHA-256
+pliku (strumieniowo, po kawałkach uploadu) i:
+- zapisujemy go pod ścieżką z hasha: ai_uploads/sha256/ab/cd/<hash>.<ext>;
+  jeśli taki obiekt już jest w storage, nie wysyłamy go ponownie,
+- wynik ekstrakcji tekstu (PDF/DOCX/TXT) trzymamy w cache Django pod
+  kluczem z hasha i rodzaju ekstrakcji – ten sam plik nie jest
+  ponownie parsowany (PdfReader / Document).
+
+Treść pliku czytamy tylko wtedy, gdy trzeba: nowy obiekt w storage
+albo brak ekstraktu w cache (ekstrakcja: panel.extraction).
+"""
+import hashlib
+import os
+import posixpath
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+UPLOAD_DIR = "ai_uploads/sha256"
+EXTRACT_CACHE_PREFIX = "ai_extract:v2"
+EXTRACT_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+FAILED_EXTRACT_TIMEOUT = 60 * 60  # plik, którego ekstrakcja przekroczyła czas – nie męczymy puli co chwilę
+
+
+def content_hash(f) -> str:
+    """SHA-256 pliku z uploadu (po kawałkach, bez wczytywania całości)."""
+    digest = hashlib.sha256()
+    for chunk in f.chunks():
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def content_path(digest: str, name: str) -> str:
+    ext = os.path.splitext(name or "")[1].lower()
+    return posixpath.join(UPLOAD_DIR, digest[:2], digest[2:4], f"{digest}{ext}")
+
+
+def store_upload(f, digest: str, storage=None) -> str:
+    """Zapisuje plik pod ścieżką z hasha; jeśli już jest – tylko zwraca nazwę."""
+    storage = storage or default_storage
+    path = content_path(digest, f.name)
+    if storage.exists(path):
+        return path
+    f.seek(0)
+    return storage.save(path, f)
+
+
+def _extract_key(digest: str, kind: str) -> str:
+    return f"{EXTRACT_CACHE_PREFIX}:{kind}:{digest}"
+
+
+def cached_text(digest: str, kind: str):
+    """Ekstrakt z cache albo None (pusty tekst też jest wynikiem – nie parsujemy drugi raz)."""
+    return cache.get(_extract_key(digest, kind))
+
+
+def remember_text(digest: str, kind: str, text):
+    """Zapisuje ekstrakt; None (ten plik przekroczył czas / wywrócił parser) – pusty tekst na krócej."""
+    timeout = EXTRACT_CACHE_TIMEOUT if text is not None else FAILED_EXTRACT_TIMEOUT
+    cache.set(_extract_key(digest, kind), text or "", timeout)
@@ -0,0 +1,197 @@
+# panel/audit.py
+"""
+Zapis AuditLog bez kosztu w ścieżce requestu.
+
+- Stan "przed zmianą" bierzemy z pamięci: migawka pól robiona przy
+  post_init (wartości już wczytane z bazy), więc diff nie wymaga
+  dodatkowego SELECT-a przed zapisem.
+- `record()` nie pisze od razu: wpis idzie do pisarza dopiero po COMMIT
+  (transaction.on_commit, osobno dla każdego wpisu); wycofana transakcja
+  (albo savepoint) nie zostawia wpisów.
+- Pisarz (`AuditWriter`) zbiera wpisy w kolejce i zapisuje je w tle
+  paczkami przez bulk_create. Przy AUDIT_LOG_ASYNC=0 (np. komendy,
+  testy) zapisuje od razu, wpis po wpisie.
+
+Odczyt: `object_history()` / `user_history()` – strony po kursorze
+(created_at, id) na indeksach (obj_type, obj_id, created_at) i
+(user, created_at); koszt nie rośnie z rozmiarem tabeli.
+
+Ustawienia: AUDIT_LOG_ASYNC, AUDIT_LOG_BATCH_SIZE, AUDIT_LOG_FLUSH_INTERVAL.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+from datetime import date, datetime
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.fields.files import FieldFile
+
+from .models import AuditLog
+from .pagination import KeysetPage, keyset_page
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_ATTR = "_audit_snapshot"
+
+
+def jsonable(value):
+    """Zamienia wartości na JSON-safe (dla AuditLog.details)."""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, FieldFile):
+        return value.name or ""
+    # prymitywy zostawiamy; inne rzutujemy na str
+    try:
+        json.dumps(value)
+        return value
+    except Exception:
+        return str(value)
+
+
+# --- migawki i diff ---
+
+def snapshot(instance, fields) -> dict:
+    """Wartości wczytanych pól (pola odroczone pomijamy – bez dodatkowych zapytań)."""
+    data = instance.__dict__
+    return {f: jsonable(data[f]) for f in fields if f in data}
+
+
+def take_snapshot(instance, fields):
+    setattr(instance, SNAPSHOT_ATTR, snapshot(instance, fields))
+
+
+def diff(instance, fields, created=False) -> dict:
+    """{pole: {"old", "new"}} względem migawki; po nowym obiekcie – wszystkie pola."""
+    current = snapshot(instance, fields)
+    if created:
+        return {f: {"old": None, "new": v} for f, v in current.items()}
+    old = getattr(instance, SNAPSHOT_ATTR, None) or {}
+    return {
+        f: {"old": old[f], "new": v}
+        for f, v in current.items()
+        # porównujemy po str, ale zapisujemy JSON-safe wartości
+        if f in old and str(old[f]) != str(v)
+    }
+
+
+# --- pisarz w tle ---
+
+class AuditWriter:
+    def __init__(self, batch_size=200, flush_interval=1.0, asynchronous=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.asynchronous = asynchronous
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, entries):
+        if not entries:
+            return
+        if not self.asynchronous:
+            self._write(list(entries))
+            return
+        self._ensure_thread()
+        for entry in entries:
+            self._queue.put(entry)
+
+    def flush(self):
+        """Czeka, aż kolejka zostanie zapisana (atexit, komendy)."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                close_old_connections()
+
+    def _write(self, entries):
+        try:
+            AuditLog.objects.bulk_create(entries, batch_size=self.batch_size)
+        except Exception:
+            log.exception("AuditLog: nie udało się zapisać %d wpisów", len(entries))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> AuditWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    batch_size=getattr(settings, "AUDIT_LOG_BATCH_SIZE", 200),
+                    flush_interval=getattr(settings, "AUDIT_LOG_FLUSH_INTERVAL", 1.0),
+                    asynchronous=getattr(settings, "AUDIT_LOG_ASYNC", True),
+                )
+                atexit.register(_writer.flush)
+    return _writer
+
+
+# --- po COMMIT ---
+
+def _submit_entry(entry):
+    get_writer().submit([entry])
+
+
+def record(action, obj_type="", obj_id="", details=None, actor="system", user=None, ip=None):
+    """Dodaje wpis audytu – zapis po COMMIT, paczkami, poza requestem."""
+    entry = AuditLog(
+        action=action,
+        obj_type=obj_type,
+        obj_id=str(obj_id) if obj_id is not None else "",
+        details=details,
+        actor=actor,
+        user=user,
+        created_by_ip=ip,
+    )
+    # callback per wpis: rollback transakcji/savepointu usuwa go razem z wpisem
+    # (poza transakcją on_commit wykonuje się od razu); paczki skleja pisarz
+    transaction.on_commit(partial(_submit_entry, entry))
+
+
+# --- odczyt historii ---
+
+def _history(qs, cursor, size, since) -> KeysetPage:
+    if since is not None:
+        # przy partycjach ogranicza skan do miesięcy od `since`
+        qs = qs.filter(created_at__gte=since)
+    return keyset_page(qs.select_related("user"), cursor, "created_at", size)
+
+
+def object_history(obj_type, obj_id, cursor=None, size=50, since=None) -> KeysetPage:
+    """Wpisy dla obiektu (np. "profil", 12) od najnowszych, po kursorze."""
+    qs = AuditLog.objects.filter(obj_type=obj_type, obj_id=str(obj_id))
+    return _history(qs, cursor, size, since)
+
+
+def user_history(user, cursor=None, size=50, since=None) -> KeysetPage:
+    """Wpisy wykonane przez użytkownika (AuditLog.user) od najnowszych."""
+    qs = AuditLog.objects.filter(user=user)
+    return _history(qs, cursor, size, since)
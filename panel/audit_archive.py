@@ -0,0 +1,343 @@
+# panel/audit_archive.py
+"""
+AuditLog: partycje miesięczne (Postgres) i retencja z archiwum w storage.
+
+Partycjonowanie jest opcjonalne (AUDIT_LOG_PARTITIONED=1, tylko Postgres):
+- `convert_to_partitioned()` – jednorazowa zamiana tabeli na
+  PARTITION BY RANGE (created_at): partycja per miesiąc + partycja DEFAULT,
+  PK (id, created_at), indeksy i klucze obce przeniesione z dawnej tabeli,
+- `ensure_partitions()` – partycje na bieżący i kolejne miesiące (cron);
+  wiersze, które zdążyły trafić do DEFAULT, są przenoszone przy tworzeniu.
+
+Na SQLite (i bez flagi) tabela zostaje zwykła – retencja kasuje wiersze
+paczkami po indeksie created_at.
+
+Retencja (`archive_month`): wiersze miesiąca -> JSONL.gz w storage
+(AUDIT_LOG_ARCHIVE_DIR/auditlog-RRRR-MM.<pierwsze id>-<ostatnie id>.jsonl.gz),
+potem DROP partycji albo DELETE. Nazwa pliku zapisuje zakres id, więc
+kolejne uruchomienie (np. po --export-only) eksportuje tylko wiersze
+o wyższych id. Usuwane są dokładnie id odczytane z plików archiwum –
+wiersz, którego nie ma w żadnym pliku, zostaje w bazie.
+
+Eksport po najwyższym id jest poprawny tylko dla miesięcy, do których nic
+już nie dopisuje: created_at to chwila INSERT-u (auto_now_add, także przy
+zapisie paczkami po commicie), więc po ARCHIVE_SETTLE od końca miesiąca
+nie ma już transakcji, która dołoży wiersz z niższym id. Młodszych
+miesięcy archive_month nie przyjmuje.
+"""
+import gzip
+import json
+import logging
+import re
+import tempfile
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+from .streaming import iter_gzip
+
+log = logging.getLogger(__name__)
+
+TABLE = AuditLog._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+DELETE_BATCH = 5000
+LINES_PER_CHUNK = 1000
+ARCHIVE_FIELDS = ("id", "created_at", "user_id", "actor", "action", "obj_type", "obj_id",
+                  "details", "created_by_ip")
+ARCHIVE_SETTLE = timedelta(days=1)  # od końca miesiąca do pierwszej archiwizacji
+PART_RE = re.compile(r"^auditlog-(\d{4})-(\d{2})\.(\d+)-(\d+)\.jsonl\.gz$")
+
+
+# --- miesiące ---
+
+def month_start(day) -> date:
+    return date(day.year, day.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def prev_month(month: date) -> date:
+    return date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+
+
+def _bound(month: date) -> datetime:
+    # granice miesięcy w strefie serwisu (TIME_ZONE), jak raporty księgowe
+    return timezone.make_aware(datetime(month.year, month.month, 1))
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+# --- partycje (Postgres) ---
+
+def partitioning_enabled() -> bool:
+    return getattr(settings, "AUDIT_LOG_PARTITIONED", False) and connection.vendor == "postgresql"
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE])
+        return cur.fetchone() is not None
+
+
+def _table_exists(cur, name) -> bool:
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cur.fetchone()[0]
+
+
+def _create_partition(cur, month: date) -> bool:
+    """Partycja miesiąca (z przeniesieniem wierszy z DEFAULT). False, jeśli już była."""
+    name = partition_name(month)
+    if _table_exists(cur, name):
+        return False
+    qn = connection.ops.quote_name
+    start, end = _bound(month), _bound(next_month(month))
+    cur.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS)")
+    if _table_exists(cur, DEFAULT_PARTITION):
+        # ATTACH odmówi, jeśli DEFAULT ma wiersze z zakresu nowej partycji
+        cur.execute(
+            f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} "
+            f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            [start, end],
+        )
+    cur.execute(
+        f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+    return True
+
+
+def ensure_partitions(ahead: int = 3) -> list:
+    """Partycje od bieżącego miesiąca na `ahead` miesięcy do przodu. Zwraca utworzone."""
+    month = month_start(timezone.localdate())
+    created = []
+    with transaction.atomic(), connection.cursor() as cur:
+        for _ in range(ahead + 1):
+            if _create_partition(cur, month):
+                created.append(partition_name(month))
+            month = next_month(month)
+    return created
+
+
+def convert_to_partitioned(ahead: int = 3) -> list:
+    """Jednorazowo: zwykła tabela AuditLog -> tabela partycjonowana. Zwraca utworzone partycje."""
+    if is_partitioned():
+        return []
+    qn = connection.ops.quote_name
+    legacy = f"{TABLE}_legacy"
+    pkey = f"{TABLE}_pkey"
+    seq = f"{TABLE}_pid_seq"
+    created = []
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"LOCK TABLE {qn(TABLE)} IN ACCESS EXCLUSIVE MODE")
+        # definicje indeksów (bez PK) i kluczy obcych – odtworzymy je na nowej tabeli
+        cur.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+            "AND tablename = %s AND indexname <> %s",
+            [TABLE, pkey],
+        )
+        index_defs = [row[0] for row in cur.fetchall()]
+        cur.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cur.fetchall()
+        cur.execute(f"SELECT MIN(created_at), COALESCE(MAX(id), 0) FROM {qn(TABLE)}")
+        oldest, max_id = cur.fetchone()
+
+        cur.execute(f"ALTER TABLE {qn(TABLE)} RENAME TO {qn(legacy)}")
+        # nazwa PK zostaje dla nowej tabeli (inaczej Postgres nada <tabela>_pkey1)
+        cur.execute(f"ALTER TABLE {qn(legacy)} RENAME CONSTRAINT {qn(pkey)} TO {qn(legacy + '_pkey')}")
+        cur.execute(
+            f"CREATE TABLE {qn(TABLE)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        # id z własnej sekwencji (identity/serial zostaje przy dawnej tabeli)
+        cur.execute(f"CREATE SEQUENCE {qn(seq)}")
+        cur.execute("SELECT setval(%s, %s, false)", [seq, max_id + 1])
+        cur.execute(f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [seq])
+        cur.execute(f"ALTER SEQUENCE {qn(seq)} OWNED BY {qn(TABLE)}.id")
+        cur.execute(f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(pkey)} PRIMARY KEY (id, created_at)")
+        cur.execute(f"CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(TABLE)} DEFAULT")
+
+        month = month_start(timezone.localtime(oldest)) if oldest else month_start(timezone.localdate())
+        last = month_start(timezone.localdate())
+        for _ in range(ahead):
+            last = next_month(last)
+        while month <= last:
+            if _create_partition(cur, month):
+                created.append(partition_name(month))
+            month = next_month(month)
+
+        cur.execute(f"INSERT INTO {qn(TABLE)} SELECT * FROM {qn(legacy)}")
+        cur.execute(f"DROP TABLE {qn(legacy)}")
+        for index_def in index_defs:
+            cur.execute(index_def)
+        for name, definition in foreign_keys:
+            cur.execute(f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}")
+    return created
+
+
+# --- retencja ---
+
+def archive_months(keep_months: int) -> list:
+    """Miesiące z wpisami starszymi niż `keep_months` pełnych miesięcy."""
+    cutoff = month_start(timezone.localdate())
+    for _ in range(keep_months):
+        cutoff = prev_month(cutoff)
+    return [
+        month_start(d)
+        for d in AuditLog.objects.filter(created_at__lt=_bound(cutoff)).dates("created_at", "month")
+        if is_settled(month_start(d))
+    ]
+
+
+def is_settled(month: date) -> bool:
+    """Czy do miesiąca nie mogą już dojść wiersze (patrz docstring modułu)."""
+    return _bound(next_month(month)) <= timezone.now() - ARCHIVE_SETTLE
+
+
+def _check_settled(month: date):
+    if not is_settled(month):
+        raise ValueError(f"AuditLog {month:%Y-%m}: miesiąc za świeży do archiwizacji (ARCHIVE_SETTLE).")
+
+
+def _month_qs(month: date):
+    return AuditLog.objects.filter(created_at__gte=_bound(month), created_at__lt=_bound(next_month(month)))
+
+
+def _archive_dir() -> str:
+    return getattr(settings, "AUDIT_LOG_ARCHIVE_DIR", "audit-archive")
+
+
+def archive_name(month: date, first_id: int, last_id: int) -> str:
+    return f"{_archive_dir()}/auditlog-{month:%Y-%m}.{first_id:010d}-{last_id:010d}.jsonl.gz"
+
+
+def _archived_parts(month: date, storage) -> list:
+    """[(nazwa, pierwsze id, ostatnie id)] plików archiwum miesiąca, rosnąco po id."""
+    try:
+        _, files = storage.listdir(_archive_dir())
+    except FileNotFoundError:
+        return []
+    parts = []
+    for name in files:
+        m = PART_RE.match(name)
+        if m and (int(m[1]), int(m[2])) == (month.year, month.month):
+            parts.append((f"{_archive_dir()}/{name}", int(m[3]), int(m[4])))
+    return sorted(parts, key=lambda part: part[1])
+
+
+def archived_upto(month: date, storage=None) -> int:
+    """Najwyższe id miesiąca zapisane już w archiwum (0, jeśli nic)."""
+    parts = _archived_parts(month, storage or default_storage)
+    return max((last for _name, _first, last in parts), default=0)
+
+
+def _archived_id_batches(month: date, storage):
+    """Id z plików archiwum miesiąca, paczkami po DELETE_BATCH (plik sprawdzany z nazwą)."""
+    batch = []
+    for name, first, last in _archived_parts(month, storage):
+        previous = first - 1
+        with storage.open(name, "rb") as raw, gzip.open(raw, "rt", encoding="utf-8") as lines:
+            for line in lines:
+                row_id = json.loads(line)["id"]
+                # plik pisany rosnąco po id w zakresie z nazwy – inaczej to nie nasze archiwum
+                if not previous < row_id <= last:
+                    raise ValueError(f"{name}: id {row_id} poza zakresem {first}-{last} albo nie rosnąco.")
+                previous = row_id
+                batch.append(row_id)
+                if len(batch) >= DELETE_BATCH:
+                    yield batch
+                    batch = []
+        if previous != last:
+            raise ValueError(f"{name}: ostatnie id {previous}, w nazwie {last} – plik niepełny.")
+    if batch:
+        yield batch
+
+
+def _jsonl_chunks(qs, stats: list):
+    lines = []
+    for row in qs.order_by("id").values(*ARCHIVE_FIELDS).iterator(chunk_size=2000):
+        lines.append(json.dumps(row, default=str, ensure_ascii=False))
+        stats[0] += 1
+        stats[1] = stats[1] or row["id"]
+        stats[2] = row["id"]
+        if len(lines) >= LINES_PER_CHUNK:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def export_month(month: date, storage=None):
+    """
+    Zapisuje do JSONL.gz wiersze miesiąca jeszcze nieobecne w archiwum
+    (id > archived_upto). Zwraca (nazwa pliku | None, liczba wierszy).
+    """
+    _check_settled(month)
+    storage = storage or default_storage
+    qs = _month_qs(month).filter(id__gt=archived_upto(month, storage))
+    stats = [0, None, None]  # liczba wierszy, pierwsze id, ostatnie id
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as tmp:
+        for chunk in iter_gzip(_jsonl_chunks(qs, stats)):
+            tmp.write(chunk)
+        if not stats[0]:
+            return None, 0
+        tmp.seek(0)
+        name = storage.save(archive_name(month, stats[1], stats[2]), File(tmp))
+    return name, stats[0]
+
+
+def purge_month(month: date, storage=None) -> int:
+    """
+    Usuwa wpisy miesiąca zapisane w plikach archiwum (dokładnie te id): DROP
+    partycji (Postgres), gdy wszystkie jej wiersze są w archiwum, w pozostałych
+    przypadkach DELETE paczkami.
+    """
+    _check_settled(month)
+    storage = storage or default_storage
+    removed, dropped = 0, False
+    if is_partitioned():
+        qn = connection.ops.quote_name
+        name = partition_name(month)
+        with transaction.atomic(), connection.cursor() as cur:
+            if _table_exists(cur, name):
+                cur.execute(f"LOCK TABLE {qn(name)} IN SHARE MODE")
+                cur.execute(f"SELECT COUNT(*) FROM {qn(name)}")
+                total = cur.fetchone()[0]
+                archived = 0
+                for ids in _archived_id_batches(month, storage):
+                    cur.execute(f"SELECT COUNT(*) FROM {qn(name)} WHERE id = ANY(%s)", [ids])
+                    archived += cur.fetchone()[0]
+                if archived == total:
+                    removed = total
+                    cur.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+                    cur.execute(f"DROP TABLE {qn(name)}")
+                    dropped = True
+    if not dropped:
+        # zwykła tabela, partycja z niezarchiwizowanymi wierszami albo resztki w DEFAULT
+        qs = _month_qs(month)
+        for ids in _archived_id_batches(month, storage):
+            removed += qs.filter(id__in=ids).delete()[0]
+    return removed
+
+
+def archive_month(month: date, delete: bool = True, storage=None) -> dict:
+    storage = storage or default_storage
+    name, exported = export_month(month, storage=storage)
+    removed = purge_month(month, storage=storage) if delete else 0
+    log.info("AuditLog %s: zarchiwizowano %d wpisów do %s, usunięto %d", f"{month:%Y-%m}", exported, name, removed)
+    return {"month": month, "file": name, "exported": exported, "removed": removed}
@@ -0,0 +1,116 @@
+# panel/calendar_feed.py
+"""
+Plan zajęć jako feed iCalendar (RFC 5545) pod prywatnym adresem z tokenem.
+
+Aplikacje kalendarza odpytują feed co kilkanaście minut – zamiast
+odświeżać moj_plan_zajec / moje_rezerwacje_ucznia (pełny HTML). Każde
+odpytanie zaczyna się od jednego zapytania agregującego po oknie feedu:
+max(updated_at) + liczba rezerwacji (liczba łapie usunięcia). Z tego są
+ETag i Last-Modified; gdy klient ma aktualną wersję – 304 bez pobierania
+wierszy i bez budowania treści.
+
+Feed obejmuje zajęcia, w których użytkownik jest nauczycielem albo
+uczniem, od FEED_PAST_DAYS dni wstecz. Odrzucone rezerwacje zostają
+w feedzie ze STATUS:CANCELLED (kalendarz usuwa/przekreśla wydarzenie).
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .maintenance import LESSON_DURATION
+from .models import Rezerwacja
+
+FEED_PAST_DAYS = 90
+REFRESH_INTERVAL = "PT15M"
+PRODID = "-//Korepetycje//Plan zajec//PL"
+
+
+def feed_queryset(user):
+    # początek okna przesuwa się raz na dobę (wchodzi do ETag)
+    window_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    window_start -= timedelta(days=FEED_PAST_DAYS)
+    qs = Rezerwacja.objects.filter(Q(nauczyciel=user) | Q(uczen=user), termin__gte=window_start)
+    return qs, window_start
+
+
+def feed_version(user):
+    """(etag, last_modified) z jednego zapytania agregującego – bez pobierania rezerwacji."""
+    qs, window_start = feed_queryset(user)
+    stats = qs.aggregate(last=Max("updated_at"), count=Count("id"))
+    last = stats["last"]
+    raw = f"{window_start.isoformat()}:{stats['count']}:{last.timestamp() if last else 0}"
+    etag = '"%s"' % hashlib.sha1(raw.encode()).hexdigest()[:20]
+    return etag, last
+
+
+# --- format RFC 5545 ---
+def _escape(value) -> str:
+    return (
+        str(value or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Linie max 75 oktetów, kontynuacja od spacji (nie tnie znaków UTF-8)."""
+    parts, current, size = [], "", 0
+    for ch in line:
+        width = len(ch.encode("utf-8"))
+        if size + width > 75:
+            parts.append(current)
+            current, size = " ", 1
+        current += ch
+        size += width
+    parts.append(current)
+    return "\r\n".join(parts)
+
+
+def _utc(dt) -> str:
+    return dt.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event_lines(r, user, host, base_url):
+    teacher_view = r.nauczyciel_id == user.pk
+    other = r.uczen if teacher_view else r.nauczyciel
+    other_name = other.get_full_name() or other.username
+    title = r.przedmiot or r.temat or "Zajęcia"
+    return [
+        "BEGIN:VEVENT",
+        f"UID:rez-{r.pk}@{host}",
+        f"DTSTAMP:{_utc(r.updated_at)}",
+        f"LAST-MODIFIED:{_utc(r.updated_at)}",
+        f"DTSTART:{_utc(r.termin)}",
+        f"DTEND:{_utc(r.termin + LESSON_DURATION)}",
+        f"SUMMARY:{_escape(f'{title} – {other_name}')}",
+        f"DESCRIPTION:{_escape(r.temat)}",
+        f"URL:{base_url}{reverse('zajecia_online', args=[r.pk])}",
+        "STATUS:CANCELLED" if r.odrzucona else "STATUS:CONFIRMED",
+        "END:VEVENT",
+    ]
+
+
+def render_feed(user, request) -> str:
+    qs, _ = feed_queryset(user)
+    host = request.get_host().split(":")[0]
+    base_url = f"{request.scheme}://{request.get_host()}"
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape('Plan zajęć – ' + (user.get_full_name() or user.username))}",
+        f"REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}",
+        f"X-PUBLISHED-TTL:{REFRESH_INTERVAL}",
+    ]
+    for r in qs.select_related("uczen", "nauczyciel").order_by("termin"):
+        lines.extend(_event_lines(r, user, host, base_url))
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(line) for line in lines) + "\r\n"
@@ -0,0 +1,18 @@
+# panel/context_processors.py
+"""
+Konfiguracje serwisu w każdym szablonie: {{ legal_config.site_email }},
+{{ payment_settings.numer_konta }}.
+
+Obiekty są leniwe – cache (panel.singletons) jest pytany dopiero, gdy
+szablon faktycznie użyje zmiennej.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .singletons import legal_config, payment_settings
+
+
+def site_config(request):
+    return {
+        "legal_config": SimpleLazyObject(legal_config.get),
+        "payment_settings": SimpleLazyObject(payment_settings.get),
+    }
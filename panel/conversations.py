@@ -0,0 +1,94 @@
+# panel/conversations.py
+"""
+Historia rozmów czatu AI poza sesją – tabela AiChatMessage.
+
+Wcześniej do 16 wiadomości na personę siedziało w request.session, więc
+każda tura przepisywała rosnący blob sesji, a każdy request (także zwykłe
+strony) go wczytywał. Teraz:
+- zapis to INSERT nowych wiadomości (bez przepisywania historii),
+- rozmowa (właściciel + persona) jest przycinana do MAX_STORED_MESSAGES,
+- do promptu trafia okno najnowszych wiadomości mieszczące się w budżecie
+  tokenów (HISTORY_TOKEN_BUDGET, szacunek ~4 znaki na token).
+
+Właściciel to zalogowany użytkownik albo – dla gości – klucz sesji
+(w sesji zostaje tylko sam klucz). Stara historia z sesji jest
+przenoszona do tabeli przy pierwszej turze.
+"""
+from django.db import transaction
+
+from .models import AiChatMessage
+
+MAX_STORED_MESSAGES = 40
+HISTORY_MAX_MESSAGES = 16         # max 8 tur w prompcie
+HISTORY_TOKEN_BUDGET = 3000
+LEGACY_SESSION_PREFIX = "ai_chat_history::"
+
+
+def owner_for(request) -> dict:
+    """Filtr właściciela rozmowy (kwargs dla AiChatMessage)."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return {"user": user}
+    session = request.session
+    if not session.session_key:
+        session.save()
+        session.modified = True  # SessionMiddleware ustawi ciasteczko z nowym kluczem
+    return {"user": None, "session_key": session.session_key}
+
+
+def _conversation(owner: dict, persona: str):
+    return AiChatMessage.objects.filter(persona=persona, **owner)
+
+
+def estimate_tokens(text: str) -> int:
+    # bez tokenizera: ~4 znaki na token + narzut wiadomości
+    return len(text or "") // 4 + 4
+
+
+def window(owner: dict, persona: str, budget=HISTORY_TOKEN_BUDGET, max_messages=HISTORY_MAX_MESSAGES) -> list:
+    """Najnowsze wiadomości w budżecie tokenów, chronologicznie: [{"role", "content"}]."""
+    rows = _conversation(owner, persona).order_by("-id").values_list("role", "content")[:max_messages]
+    picked, used = [], 0
+    for role, content in rows:
+        used += estimate_tokens(content)
+        if used > budget and picked:
+            break
+        picked.append({"role": role, "content": content})
+    picked.reverse()
+    # okno zaczyna się od pytania użytkownika, nie od urwanej odpowiedzi
+    while picked and picked[0]["role"] != "user":
+        picked.pop(0)
+    return picked
+
+
+def append(owner: dict, persona: str, *messages):
+    """Dopisuje wiadomości ({"role", "content"}) i przycina rozmowę."""
+    with transaction.atomic():
+        AiChatMessage.objects.bulk_create(
+            [AiChatMessage(persona=persona, role=m["role"], content=m["content"], **owner) for m in messages]
+        )
+        trim(owner, persona)
+
+
+def trim(owner: dict, persona: str, keep=MAX_STORED_MESSAGES) -> int:
+    qs = _conversation(owner, persona)
+    oldest_kept = list(qs.order_by("-id").values_list("id", flat=True)[keep - 1:keep])
+    if not oldest_kept:
+        return 0
+    return qs.filter(id__lt=oldest_kept[0]).delete()[0]
+
+
+def clear(owner: dict, persona=None) -> int:
+    qs = AiChatMessage.objects.filter(**owner)
+    if persona is not None:
+        qs = qs.filter(persona=persona)
+    return qs.delete()[0]
+
+
+def adopt_session_history(request, owner: dict, personas):
+    """Jednorazowo: historia z dawnych kluczy sesji -> tabela; klucze znikają z sesji."""
+    session = request.session
+    for persona in personas:
+        legacy = session.pop(LEGACY_SESSION_PREFIX + persona, None)
+        if legacy and not _conversation(owner, persona).exists():
+            append(owner, persona, *legacy)
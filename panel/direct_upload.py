@@ -0,0 +1,203 @@
+# panel/direct_upload.py
+"""
+Bezpośredni upload plików do storage (S3/OVH) z pominięciem workerów Django.
+
+Przepływ:
+1) przeglądarka woła `direct_upload_presign` -> dostaje URL + pola POST policy,
+2) wysyła plik prosto do bucketu (albo do lokalnego zastępnika w dev),
+3) formularz wysyła tylko podpisany token, a widok wywołuje
+   `complete_direct_upload()`, który sprawdza token i zwraca klucz obiektu
+   do podpięcia pod FileField,
+4) po udanym zapisie rekordu (w tej samej transakcji) widok woła
+   `consume_direct_upload()`. Token jest jednorazowy – ten sam klucz
+   obiektu nie trafi do dwóch rekordów, a błąd walidacji formularza
+   przed zapisem nie zużywa tokenu (można wysłać formularz ponownie).
+
+Uwaga: bucket musi mieć CORS zezwalający na POST z domeny serwisu.
+"""
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+SIGNING_SALT = "panel.direct_upload"
+UPLOAD_EXPIRES = getattr(settings, "DIRECT_UPLOAD_EXPIRES", 15 * 60)  # sekundy
+TOKEN_MAX_AGE = UPLOAD_EXPIRES * 4
+USED_TOKEN_PREFIX = "direct_upload:used"
+
+# kind -> ścieżka docelowa (jak upload_to w modelu), dozwolone rozszerzenia, limit MB
+UPLOAD_TARGETS = {
+    "plik": {
+        "upload_to": "rezerwacje/",
+        "exts": {"pdf", "jpg", "jpeg"},
+        "max_mb": 10,
+    },
+    "material": {
+        "upload_to": "materialy/",
+        "exts": {"pdf", "jpg", "jpeg", "png"},
+        "max_mb": 20,
+    },
+    "potwierdzenie": {
+        "upload_to": "potwierdzenia/%Y/%m/",
+        "exts": {"pdf", "jpg", "jpeg", "png", "webp", "heic"},
+        "max_mb": 10,
+    },
+}
+
+
+def is_s3_enabled() -> bool:
+    return bool(getattr(settings, "USE_S3", False))
+
+
+def _target(kind: str) -> dict:
+    try:
+        return UPLOAD_TARGETS[kind]
+    except KeyError:
+        raise ValidationError(f"Nieznany typ uploadu: {kind}")
+
+
+def _validate_meta(kind: str, filename: str, size) -> None:
+    target = _target(kind)
+    ext = os.path.splitext(filename or "")[1].lower().replace(".", "")
+    if ext not in target["exts"]:
+        raise ValidationError(f"Dozwolone formaty: {', '.join(sorted(target['exts']))}")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        size = 0
+    if size <= 0 or size > target["max_mb"] * 1024 * 1024:
+        raise ValidationError(f"Maksymalny rozmiar pliku to {target['max_mb']} MB.")
+
+
+def build_object_name(kind: str, filename: str) -> str:
+    """Nazwa w storage (taka, jaką trzyma FileField) – unikalna dzięki uuid."""
+    target = _target(kind)
+    folder = timezone.now().strftime(target["upload_to"])
+    safe = get_valid_filename(os.path.basename(filename or "plik"))
+    return posixpath.join(folder, f"{uuid.uuid4().hex[:12]}_{safe}")
+
+
+def _make_token(kind: str, name: str, user_id) -> str:
+    return signing.dumps({"kind": kind, "name": name, "uid": user_id}, salt=SIGNING_SALT)
+
+
+def _load_token(token: str, kind: str, user_id) -> str:
+    try:
+        data = signing.loads(token, salt=SIGNING_SALT, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        raise ValidationError("Nieprawidłowy lub wygasły token uploadu.")
+    if data.get("kind") != kind or data.get("uid") != user_id:
+        raise ValidationError("Token uploadu nie pasuje do formularza.")
+    return data["name"]
+
+
+def _used_token_key(token: str) -> str:
+    return f"{USED_TOKEN_PREFIX}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def _consume_token(token: str) -> bool:
+    """Oznacza token jako użyty; False, jeśli już był."""
+    # cache.add jest atomowe między procesami tylko na Redis/Memcached (prod);
+    # cache plikowy i locmem (dev) robią get+set, więc wyścig dwóch żądań przejdzie.
+    # Po TOKEN_MAX_AGE token i tak nie przejdzie weryfikacji podpisu.
+    return cache.add(_used_token_key(token), 1, TOKEN_MAX_AGE)
+
+
+def _s3_presigned_post(name: str, target: dict, content_type: str) -> dict:
+    storage = default_storage
+    # S3Boto3Storage dokleja AWS_LOCATION – klucz w bucket musi być znormalizowany tak samo
+    key = storage._normalize_name(name) if hasattr(storage, "_normalize_name") else name
+    client = storage.connection.meta.client
+    fields = {}
+    conditions = [["content-length-range", 1, target["max_mb"] * 1024 * 1024]]
+    if content_type:
+        fields["Content-Type"] = content_type
+        conditions.append({"Content-Type": content_type})
+    return client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=key,
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=UPLOAD_EXPIRES,
+    )
+
+
+def presign_upload(kind: str, filename: str, size, content_type: str, user) -> dict:
+    """
+    Zwraca {"url", "fields", "file_field", "token"} dla przeglądarki.
+    - S3: POST policy prosto do bucketu,
+    - lokalnie: POST do `direct_upload_local` (zastępnik na FileSystemStorage).
+    """
+    _validate_meta(kind, filename, size)
+    target = _target(kind)
+    name = build_object_name(kind, filename)
+    token = _make_token(kind, name, user.pk)
+
+    if is_s3_enabled():
+        post = _s3_presigned_post(name, target, content_type)
+        return {"url": post["url"], "fields": post["fields"], "file_field": "file", "token": token}
+
+    return {
+        "url": reverse("direct_upload_local"),
+        "fields": {"token": token, "kind": kind},
+        "file_field": "file",
+        "token": token,
+    }
+
+
+def save_local_upload(token: str, kind: str, uploaded_file, user) -> str:
+    """Zastępnik S3 na dev: zapisuje plik dokładnie pod nazwą z tokenu."""
+    name = _load_token(token, kind, user.pk)
+    _validate_meta(kind, uploaded_file.name, uploaded_file.size)
+    saved = default_storage.save(name, uploaded_file)
+    if saved != name:
+        default_storage.delete(saved)
+        raise ValidationError("Plik o tej nazwie już istnieje.")
+    return saved
+
+
+def complete_direct_upload(request, kind: str) -> str | None:
+    """
+    Callback zakończenia uploadu – wywoływany przez widok, który dostał formularz.
+    Czyta `<kind>_token` z POST, weryfikuje podpis/właściciela/istnienie obiektu
+    i zwraca nazwę w storage do przypisania w FileField (albo None, gdy brak tokenu).
+    Nie zużywa tokenu – to robi `consume_direct_upload()` po zapisie rekordu.
+    """
+    token = (request.POST.get(f"{kind}_token") or "").strip()
+    if not token:
+        return None
+    name = _load_token(token, kind, request.user.pk)
+    if cache.get(_used_token_key(token)):
+        raise ValidationError("Ten plik został już dołączony – wgraj go ponownie.")
+    target = _target(kind)
+    try:
+        exists = default_storage.exists(name)
+        size = default_storage.size(name) if exists else 0
+    except Exception:
+        exists, size = False, 0
+    if not exists:
+        raise ValidationError("Plik nie dotarł do storage – spróbuj ponownie.")
+    if size > target["max_mb"] * 1024 * 1024:
+        default_storage.delete(name)
+        raise ValidationError(f"Maksymalny rozmiar pliku to {target['max_mb']} MB.")
+    return name
+
+
+def consume_direct_upload(request, kind: str) -> None:
+    """
+    Zużywa token `<kind>_token` po zapisie rekordu z plikiem. Wołać w tej samej
+    transakcji co save()/create() – ValidationError (token użyty w międzyczasie
+    przez inne żądanie) ma ją wycofać. Bez tokenu w POST nic nie robi.
+    """
+    token = (request.POST.get(f"{kind}_token") or "").strip()
+    if token and not _consume_token(token):
+        raise ValidationError("Ten plik został już dołączony – wgraj go ponownie.")
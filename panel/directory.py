@@ -0,0 +1,162 @@
+# panel/directory.py
+"""
+Katalog nauczycieli na stronę główną – gotowe "karty" w cache.
+
+Karty (imię, opis, tagi, zdjęcie) budujemy raz i trzymamy we wspólnym
+cache Django bez wygasania. Przebudowę robią sygnały po zapisie
+Profil/User (panel/signals.py), więc anonimowy ruch na stronie głównej
+nie dotyka bazy.
+
+Zdjęcia w S3 mają podpisane URL-e z terminem ważności, dlatego w cache
+trzymamy tylko nazwę pliku, a URL podpisujemy przy renderze przez
+panel.signed_urls (podpis współdzielony w obrębie kubełka czasu).
+
+ETag strony = wersja katalogu + szablon + aktualne URL-e zdjęć;
+Last-Modified = ostatnia przebudowa katalogu albo zmiana szablonu.
+"""
+import hashlib
+import os
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db.models.fields.files import FieldFile
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import Profil
+from .offerings import offerings_by_teacher
+from .signed_urls import signed_urls
+
+CACHE_KEY = "directory:teachers"
+PAGE_CACHE_PREFIX = "directory:page"
+PAGE_CACHE_TIMEOUT = 60 * 60
+TEMPLATE_NAME = "index.html"
+DEFAULT_AVATAR = "https://placehold.co/72x72"
+MAX_TAGS = 6
+
+PHOTO_FIELDS = ("zdjecie", "photo", "avatar", "photo_url", "image")
+TAG_FIELDS = ("tytul_naukowy",)
+
+
+def _photo(profil):
+    """("file", pole, nazwa) dla plików w storage albo ("url", adres) dla zwykłego tekstu."""
+    for field_name in PHOTO_FIELDS:
+        val = getattr(profil, field_name, "")
+        if not val:
+            continue
+        if isinstance(val, FieldFile):
+            if val.name:
+                return ("file", field_name, val.name)
+        else:
+            return ("url", str(val))
+    return None
+
+
+def _tags(profil, oferta=()):
+    # przedmioty z OfertaNauczyciela (panel.offerings), potem pola tekstowe profilu
+    seen, tag_list = set(), []
+    sources = [[przedmiot for przedmiot, _poziom in oferta]]
+    sources += [(getattr(profil, src, "") or "").split(",") for src in TAG_FIELDS]
+    for src in sources:
+        for t in src:
+            t = t.strip()
+            if t and t not in seen:
+                seen.add(t)
+                tag_list.append(t)
+                if len(tag_list) >= MAX_TAGS:
+                    return tag_list
+    return tag_list
+
+
+def build_teacher_cards() -> list:
+    profs = (
+        Profil.objects
+        .select_related("user")
+        .filter(is_teacher=True, user__is_active=True)
+        .order_by("user__last_name", "user__first_name")
+    )
+    oferta = offerings_by_teacher([p.user_id for p in profs])
+    cards = []
+    for p in profs:
+        u = p.user
+        cards.append({
+            "full_name": (f"{u.first_name} {u.last_name}".strip() or u.username).strip(),
+            "bio": p.opis or "",
+            "photo": _photo(p),
+            "tag_list": _tags(p, oferta.get(p.user_id, ())),
+        })
+    return cards
+
+
+def rebuild_teacher_directory() -> dict:
+    cards = build_teacher_cards()
+    digest = hashlib.sha1(repr(cards).encode("utf-8")).hexdigest()[:16]
+    directory = {"cards": cards, "version": digest, "updated": timezone.now().replace(microsecond=0)}
+    cache.set(CACHE_KEY, directory, None)
+    return directory
+
+
+def teacher_directory(request=None) -> dict:
+    """Katalog z cache (zapamiętany też na request – ETag/Last-Modified/widok czytają raz)."""
+    directory = getattr(request, "_teacher_directory", None)
+    if directory is None:
+        directory = cache.get(CACHE_KEY) or rebuild_teacher_directory()
+        if request is not None:
+            request._teacher_directory = directory
+    return directory
+
+
+def _photo_urls(cards) -> list:
+    files = []
+    for c in cards:
+        photo = c["photo"]
+        if photo and photo[0] == "file":
+            field = Profil._meta.get_field(photo[1])
+            files.append(FieldFile(None, field, photo[2]))
+        else:
+            files.append(None)
+    signed = signed_urls(files)
+    return [
+        signed[i] if (c["photo"] and c["photo"][0] == "file") else (c["photo"][1] if c["photo"] else "")
+        for i, c in enumerate(cards)
+    ]
+
+
+def teacher_cards(request=None) -> list:
+    """Karty do szablonu (z aktualnymi URL-ami zdjęć)."""
+    directory = teacher_directory(request)
+    cached = getattr(request, "_teacher_cards", None)
+    if cached is not None:
+        return cached
+    cards = [
+        {**c, "photo_url": url, "default_avatar": DEFAULT_AVATAR}
+        for c, url in zip(directory["cards"], _photo_urls(directory["cards"]))
+    ]
+    if request is not None:
+        request._teacher_cards = cards
+    return cards
+
+
+@lru_cache(maxsize=1)
+def _template_stamp() -> str:
+    # zmiana szablonu (deploy) = nowy ETag
+    try:
+        return str(int(os.path.getmtime(get_template(TEMPLATE_NAME).origin.name)))
+    except Exception:
+        return ""
+
+
+def page_etag(request) -> str:
+    directory = teacher_directory(request)
+    urls = "|".join(c["photo_url"] for c in teacher_cards(request))
+    raw = f"{directory['version']}:{_template_stamp()}:{urls}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def page_last_modified(request):
+    updated = teacher_directory(request)["updated"]
+    stamp = _template_stamp()
+    if stamp:
+        updated = max(updated, datetime.fromtimestamp(int(stamp), tz=dt_timezone.utc))
+    return updated
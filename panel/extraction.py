@@ -0,0 +1,243 @@
+# panel/extraction.py
+"""
+Ekstrakcja tekstu z załączników czatu AI (PDF / DOCX / TXT) do promptu.
+
+- Źródło to ścieżka pliku (upload > FILE_UPLOAD_MAX_MEMORY_SIZE leży już
+  w pliku tymczasowym) albo bajty małego uploadu – duże pliki nie są
+  wczytywane do pamięci, PdfReader czyta strony ze strumienia.
+- Liczymy sumę znaków na bieżąco i przerywamy po MAX_EXTRACT_CHARS.
+- Kilka plików jednego żądania idzie równolegle do wspólnej puli
+  procesów (AI_EXTRACT_WORKERS). Limit czasu (AI_EXTRACT_TIMEOUT) liczy
+  się dla każdego pliku od chwili, gdy trafi do procesu – czekanie na
+  wolny proces się nie wlicza. Patologiczny PDF zajmuje proces puli, nie
+  wątek serwera; po przekroczeniu czasu ubijany jest tylko proces z tym
+  plikiem, ekstrakcje innych żądań biegną dalej.
+  AI_EXTRACT_WORKERS=0 – ekstrakcja w bieżącym procesie (dev).
+
+Moduł nie importuje modeli Django – procesy puli (spawn) ładują tylko
+parsery.
+"""
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+MAX_EXTRACT_CHARS = 50_000        # twardy limit surowego ekstraktu/plik
+MAX_SUMMARY_CHARS = 6_000         # finalnie do promptu per plik
+TXT_READ_BYTES = MAX_EXTRACT_CHARS * 4  # UTF-8: do 4 bajtów na znak
+
+
+def safe_clip(text: str, limit: int) -> str:
+    if not text:
+        return ""
+    if len(text) <= limit:
+        return text
+    return text[:limit] + "\n…[przycięto]"
+
+
+def _collect(pieces, sep: str) -> str:
+    """Łączy fragmenty do budżetu znaków – suma liczona na bieżąco."""
+    parts, total = [], 0
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        parts.append(piece)
+        total += len(piece) + len(sep)
+        if total > MAX_EXTRACT_CHARS:
+            break
+    return safe_clip(sep.join(parts), MAX_EXTRACT_CHARS)
+
+
+def _open(source):
+    return open(source, "rb") if isinstance(source, str) else io.BytesIO(source)
+
+
+def extract_pdf(source) -> str:
+    from pypdf import PdfReader
+    try:
+        with _open(source) as fh:
+            reader = PdfReader(fh)
+            return _collect((page.extract_text() or "" for page in reader.pages), "\n\n")
+    except Exception:
+        return ""
+
+
+def extract_docx(source) -> str:
+    from docx import Document
+    try:
+        with _open(source) as fh:
+            doc = Document(fh)
+            return _collect((p.text for p in doc.paragraphs), "\n")
+    except Exception:
+        return ""
+
+
+def extract_txt(source) -> str:
+    with _open(source) as fh:
+        raw = fh.read(TXT_READ_BYTES)
+    return safe_clip(raw.decode("utf-8-sig", errors="ignore"), MAX_EXTRACT_CHARS)
+
+
+EXTRACTORS = {
+    "pdf": extract_pdf,
+    "docx": extract_docx,
+    "txt": extract_txt,
+}
+
+
+def extraction_kind(name: str, mime: str) -> str:
+    mime = (mime or "").lower()
+    name_low = (name or "").lower()
+    if mime.startswith("application/pdf") or name_low.endswith(".pdf"):
+        return "pdf"
+    if mime in ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",) or name_low.endswith(".docx"):
+        return "docx"
+    if mime.startswith("text/") or name_low.endswith(".txt"):
+        return "txt"
+    return ""  # na razie pomijamy .doc/.ppt/.xls
+
+
+def summarize_locally(text: str) -> str:
+    if not text:
+        return ""
+    if len(text) <= MAX_SUMMARY_CHARS:
+        return text
+    head = text[: (MAX_SUMMARY_CHARS // 2)]
+    tail = text[-(MAX_SUMMARY_CHARS // 2):]
+    return (
+        "[Zwięzły wyciąg z dłuższego pliku — środek przycięty]\n\n"
+        + head + "\n\n…[środek pominięty]…\n\n" + tail
+    )
+
+
+def extract_for_prompt(source, kind: str) -> str:
+    """Tekst pliku gotowy do promptu (ekstrakt + skrót). Wykonywane w procesie puli."""
+    extractor = EXTRACTORS.get(kind)
+    return summarize_locally(extractor(source)) if extractor else ""
+
+
+# --- pula procesów ---
+
+NOT_RUN = object()  # plik nie trafił do procesu puli (awaria startu procesu) – wynik nieznany
+
+_idle = []  # wolne procesy puli
+_slots = None  # BoundedSemaphore(AI_EXTRACT_WORKERS) – ile plików naraz w całym procesie serwera
+_pool_lock = threading.Lock()
+
+
+def _settings():
+    from django.conf import settings
+    return (
+        getattr(settings, "AI_EXTRACT_WORKERS", 2),
+        getattr(settings, "AI_EXTRACT_TIMEOUT", 20.0),
+    )
+
+
+def _worker_main(conn):
+    """Pętla procesu puli: (źródło, rodzaj) -> (ok, tekst | opis błędu)."""
+    while True:
+        try:
+            source, kind = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, extract_for_prompt(source, kind)))
+        except Exception as exc:
+            conn.send((False, repr(exc)))
+
+
+class _Worker:
+    """Proces puli z własnym kanałem – można go ubić bez ruszania pozostałych."""
+
+    def __init__(self):
+        # spawn: bez kopii wątków i połączeń DB procesu serwera
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+def _acquire(workers: int) -> _Worker:
+    global _slots
+    with _pool_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(workers)
+        slots = _slots
+    slots.acquire()
+    with _pool_lock:
+        worker = _idle.pop() if _idle else None
+    try:
+        if worker is not None and not worker.process.is_alive():
+            worker.kill()
+            worker = None
+        return worker or _Worker()
+    except Exception:
+        slots.release()
+        raise
+
+
+def _release(worker: _Worker, reuse: bool):
+    if reuse:
+        with _pool_lock:
+            _idle.append(worker)
+    else:
+        worker.kill()
+    _slots.release()
+
+
+def _extract_in_worker(source, kind: str, workers: int, timeout: float):
+    try:
+        worker = _acquire(workers)
+    except Exception:
+        log.exception("extraction: nie udało się uruchomić procesu puli (%s)", kind)
+        return NOT_RUN
+    try:
+        worker.conn.send((source, kind))
+    except (OSError, ValueError):
+        # proces padł, zanim dostał plik – to nie wina pliku
+        _release(worker, reuse=False)
+        log.warning("extraction: proces puli niedostępny (%s)", kind)
+        return NOT_RUN
+
+    # limit liczony od przekazania pliku do procesu
+    if not worker.conn.poll(timeout):
+        _release(worker, reuse=False)  # zawieszony parser nie odda procesu sam
+        log.warning("extraction: przekroczony czas (%s, %.0fs)", kind, timeout)
+        return None
+    try:
+        ok, value = worker.conn.recv()
+    except (EOFError, OSError):
+        _release(worker, reuse=False)
+        log.warning("extraction: proces puli padł (%s)", kind)
+        return None
+    _release(worker, reuse=True)
+    if not ok:
+        log.warning("extraction: błąd parsera (%s): %s", kind, value)
+        return None
+    return value
+
+
+def extract_many(jobs, timeout=None) -> list:
+    """
+    jobs: [(źródło, rodzaj)] -> [tekst | None | NOT_RUN] w tej samej kolejności.
+    None = ten plik przekroczył czas albo wywrócił parser/proces;
+    NOT_RUN = plik nie trafił do procesu (wynik nieznany, nie zapamiętywać).
+    """
+    if not jobs:
+        return []
+    workers, default_timeout = _settings()
+    timeout = default_timeout if timeout is None else timeout
+    if workers <= 0:
+        return [extract_for_prompt(source, kind) for source, kind in jobs]
+
+    with ThreadPoolExecutor(max_workers=min(len(jobs), workers)) as threads:
+        return list(threads.map(lambda job: _extract_in_worker(job[0], job[1], workers, timeout), jobs))
@@ -0,0 +1,402 @@
+# panel/invoices.py
+"""
+Rachunki: numeracja, generowanie PDF i kolejka zadań (InvoiceJob).
+
+Webhook Autopay zakłada wiersz rachunku (numer, kwoty – bez PDF) i wrzuca
+zadanie do kolejki (`enqueue_invoice`), a PDF powstaje w osobnym procesie:
+`python manage.py invoice_worker`. Do tego czasu pobranie rachunku pokazuje
+stronę "trwa generowanie" (202). Zadanie jest idempotentne po Payment.id
+(OneToOne), więc powtórzone webhooki nie tworzą duplikatów. Nieudany
+render PDF to błąd zadania (ponowienia z backoffem), nie placeholder.
+"""
+import calendar
+import decimal
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Invoice, InvoiceJob, InvoiceMonthSummary, InvoiceNumberCounter, Payment
+from .pdf_renderer import render_template_pdf, render_templates_pdf
+
+log = logging.getLogger(__name__)
+
+# co ile sekund ponawiamy nieudane zadanie (kolejne próby: x1, x2, x4 ...)
+RETRY_BASE_SECONDS = 30
+# zadanie "running" dłużej niż tyle uznajemy za porzucone (np. worker zabity)
+STALE_AFTER = timedelta(minutes=10)
+
+
+# --- Formatowanie / dane stałe ---
+
+def pln_format_grosz(g):
+    return f"{decimal.Decimal(g)/100:.2f} zł".replace(".", ",")
+
+
+def _invoice_prefix(day):
+    return f"R-{day.year}{str(day.month).zfill(2)}-"
+
+
+def _last_issued_seq(prefix):
+    # tylko do zasiania licznika dla miesiąca sprzed wprowadzenia InvoiceNumberCounter
+    last = Invoice.objects.filter(number__startswith=prefix).order_by("-number").first()
+    if last:
+        try:
+            return int(last.number.split("-")[-1])
+        except Exception:
+            pass
+    return 0
+
+
+def _bump_counter(prefix, count):
+    if connection.vendor in ("postgresql", "sqlite"):
+        table = connection.ops.quote_name(InvoiceNumberCounter._meta.db_table)
+        with connection.cursor() as cur:
+            cur.execute(
+                f"UPDATE {table} SET last_value = last_value + %s WHERE prefix = %s RETURNING last_value",
+                [count, prefix],
+            )
+            row = cur.fetchone()
+        return row[0] if row else None
+    # bazy bez RETURNING: UPDATE blokuje wiersz do końca transakcji, więc odczyt jest bezpieczny
+    if not InvoiceNumberCounter.objects.filter(prefix=prefix).update(last_value=F("last_value") + count):
+        return None
+    return InvoiceNumberCounter.objects.values_list("last_value", flat=True).get(prefix=prefix)
+
+
+def allocate_invoice_seq(prefix, count=1):
+    """
+    Rezerwuje `count` kolejnych numerów w miesiącu, zwraca pierwszy.
+    Wołać w transakcji rachunku – rollback zwraca numery (bez dziur).
+    """
+    with transaction.atomic():
+        last = _bump_counter(prefix, count)
+        if last is None:
+            InvoiceNumberCounter.objects.get_or_create(
+                prefix=prefix, defaults={"last_value": _last_issued_seq(prefix)}
+            )
+            last = _bump_counter(prefix, count)
+    return last - count + 1
+
+
+def next_invoice_number():
+    prefix = _invoice_prefix(timezone.localdate())
+    return f"{prefix}{str(allocate_invoice_seq(prefix)).zfill(4)}"
+
+
+def get_seller_defaults():
+    return {
+        "name": "Imię i Nazwisko",
+        "addr": "Ulica 1\n00-000 Miasto",
+        "nip": "",
+        "iban": "PL00 0000 0000 0000 0000 0000 0000",
+        "mail": "kontakt@polubiszto.pl",
+        "place": getattr(settings, "INVOICE_PLACE_DEFAULT", "Warszawa"),
+        "rate_grosz_default": 8000,  # 80 zł/h — można nadpisać z rezerwacji
+        "hours_default": decimal.Decimal("1.00"),
+    }
+
+
+def get_buyer(student):
+    return {
+        "name": getattr(student, "get_full_name", lambda: student.username)(),
+        "addr": getattr(getattr(student, "profile", None), "address", "") or "",
+        "nip": getattr(getattr(student, "profile", None), "nip", "") or "",
+        "mail": student.email or "",
+    }
+
+
+# --- PDF ---
+
+INVOICE_PDF_TEMPLATE = "ksiegowosc/rachunek_pdf.html"
+
+
+def _invoice_pdf_context(invoice, seller, buyer) -> dict:
+    return {
+        "invoice": invoice, "seller": seller, "buyer": buyer,
+        "rate_pln": pln_format_grosz(invoice.rate_grosz),
+        "total_pln": pln_format_grosz(invoice.total_grosz),
+    }
+
+
+def render_invoice_pdf(invoice, seller, buyer) -> bytes:
+    # wkhtmltopdf (pdfkit) albo WeasyPrint – wybór i konfiguracja raz na proces;
+    # błąd renderu to wyjątek (PdfRenderError), nie placeholder w rachunku
+    return render_template_pdf(INVOICE_PDF_TEMPLATE, _invoice_pdf_context(invoice, seller, buyer), strict=True)
+
+
+def render_invoice_pdfs(invoices, renderer=None) -> list:
+    """Batch: PDF-y dla wielu rachunków naraz (równolegle w puli). None = render nieudany."""
+    seller = get_seller_defaults()
+    contexts = [_invoice_pdf_context(inv, seller, get_buyer(inv.student)) for inv in invoices]
+    return render_templates_pdf(INVOICE_PDF_TEMPLATE, contexts, renderer=renderer, strict=True)
+
+
+# --- Tworzenie rachunku ---
+
+def _build_invoice(payment: Payment, number: str, seller: dict) -> Invoice:
+    rez = payment.reservation
+    hours = getattr(rez, "liczba_godzin", seller["hours_default"])
+    rate_grosz = getattr(rez, "stawka_grosz", seller["rate_grosz_default"])
+    description = getattr(rez, "opis", f"Korepetycje online — {hours}h")
+    total_grosz = int(decimal.Decimal(hours) * decimal.Decimal(rate_grosz))
+
+    return Invoice(
+        number=number,
+        student=payment.student,
+        payment=payment,
+        reservation=rez,
+        issue_date=timezone.localdate(),
+        place=seller["place"],
+        description=description,
+        hours=hours,
+        rate_grosz=rate_grosz,
+        total_grosz=total_grosz,
+    )
+
+
+def create_invoice_record(payment: Payment) -> Invoice:
+    """Sam wiersz Invoice (numer, kwoty) – szybkie, bez PDF."""
+    existing = Invoice.objects.filter(payment=payment).first()
+    if existing:
+        return existing
+
+    try:
+        with transaction.atomic():
+            inv = _build_invoice(payment, next_invoice_number(), get_seller_defaults())
+            inv.save()
+    except IntegrityError:
+        # równoległy webhook/worker zdążył pierwszy (numer wraca z rollbackiem)
+        return Invoice.objects.get(payment=payment)
+    return inv
+
+
+def attach_invoice_pdf(inv: Invoice) -> Invoice:
+    pdf_bytes = render_invoice_pdf(inv, get_seller_defaults(), get_buyer(inv.student))
+    inv.pdf.save(f"{inv.number}.pdf", ContentFile(pdf_bytes), save=True)
+    return inv
+
+
+def create_invoice_from_payment(payment: Payment) -> Invoice:
+    """Synchronicznie: wiersz + PDF (używane przez worker i ręczne wywołania)."""
+    inv = create_invoice_record(payment)
+    if not inv.pdf:
+        attach_invoice_pdf(inv)
+    return inv
+
+
+# --- Batch: rachunki za okres (manage.py generate_invoices) ---
+
+def payments_without_invoice(date_from, date_to):
+    """
+    Opłacone płatności z okresu (po paid_at) bez rachunku. Pomijamy te,
+    którymi właśnie zajmuje się kolejka (InvoiceJob pending/running).
+    """
+    return (
+        Payment.objects
+        .filter(status="paid", paid_at__date__gte=date_from, paid_at__date__lte=date_to,
+                invoice__isnull=True)
+        .exclude(invoice_job__status__in=[InvoiceJob.STATUS_PENDING, InvoiceJob.STATUS_RUNNING])
+        .select_related("student", "reservation")
+        .order_by("paid_at", "id")
+    )
+
+
+def bulk_create_invoice_records(payments) -> list:
+    """
+    Wiersze Invoice dla wielu płatności – numery nadawane w jednej transakcji.
+    Płatności są ponownie wybierane pod blokadą: te, które w międzyczasie
+    dostały rachunek (invoice_worker, webhook) albo właśnie go dostają
+    (zablokowane – SKIP LOCKED), są pomijane zamiast wywracać okres na
+    unikalności Invoice.payment.
+    """
+    ids = [p.pk for p in payments]
+    if not ids:
+        return []
+    seller = get_seller_defaults()
+    with transaction.atomic():
+        payments = list(
+            Payment.objects
+            .select_for_update(skip_locked=True, of=("self",))
+            .filter(pk__in=ids, invoice__isnull=True)
+            .select_related("student", "reservation")
+            .order_by("paid_at", "id")
+        )
+        if not payments:
+            return []
+        prefix = _invoice_prefix(timezone.localdate())
+        seq = allocate_invoice_seq(prefix, len(payments))
+        invoices = [
+            _build_invoice(p, f"{prefix}{str(seq + i).zfill(4)}", seller)
+            for i, p in enumerate(payments)
+        ]
+        created = Invoice.objects.bulk_create(invoices)
+        # bulk_create nie wysyła sygnałów – podsumowanie miesiąca odświeżamy ręcznie
+        transaction.on_commit(lambda: refresh_month_summary(timezone.localdate()))
+        return created
+
+
+def store_invoice_pdfs(invoices, pdfs, max_workers: int = 8) -> int:
+    """
+    Równoległy upload PDF-ów do storage (S3/dysk), potem jeden bulk_update.
+    Przy ponownym wystawieniu stary plik jest usuwany. Zwraca liczbę bajtów.
+    """
+    invoices = list(invoices)
+    old_names = [inv.pdf.name for inv in invoices]
+
+    def _store(inv, data):
+        name = inv.pdf.field.generate_filename(inv, f"{inv.number}.pdf")
+        return inv.pdf.storage.save(name, ContentFile(data))
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="invoice-upload") as ex:
+        names = list(ex.map(_store, invoices, pdfs))
+
+    for inv, name in zip(invoices, names):
+        inv.pdf.name = name
+    Invoice.objects.bulk_update(invoices, ["pdf"])
+
+    for inv, old in zip(invoices, old_names):
+        if old and old != inv.pdf.name:
+            try:
+                inv.pdf.storage.delete(old)
+            except Exception:
+                log.warning("Nie udało się usunąć starego PDF %s", old)
+    return sum(len(b) for b in pdfs)
+
+
+# --- Podsumowania miesięczne (księgowość) ---
+
+def invoice_totals(qs) -> dict:
+    """Liczba, suma i liczba opłaconych – jednym zapytaniem."""
+    agg = qs.aggregate(
+        invoice_count=Count("id"),
+        total_grosz=Sum("total_grosz"),
+        paid_count=Count("id", filter=Q(payment__status="paid")),
+    )
+    agg["total_grosz"] = agg["total_grosz"] or 0
+    return agg
+
+
+def _month_range(day):
+    first = day.replace(day=1)
+    return first, first.replace(day=calendar.monthrange(first.year, first.month)[1])
+
+
+def refresh_month_summary(day) -> InvoiceMonthSummary:
+    first, last = _month_range(day)
+    totals = invoice_totals(Invoice.objects.filter(issue_date__range=[first, last]))
+    summary, _ = InvoiceMonthSummary.objects.update_or_create(month=first, defaults=totals)
+    return summary
+
+
+def month_summaries(first_month, last_month) -> list:
+    """
+    Podsumowania dla kolejnych miesięcy (od najnowszego). Brakujące wiersze
+    (np. miesiące sprzed wprowadzenia tabeli) są liczone i zapisywane raz.
+    """
+    months = []
+    y, m = first_month.year, first_month.month
+    while (y, m) <= (last_month.year, last_month.month):
+        months.append(date(y, m, 1))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+    cached = {s.month: s for s in InvoiceMonthSummary.objects.filter(month__in=months)}
+    return [cached.get(mo) or refresh_month_summary(mo) for mo in reversed(months)]
+
+
+# --- Kolejka ---
+
+def enqueue_invoice(payment: Payment) -> InvoiceJob:
+    """
+    Idempotentnie zakłada rachunek (bez PDF) i zadanie jego wygenerowania.
+    Rachunek od razu widać na listach, a pobranie pokazuje stan zadania.
+    """
+    create_invoice_record(payment)
+    try:
+        job, _ = InvoiceJob.objects.get_or_create(payment=payment)
+    except IntegrityError:
+        # równoległy webhook zdążył pierwszy
+        job = InvoiceJob.objects.get(payment=payment)
+    return job
+
+
+def _claim_next_job():
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            InvoiceJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=InvoiceJob.STATUS_PENDING, run_after__lte=now)
+            .order_by("run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = InvoiceJob.STATUS_RUNNING
+        job.attempts += 1
+        job.locked_at = now
+        job.save(update_fields=["status", "attempts", "locked_at", "updated_at"])
+    return job
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Zadania porzucone przez zabity worker wracają do kolejki – chyba że
+    wyczerpały limit prób (płatność, która za każdym razem wywraca worker):
+    te kończą jako FAILED, jak w process_job. Zwraca liczbę przywróconych.
+    """
+    now = timezone.now()
+    stale = InvoiceJob.objects.filter(status=InvoiceJob.STATUS_RUNNING, locked_at__lt=now - STALE_AFTER)
+    failed = (
+        stale.filter(attempts__gte=F("max_attempts"))
+        .update(
+            status=InvoiceJob.STATUS_FAILED,
+            locked_at=None,
+            last_error="Worker przerwał zadanie (przekroczony czas albo awaria procesu) – wyczerpany limit prób.",
+            updated_at=now,
+        )
+    )
+    if failed:
+        log.error("Invoice jobs: %d porzuconych zadań bez kolejnych prób (FAILED)", failed)
+    return stale.update(status=InvoiceJob.STATUS_PENDING, locked_at=None, updated_at=now)
+
+
+def process_job(job: InvoiceJob) -> bool:
+    payment = Payment.objects.select_related("student", "reservation").get(pk=job.payment_id)
+    try:
+        create_invoice_from_payment(payment)
+    except Exception as e:
+        log.exception("Invoice job #%s (payment %s) failed", job.pk, job.payment_id)
+        job.last_error = f"{type(e).__name__}: {e}"[:2000]
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = InvoiceJob.STATUS_FAILED
+        else:
+            job.status = InvoiceJob.STATUS_PENDING
+            delay = RETRY_BASE_SECONDS * (2 ** (job.attempts - 1))
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+        job.save(update_fields=["status", "last_error", "locked_at", "run_after", "updated_at"])
+        return False
+
+    job.status = InvoiceJob.STATUS_DONE
+    job.locked_at = None
+    job.last_error = ""
+    job.save(update_fields=["status", "locked_at", "last_error", "updated_at"])
+    return True
+
+
+def run_pending_jobs(limit: int | None = None) -> int:
+    """Przetwarza zadania do wyczerpania kolejki (albo `limit`). Zwraca liczbę obsłużonych."""
+    done = 0
+    while limit is None or done < limit:
+        job = _claim_next_job()
+        if job is None:
+            break
+        process_job(job)
+        done += 1
+    return done
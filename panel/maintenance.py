@@ -0,0 +1,177 @@
+# panel/maintenance.py
+"""
+Sprzątanie danych ulotnych: obecność (OnlineStatus), czat i tablice
+Aliboard po zakończonych zajęciach oraz rozmowy AI gości (AiChatMessage
+bez użytkownika – ich sesje i tak już wygasły).
+
+Kasowanie idzie paczkami po kluczu głównym (krótkie transakcje, bez
+długich blokad tabel), z opcjonalną pauzą między paczkami.
+
+Pokój Aliboard ("room_id" czatu i snapshotu) jest "zakończony", gdy:
+- nie ma w nim aktywności (wiadomość, zapis snapshotu) od `cutoff`, i
+- nie jest podpięty do zajęć, które skończyły się po `cutoff` (albo
+  dopiero będą) – link tablicy w Rezerwacja.excalidraw_link
+  (".../aliboard/<room_id>/?rez=<id>") albo pokój "room-<id rezerwacji>".
+
+Przed usunięciem pokój trafia do storage jako jeden obiekt JSON.gz
+(snapshot + wiadomości + stany przeczytania).
+"""
+import gzip
+import json
+import re
+import time
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (
+    AiChatMessage,
+    AliboardChatMessage,
+    AliboardChatReadState,
+    AliboardSnapshot,
+    OnlineStatus,
+    Rezerwacja,
+)
+
+ARCHIVE_DIR = "aliboard-archive"
+LESSON_DURATION = timedelta(minutes=55)
+BOARD_LINK_RE = re.compile(r"/aliboard/([\w\-]+)/")
+LESSON_ROOM_RE = re.compile(r"^room-(\d+)$")
+
+
+class PruneStats:
+    """Licznik usuniętych wierszy i czasu – do raportu "wierszy/s"."""
+
+    def __init__(self, label):
+        self.label = label
+        self.rows = 0
+        self.seconds = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return f"{self.label}: {self.rows} wierszy w {self.seconds:.1f}s ({self.rate:.0f}/s)"
+
+
+def delete_in_batches(qs, stats: PruneStats, batch_size=1000, pause=0.0) -> int:
+    """DELETE paczkami po pk – każda paczka to osobne, krótkie zapytanie."""
+    model = qs.model
+    started = time.monotonic()
+    removed = 0
+    while True:
+        ids = list(qs.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        removed += model.objects.filter(pk__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+    stats.rows += removed
+    stats.seconds += time.monotonic() - started
+    return removed
+
+
+# --- obecność ---
+
+def expired_presence(older_than: timedelta):
+    return OnlineStatus.objects.filter(last_ping__lt=timezone.now() - older_than)
+
+
+def prune_presence(older_than: timedelta, batch_size=1000, pause=0.0) -> PruneStats:
+    stats = PruneStats("OnlineStatus")
+    delete_in_batches(expired_presence(older_than), stats, batch_size, pause)
+    return stats
+
+
+# --- rozmowy AI gości ---
+
+def expired_guest_conversations(cutoff):
+    return AiChatMessage.objects.filter(user__isnull=True, created_at__lt=cutoff)
+
+
+def prune_guest_conversations(cutoff, batch_size=1000, pause=0.0) -> PruneStats:
+    stats = PruneStats("AiChatMessage (goście)")
+    delete_in_batches(expired_guest_conversations(cutoff), stats, batch_size, pause)
+    return stats
+
+
+# --- pokoje Aliboard ---
+
+def _active_lesson_rooms(cutoff) -> set:
+    """Pokoje zajęć zakończonych po `cutoff` (albo przyszłych) – nie ruszamy ich."""
+    rooms = set()
+    for rez_id, link in Rezerwacja.objects.filter(termin__gte=cutoff - LESSON_DURATION).values_list(
+        "id", "excalidraw_link"
+    ):
+        rooms.add(f"room-{rez_id}")
+        m = BOARD_LINK_RE.search(link or "")
+        if m:
+            rooms.add(m.group(1))
+    return rooms
+
+
+def finished_rooms(cutoff) -> list:
+    """Pokoje bez aktywności od `cutoff`, niepodpięte do trwających/przyszłych zajęć."""
+    last_activity = {}
+    for room_id, last in (
+        AliboardChatMessage.objects.values("room_id").annotate(last=Max("created_at")).values_list("room_id", "last")
+    ):
+        last_activity[room_id] = last
+    for room_id, updated in AliboardSnapshot.objects.values_list("room_id", "updated_at"):
+        last_activity[room_id] = max(filter(None, (last_activity.get(room_id), updated)))
+    for room_id, last in (
+        AliboardChatReadState.objects.values("room_id").annotate(last=Max("last_read_at")).values_list("room_id", "last")
+    ):
+        last_activity.setdefault(room_id, last)
+
+    active = _active_lesson_rooms(cutoff)
+    return sorted(
+        room_id for room_id, last in last_activity.items()
+        if room_id not in active and (last is None or last < cutoff)
+    )
+
+
+def room_payload(room_id: str) -> dict:
+    snapshot = AliboardSnapshot.objects.filter(room_id=room_id).values("data", "updated_at").first()
+    m = LESSON_ROOM_RE.match(room_id)
+    return {
+        "room_id": room_id,
+        "rezerwacja_id": int(m.group(1)) if m else None,
+        "archived_at": timezone.now(),
+        "snapshot": snapshot,
+        "messages": list(
+            AliboardChatMessage.objects.filter(room_id=room_id)
+            .order_by("created_at", "id")
+            .values("id", "author_id", "text", "created_at")
+        ),
+        "read_states": list(
+            AliboardChatReadState.objects.filter(room_id=room_id).values("user_id", "last_read_at")
+        ),
+    }
+
+
+def archive_room(room_id: str, storage=None) -> str:
+    """Pokój -> ARCHIVE_DIR/RRRR/MM/<room_id>.json.gz. Zwraca nazwę pliku w storage."""
+    storage = storage or default_storage
+    payload = room_payload(room_id)
+    raw = json.dumps(payload, default=str, ensure_ascii=False).encode("utf-8")
+    now = timezone.localdate()
+    return storage.save(f"{ARCHIVE_DIR}/{now:%Y/%m}/{room_id}.json.gz", ContentFile(gzip.compress(raw)))
+
+
+def purge_room(room_id: str, stats: dict, batch_size=1000, pause=0.0):
+    delete_in_batches(AliboardChatMessage.objects.filter(room_id=room_id), stats["messages"], batch_size, pause)
+    delete_in_batches(AliboardChatReadState.objects.filter(room_id=room_id), stats["read_states"], batch_size, pause)
+    delete_in_batches(AliboardSnapshot.objects.filter(room_id=room_id), stats["snapshots"], batch_size, pause)
+
+
+def room_stats() -> dict:
+    return {
+        "messages": PruneStats("AliboardChatMessage"),
+        "read_states": PruneStats("AliboardChatReadState"),
+        "snapshots": PruneStats("AliboardSnapshot"),
+    }
@@ -0,0 +1,37 @@
+# panel/management/commands/auditlog_partitions.py
+from django.core.management.base import BaseCommand, CommandError
+
+from panel.audit_archive import convert_to_partitioned, ensure_partitions, is_partitioned, partitioning_enabled
+
+
+class Command(BaseCommand):
+    help = (
+        "Partycje miesięczne AuditLog (Postgres, AUDIT_LOG_PARTITIONED=1): tworzy partycje "
+        "na kolejne miesiące (do crona), a z --convert jednorazowo zamienia tabelę na partycjonowaną."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=3, help="Na ile miesięcy do przodu tworzyć partycje.")
+        parser.add_argument("--convert", action="store_true",
+                            help="Zamień zwykłą tabelę na partycjonowaną (blokuje tabelę na czas kopiowania).")
+
+    def handle(self, *args, **opts):
+        if not partitioning_enabled():
+            raise CommandError(
+                "Partycjonowanie wyłączone (wymaga Postgresa i AUDIT_LOG_PARTITIONED=1) – "
+                "tabela zostaje zwykła, retencję robi auditlog_retention."
+            )
+        if opts["ahead"] < 0:
+            raise CommandError("--ahead nie może być ujemne.")
+
+        if not is_partitioned():
+            if not opts["convert"]:
+                raise CommandError("Tabela AuditLog nie jest partycjonowana – uruchom z --convert.")
+            created = convert_to_partitioned(ahead=opts["ahead"])
+            self.stdout.write(self.style.SUCCESS(f"Tabela AuditLog partycjonowana ({len(created)} partycji)."))
+            return
+
+        created = ensure_partitions(ahead=opts["ahead"])
+        for name in created:
+            self.stdout.write(f"+ {name}")
+        self.stdout.write(self.style.SUCCESS(f"Nowe partycje: {len(created)}."))
@@ -0,0 +1,40 @@
+# panel/management/commands/auditlog_retention.py
+from django.core.management.base import BaseCommand, CommandError
+
+from panel.audit_archive import archive_month, archive_months
+
+
+class Command(BaseCommand):
+    help = (
+        "Retencja AuditLog: miesiące starsze niż --keep-months są zapisywane do storage "
+        "jako JSONL.gz, a potem usuwane (DROP partycji albo DELETE paczkami). Ponowne uruchomienie "
+        "eksportuje tylko wiersze, których nie ma jeszcze w archiwum."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-months", type=int, default=12,
+                            help="Ile pełnych miesięcy (poza bieżącym) zostaje w bazie.")
+        parser.add_argument("--export-only", action="store_true",
+                            help="Tylko zapisz archiwa (nowe wiersze), niczego nie usuwaj.")
+        parser.add_argument("--dry-run", action="store_true", help="Tylko wypisz miesiące do archiwizacji.")
+
+    def handle(self, *args, **opts):
+        if opts["keep_months"] < 0:
+            raise CommandError("--keep-months nie może być ujemne.")
+
+        months = archive_months(opts["keep_months"])
+        if not months:
+            self.stdout.write("Brak wpisów do archiwizacji.")
+            return
+
+        for month in months:
+            if opts["dry_run"]:
+                self.stdout.write(f"{month:%Y-%m}: do archiwizacji")
+                continue
+            result = archive_month(month, delete=not opts["export_only"])
+            self.stdout.write(
+                f"{month:%Y-%m}: {result['exported']} wpisów -> {result['file'] or '-'}, "
+                f"usunięto {result['removed']}"
+            )
+        if not opts["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Zarchiwizowane miesiące: {len(months)}."))
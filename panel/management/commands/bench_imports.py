@@ -0,0 +1,85 @@
+# panel/management/commands/bench_imports.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# zależności, które mają się ładować dopiero przy pierwszym użyciu (panel.views.ai, panel.extraction, PDF)
+HEAVY_MODULES = ("openai", "pdfkit", "pypdf", "docx", "weasyprint")
+
+# start workera: aplikacja ASGI + URLconf (wszystkie moduły widoków), w świeżym interpreterze
+PROBE = """
+import importlib, json, os, resource, sys, time
+started = time.perf_counter()
+importlib.import_module(os.environ["BENCH_ASGI_MODULE"])
+importlib.import_module(os.environ["BENCH_URLCONF"])
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [m for m in json.loads(os.environ["BENCH_HEAVY"]) if m in sys.modules],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Mierzy koszt startu workera: import aplikacji ASGI i URLconf w świeżym procesie "
+        "(czas, szczytowe RSS) i sprawdza, że ciężkie zależności (OpenAI, parsery PDF/DOCX, "
+        "renderery PDF) nie są ładowane przy imporcie. Kończy się błędem po przekroczeniu limitów (do CI)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Liczba pomiarów (wynik: mediana czasu).")
+        parser.add_argument("--max-seconds", type=float, default=1.0, help="Limit mediany czasu importu.")
+        parser.add_argument("--max-rss-mb", type=float, default=64.0, help="Limit szczytowego RSS procesu.")
+        parser.add_argument("--json", action="store_true", help="Wynik jako JSON.")
+
+    def _probe(self):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "korepetycje.settings"),
+            "BENCH_ASGI_MODULE": settings.ASGI_APPLICATION.rsplit(".", 1)[0],
+            "BENCH_URLCONF": settings.ROOT_URLCONF,
+            "BENCH_HEAVY": json.dumps(HEAVY_MODULES),
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE], env=env, cwd=settings.BASE_DIR, capture_output=True, text=True
+        )
+        if proc.returncode:
+            raise CommandError(f"Import nie powiódł się:\n{proc.stderr.strip()}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **opts):
+        if opts["runs"] < 1:
+            raise CommandError("--runs musi być dodatnie.")
+
+        results = [self._probe() for _ in range(opts["runs"])]
+        summary = {
+            "seconds": round(statistics.median(r["seconds"] for r in results), 3),
+            "rss_mb": round(max(r["rss_mb"] for r in results), 1),
+            "heavy": sorted({m for r in results for m in r["heavy"]}),
+        }
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(summary))
+        else:
+            self.stdout.write(f"Import (mediana z {opts['runs']}): {summary['seconds']:.3f}s")
+            self.stdout.write(f"Szczytowe RSS: {summary['rss_mb']:.1f} MB")
+            self.stdout.write(f"Ciężkie moduły po imporcie: {', '.join(summary['heavy']) or 'brak'}")
+
+        problems = []
+        if summary["heavy"]:
+            problems.append(f"załadowane przy imporcie: {', '.join(summary['heavy'])}")
+        if summary["seconds"] > opts["max_seconds"]:
+            problems.append(f"czas {summary['seconds']:.3f}s > {opts['max_seconds']}s")
+        if summary["rss_mb"] > opts["max_rss_mb"]:
+            problems.append(f"RSS {summary['rss_mb']:.1f} MB > {opts['max_rss_mb']} MB")
+        if problems:
+            raise CommandError("Start workera przekracza budżet: " + "; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Start workera w budżecie."))
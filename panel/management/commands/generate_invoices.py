@@ -0,0 +1,134 @@
+# panel/management/commands/generate_invoices.py
+import calendar
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from panel.invoices import (
+    bulk_create_invoice_records,
+    payments_without_invoice,
+    render_invoice_pdfs,
+    store_invoice_pdfs,
+)
+from panel.models import Invoice, InvoiceJob
+from panel.pdf_renderer import PdfRenderer
+
+
+def _parse_month(value):
+    try:
+        y, m = (int(x) for x in value.split("-"))
+        return date(y, m, 1), date(y, m, calendar.monthrange(y, m)[1])
+    except Exception:
+        raise CommandError(f"Niepoprawny miesiąc: {value!r} (oczekiwano RRRR-MM)")
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Niepoprawna data: {value!r} (oczekiwano RRRR-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Hurtowe rachunki za okres: opłacone płatności bez rachunku dostają numery "
+        "(jedna transakcja), PDF-y renderowane są równolegle i wysyłane do storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Okres rozliczeniowy RRRR-MM (domyślnie bieżący miesiąc).")
+        parser.add_argument("--from", dest="date_from", help="Początek okresu RRRR-MM-DD (zamiast --month).")
+        parser.add_argument("--to", dest="date_to", help="Koniec okresu RRRR-MM-DD (włącznie).")
+        parser.add_argument("--reissue", action="store_true",
+                            help="Wygeneruj ponownie PDF-y wszystkich rachunków z okresu (np. po zmianie szablonu).")
+        parser.add_argument("--chunk", type=int, default=50, help="Ile rachunków renderować w jednej partii.")
+        parser.add_argument("--workers", type=int, default=None, help="Rozmiar puli renderującej PDF.")
+        parser.add_argument("--upload-workers", type=int, default=8, help="Równoległe uploady do storage.")
+        parser.add_argument("--dry-run", action="store_true", help="Tylko policz, niczego nie zapisuj.")
+
+    def handle(self, *args, **opts):
+        date_from, date_to = self._period(opts)
+        payments = list(payments_without_invoice(date_from, date_to))
+
+        # rachunki z okresu do (ponownego) renderu: wszystkie przy --reissue, inaczej tylko bez PDF
+        existing = Invoice.objects.filter(
+            payment__paid_at__date__gte=date_from, payment__paid_at__date__lte=date_to,
+        ).select_related("student").order_by("number")
+        if not opts["reissue"]:
+            # bez PDF; te z zadaniem w kolejce zrobi invoice_worker
+            existing = existing.filter(Q(pdf="") | Q(pdf__isnull=True)).exclude(
+                payment__invoice_job__status__in=[InvoiceJob.STATUS_PENDING, InvoiceJob.STATUS_RUNNING]
+            )
+        existing = list(existing)
+
+        self.stdout.write(
+            f"Okres {date_from}..{date_to}: {len(payments)} płatności bez rachunku, "
+            f"{len(existing)} rachunków do {'ponownego ' if opts['reissue'] else ''}wygenerowania PDF."
+        )
+        if opts["dry_run"]:
+            return
+
+        # ponowny wybór pod blokadą – płatności obsłużone w międzyczasie przez kolejkę odpadają
+        created = bulk_create_invoice_records(payments)
+        if created:
+            self.stdout.write(f"Nadano numery: {created[0].number} … {created[-1].number}")
+
+        todo = existing + created
+        if not todo:
+            self.stdout.write(self.style.SUCCESS("Nic do zrobienia."))
+            return
+
+        renderer = PdfRenderer(max_workers=opts["workers"])
+        chunk = max(1, opts["chunk"])
+        started = time.monotonic()
+        done = 0
+        total_bytes = 0
+        failed = []
+        try:
+            for i in range(0, len(todo), chunk):
+                batch = todo[i:i + chunk]
+                pdfs = render_invoice_pdfs(batch, renderer=renderer)
+                # nieudany render (None) nie trafia do storage – rachunek zostaje bez PDF
+                ok = [(inv, pdf) for inv, pdf in zip(batch, pdfs) if pdf is not None]
+                failed += [inv.number for inv, pdf in zip(batch, pdfs) if pdf is None]
+                if ok:
+                    total_bytes += store_invoice_pdfs(
+                        [inv for inv, _ in ok], [pdf for _, pdf in ok], max_workers=opts["upload_workers"]
+                    )
+                done += len(batch)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"[{done}/{len(todo)}] {done / elapsed:.1f} rach./s, "
+                    f"{total_bytes / 1024 / 1024 / elapsed:.2f} MB/s"
+                )
+        finally:
+            renderer.shutdown()
+
+        elapsed = time.monotonic() - started
+        stored = done - len(failed)
+        self.stdout.write(self.style.SUCCESS(
+            f"Gotowe: {stored} PDF ({total_bytes / 1024 / 1024:.1f} MB) w {elapsed:.1f} s "
+            f"– {done / elapsed:.1f} rach./s."
+        ))
+        if failed:
+            raise CommandError(
+                f"Nie udało się wygenerować {len(failed)} PDF (bez pliku, do ponowienia tą komendą): "
+                + ", ".join(failed)
+            )
+
+    def _period(self, opts):
+        if opts["date_from"] or opts["date_to"]:
+            if not (opts["date_from"] and opts["date_to"]):
+                raise CommandError("Podaj oba: --from i --to.")
+            date_from, date_to = _parse_date(opts["date_from"]), _parse_date(opts["date_to"])
+        elif opts["month"]:
+            date_from, date_to = _parse_month(opts["month"])
+        else:
+            today = timezone.localdate()
+            date_from, date_to = _parse_month(f"{today.year}-{today.month}")
+        if date_from > date_to:
+            raise CommandError("Początek okresu jest po jego końcu.")
+        return date_from, date_to
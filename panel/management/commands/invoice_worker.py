@@ -0,0 +1,42 @@
+# panel/management/commands/invoice_worker.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from panel.invoices import requeue_stale_jobs, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Worker kolejki rachunków: generuje PDF dla zadań InvoiceJob (z ponowieniami)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Obsłuż kolejkę raz i zakończ.")
+        parser.add_argument("--sleep", type=float, default=3.0, help="Pauza między odpytaniami kolejki [s].")
+        parser.add_argument("--batch", type=int, default=20, help="Maks. zadań na jedną rundę.")
+
+    def handle(self, *args, **opts):
+        self._stop = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write("invoice_worker: start")
+        while not self._stop:
+            close_old_connections()
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(f"invoice_worker: przywrócono {requeued} porzuconych zadań")
+
+            done = run_pending_jobs(limit=opts["batch"])
+            if done:
+                self.stdout.write(f"invoice_worker: obsłużono {done} zadań")
+
+            if opts["once"]:
+                break
+            if not done:
+                time.sleep(opts["sleep"])
+        self.stdout.write("invoice_worker: stop")
+
+    def _request_stop(self, *_):
+        self._stop = True
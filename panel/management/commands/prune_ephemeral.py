@@ -0,0 +1,63 @@
+# panel/management/commands/prune_ephemeral.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from panel.maintenance import (
+    archive_room,
+    expired_guest_conversations,
+    expired_presence,
+    finished_rooms,
+    prune_guest_conversations,
+    prune_presence,
+    purge_room,
+    room_stats,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Sprząta dane ulotne: wygasłą obecność (OnlineStatus) oraz czat i tablice Aliboard "
+        "zajęć zakończonych ponad --days dni temu (pokój najpierw trafia do storage jako JSON.gz), "
+        "a także starsze niż --days dni rozmowy AI gości. "
+        "Kasuje paczkami i raportuje liczbę usuniętych wierszy na sekundę."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30,
+                            help="Czat/tablice pokoi bez aktywności i zajęć od tylu dni.")
+        parser.add_argument("--presence-hours", type=int, default=24,
+                            help="Obecność starsza niż tyle godzin jest usuwana.")
+        parser.add_argument("--batch", type=int, default=1000, help="Wierszy w jednej paczce DELETE.")
+        parser.add_argument("--pause", type=float, default=0.0, help="Pauza (s) między paczkami.")
+        parser.add_argument("--no-archive", action="store_true", help="Usuń pokoje bez zapisu do storage.")
+        parser.add_argument("--dry-run", action="store_true", help="Tylko policz, niczego nie usuwaj.")
+
+    def handle(self, *args, **opts):
+        if opts["days"] < 1 or opts["presence_hours"] < 1 or opts["batch"] < 1:
+            raise CommandError("--days, --presence-hours i --batch muszą być dodatnie.")
+
+        presence_age = timedelta(hours=opts["presence_hours"])
+        cutoff = timezone.now() - timedelta(days=opts["days"])
+        rooms = finished_rooms(cutoff)
+
+        if opts["dry_run"]:
+            self.stdout.write(f"OnlineStatus do usunięcia: {expired_presence(presence_age).count()}")
+            self.stdout.write(f"Pokoje Aliboard do archiwizacji: {len(rooms)}")
+            self.stdout.write(f"Wiadomości AI gości do usunięcia: {expired_guest_conversations(cutoff).count()}")
+            return
+
+        stats = prune_presence(presence_age, batch_size=opts["batch"], pause=opts["pause"])
+        self.stdout.write(str(stats))
+        self.stdout.write(str(prune_guest_conversations(cutoff, batch_size=opts["batch"], pause=opts["pause"])))
+
+        per_room = room_stats()
+        for room_id in rooms:
+            if not opts["no_archive"]:
+                name = archive_room(room_id)
+                self.stdout.write(f"  {room_id} -> {name}")
+            purge_room(room_id, per_room, batch_size=opts["batch"], pause=opts["pause"])
+        for s in per_room.values():
+            self.stdout.write(str(s))
+        self.stdout.write(self.style.SUCCESS(f"Zarchiwizowane pokoje: {len(rooms)}."))
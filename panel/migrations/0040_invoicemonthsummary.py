@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0039_invoicenumbercounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceMonthSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+                ('total_grosz', models.BigIntegerField(default=0)),
+                ('paid_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0040_invoicemonthsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rezerwacja',
+            index=models.Index(condition=models.Q(('odrzucona', False), ('oplacona', False)), fields=['-termin', '-id'], name='rez_unpaid_termin_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# parser skopiowany z panel.offerings (stan z tej migracji) – migracja nie
+# importuje kodu aplikacji, który może się później zmienić
+def _normalize_level(value):
+    value = (value or "").strip().lower()
+    return "rozszerzony" if value.startswith("roz") else "podstawowy"
+
+
+def _split_csv(value):
+    return [p.strip() for p in (value or "").split(",") if p.strip()]
+
+
+def parse_offerings(przedmioty, poziom_nauczania=""):
+    default_levels = {_normalize_level(p) for p in _split_csv(poziom_nauczania)} or {"podstawowy"}
+    pairs = set()
+    for item in _split_csv(przedmioty):
+        if " - " in item:
+            subject, level = item.split(" - ", 1)
+            levels = {_normalize_level(level)}
+        else:
+            subject, levels = item, default_levels
+        subject = subject.strip()[:100]
+        if subject:
+            pairs.update((subject, lvl) for lvl in levels)
+    return pairs
+
+
+def fill_offerings(apps, schema_editor):
+    Profil = apps.get_model("panel", "Profil")
+    OfertaNauczyciela = apps.get_model("panel", "OfertaNauczyciela")
+    batch = []
+    profiles = Profil.objects.filter(is_teacher=True).exclude(przedmioty="")
+    for user_id, przedmioty, poziom in profiles.values_list(
+        "user_id", "przedmioty", "poziom_nauczania"
+    ).iterator(chunk_size=500):
+        batch.extend(
+            OfertaNauczyciela(nauczyciel_id=user_id, przedmiot=p, poziom=lvl)
+            for p, lvl in sorted(parse_offerings(przedmioty, poziom))
+        )
+        if len(batch) >= 1000:
+            OfertaNauczyciela.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    OfertaNauczyciela.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0041_rezerwacja_unpaid_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfertaNauczyciela',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('przedmiot', models.CharField(max_length=100)),
+                ('poziom', models.CharField(choices=[('podstawowy', 'Podstawowy'), ('rozszerzony', 'Rozszerzony')], max_length=20)),
+                ('nauczyciel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='oferta', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['przedmiot', 'poziom'],
+                'indexes': [models.Index(fields=['przedmiot', 'poziom', 'nauczyciel'], name='panel_ofert_przedmi_1784c3_idx')],
+                'constraints': [models.UniqueConstraint(fields=('nauczyciel', 'przedmiot', 'poziom'), name='uniq_oferta_teacher_subject_level')],
+            },
+        ),
+        migrations.RunPython(fill_offerings, migrations.RunPython.noop),
+    ]
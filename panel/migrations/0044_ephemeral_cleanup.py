@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_online_status(apps, schema_editor):
+    # przed unikalnym (user, rezerwacja): zostaje wiersz z najświeższym pingiem
+    OnlineStatus = apps.get_model("panel", "OnlineStatus")
+    dups = (
+        OnlineStatus.objects.values("user_id", "rezerwacja_id")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+    )
+    for row in dups:
+        rows = OnlineStatus.objects.filter(user_id=row["user_id"], rezerwacja_id=row["rezerwacja_id"])
+        keep = rows.order_by("-last_ping", "-id").values_list("id", flat=True).first()
+        rows.exclude(id=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0043_auditlog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_online_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='aliboardchatmessage',
+            index=models.Index(fields=['room_id', 'created_at'], name='aliboard_msg_room_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='onlinestatus',
+            index=models.Index(fields=['last_ping'], name='online_last_ping_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='onlinestatus',
+            constraint=models.UniqueConstraint(fields=('user', 'rezerwacja'), name='uniq_online_user_rez'),
+        ),
+    ]
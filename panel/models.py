@@ -73,6 +73,15 @@ class AuditLog(models.Model):
     details = models.JSONField(blank=True, null=True)  # strukturalne dane o zmianie
     created_by_ip = models.GenericIPAddressField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # historia obiektu / użytkownika (panel.audit.object_history / user_history)
+            models.Index(fields=["obj_type", "obj_id", "created_at"], name="audit_obj_created_idx"),
+            models.Index(fields=["user", "created_at"], name="audit_user_created_idx"),
+            # retencja po miesiącach (panel.audit_archive)
+            models.Index(fields=["created_at"], name="audit_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.created_at.isoformat()} {self.action} {self.obj_type}:{self.obj_id}"
 
@@ -92,6 +101,32 @@ class StawkaNauczyciela(models.Model):
         return f"{name} – {self.przedmiot} ({self.poziom}) – {self.stawka} zł"
 
 
+class OfertaNauczyciela(models.Model):
+    """
+    Przedmiot + poziom, których uczy nauczyciel – postać znormalizowana
+    Profil.przedmioty (synchronizowana sygnałem, patrz panel.offerings).
+    """
+    nauczyciel = models.ForeignKey(User, on_delete=models.CASCADE, related_name="oferta")
+    przedmiot = models.CharField(max_length=100)
+    poziom = models.CharField(max_length=20, choices=[("podstawowy", "Podstawowy"), ("rozszerzony", "Rozszerzony")])
+
+    class Meta:
+        ordering = ["przedmiot", "poziom"]
+        indexes = [
+            # "kto uczy matematyki rozszerzonej" -> nauczyciele
+            models.Index(fields=["przedmiot", "poziom", "nauczyciel"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["nauczyciel", "przedmiot", "poziom"],
+                name="uniq_oferta_teacher_subject_level",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.nauczyciel.username} – {self.przedmiot} ({self.poziom})"
+
+
 class UstawieniaPlatnosci(models.Model):
     # Cena: zostaje w modelu (dla innych ekranów), ale nie edytujemy jej tutaj.
     cena_za_godzine = models.DecimalField(
@@ -159,6 +194,10 @@ def default_excalidraw_room_key() -> str:
     # 32 bajty => 64 znaki hex
     return secrets.token_hex(32)
 
+def default_calendar_token() -> str:
+    # 24 bajty => 32 znaki base64url (adres feedu .ics)
+    return secrets.token_urlsafe(24)
+
 
 class Rezerwacja(models.Model):
     uczen = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rezerwacje_ucznia')
@@ -185,6 +224,8 @@ class Rezerwacja(models.Model):
     excalidraw_room_id = models.CharField(max_length=64, default=default_excalidraw_room_id)
     excalidraw_room_key = models.CharField(max_length=128, default=default_excalidraw_room_key)
     excalidraw_link = models.URLField(blank=True, null=True)
+    # zmiana widoczna w kalendarzu (feed .ics: ETag/Last-Modified z max(updated_at))
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.uczen.username} → {self.nauczyciel.username} ({self.termin})"
@@ -200,6 +241,14 @@ class Rezerwacja(models.Model):
             models.Index(fields=["termin"]),
             models.Index(fields=["nauczyciel", "termin"]),
             models.Index(fields=["uczen", "termin"]),
+            models.Index(fields=["nauczyciel", "updated_at"], name="rez_teacher_updated_idx"),
+            models.Index(fields=["uczen", "updated_at"], name="rez_student_updated_idx"),
+            # kolejka księgowości: nieopłacone i nieodrzucone, od najnowszych
+            models.Index(
+                fields=["-termin", "-id"],
+                name="rez_unpaid_termin_idx",
+                condition=models.Q(oplacona=False, odrzucona=False),
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -209,6 +258,20 @@ class Rezerwacja(models.Model):
         ]
 
 
+class CalendarFeed(models.Model):
+    """Prywatny adres feedu iCalendar (plan zajęć) – token zamiast logowania."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="calendar_feed")
+    token = models.CharField(max_length=64, unique=True, default=default_calendar_token)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def rotate(self):
+        self.token = default_calendar_token()
+        self.save(update_fields=["token"])
+
+    def __str__(self):
+        return f"Kalendarz: {self.user}"
+
+
 class WolnyTermin(models.Model):
     nauczyciel = models.ForeignKey(User, on_delete=models.CASCADE)
     data = models.DateField()
@@ -238,6 +301,15 @@ class OnlineStatus(models.Model):
     rezerwacja = models.ForeignKey(Rezerwacja, on_delete=models.CASCADE)
     last_ping = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # sprzątanie wygasłej obecności (panel.maintenance)
+            models.Index(fields=["last_ping"], name="online_last_ping_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "rezerwacja"], name="uniq_online_user_rez"),
+        ]
+
     def __str__(self):
         return f"{self.user} online w rezerwacji {self.rezerwacja.id}"
 
@@ -265,6 +337,10 @@ class AliboardChatMessage(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # historia czatu pokoju i ostatnia aktywność pokoju (sprzątanie)
+            models.Index(fields=["room_id", "created_at"], name="aliboard_msg_room_created_idx"),
+        ]
 
     def __str__(self):
         who = self.author.get_full_name() or self.author.username if self.author else "Anon"
@@ -289,6 +365,37 @@ class AliboardChatReadState(models.Model):
     def __str__(self):
         return f"{self.room_id} - {self.user_id} @ {self.last_read_at}"
 
+
+# --- Czat AI: historia rozmów (panel.conversations) ---
+class AiChatMessage(models.Model):
+    ROLE_CHOICES = [("user", "user"), ("assistant", "assistant")]
+
+    # właściciel: zalogowany użytkownik albo (anonimowo) klucz sesji
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="ai_chat_messages",
+    )
+    session_key = models.CharField(max_length=40, blank=True, default="")
+    persona = models.CharField(max_length=20)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # okno historii: najnowsze wiadomości rozmowy (po id)
+            models.Index(fields=["user", "persona", "id"], name="aichat_user_persona_idx"),
+            models.Index(fields=["session_key", "persona", "id"], name="aichat_session_persona_idx"),
+            models.Index(fields=["created_at"], name="aichat_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"[{self.persona}] {self.role}: {self.content[:30]}"
+
 # --- Płatności i rachunki ---
 class Payment(models.Model):
     reservation = models.ForeignKey("panel.Rezerwacja", on_delete=models.CASCADE, related_name="payments")
@@ -325,7 +432,79 @@ class Invoice(models.Model):
 
     def __str__(self):
         return self.number
-    
+
+
+class InvoiceJob(models.Model):
+    """
+    Kolejka generowania rachunków (PDF) – obsługuje ją `manage.py invoice_worker`.
+    Jedno zadanie na płatność (idempotencja po Payment.id).
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Oczekuje"),
+        (STATUS_RUNNING, "W trakcie"),
+        (STATUS_DONE, "Gotowe"),
+        (STATUS_FAILED, "Błąd"),
+    ]
+
+    payment = models.OneToOneField(Payment, on_delete=models.CASCADE, related_name="invoice_job")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["run_after", "id"]
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
+
+    def __str__(self):
+        return f"InvoiceJob payment={self.payment_id} ({self.status})"
+
+
+class InvoiceMonthSummary(models.Model):
+    """
+    Zagregowane rachunki per miesiąc (wg issue_date) – dashboard księgowości
+    bez ponownego skanowania Invoice. Odświeżane sygnałami po zmianie
+    rachunku/płatności (panel.invoices.refresh_month_summary).
+    """
+    month = models.DateField(unique=True)  # pierwszy dzień miesiąca
+    invoice_count = models.PositiveIntegerField(default=0)
+    total_grosz = models.BigIntegerField(default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-month"]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.invoice_count} rach."
+
+    @property
+    def total_pln(self):
+        return f"{self.total_grosz/100:.2f}".replace(".", ",")
+
+
+class InvoiceNumberCounter(models.Model):
+    """
+    Licznik numerów rachunków na miesiąc (prefiks "R-RRRRMM-").
+    Inkrementowany atomowo (UPDATE ... RETURNING) w transakcji rachunku –
+    brak dziur i duplikatów przy równoległym wystawianiu.
+    """
+    prefix = models.CharField(max_length=16, unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix}{str(self.last_value).zfill(4)}"
+
 
 
 class PaymentConfirmation(models.Model):
@@ -382,7 +561,6 @@ class SiteLegalConfig(models.Model):
 
     @classmethod
     def get_solo(cls):
-        obj = cls.objects.first()
-        if not obj:
-            obj = cls.objects.create()
-        return obj
+        # z cache (panel.singletons) – tylko do odczytu; do edycji: legal_config.load()
+        from .singletons import legal_config
+        return legal_config.get()
@@ -0,0 +1,98 @@
+# panel/offerings.py
+"""
+Oferta nauczyciela (nauczyciel × przedmiot × poziom) w osobnej tabeli.
+
+Profil.przedmioty / poziom_nauczania zostają (formularze, admin), ale są
+tylko źródłem: po każdym zapisie profilu sygnał (panel/signals.py)
+przepisuje je do OfertaNauczyciela. Czytelnicy (lista terminów, macierz
+stawek, strona główna) korzystają z tabeli, więc filtr "matematyka,
+rozszerzony, wolny jutro" to złączenie po indeksie, a nie przeszukiwanie
+napisów w Pythonie.
+
+Format w Profil.przedmioty: "Matematyka - rozszerzony, Fizyka - podstawowy".
+Stare wpisy bez poziomu ("Matematyka") dostają poziomy z poziom_nauczania
+(a gdy go brak – "podstawowy").
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import OfertaNauczyciela
+
+LEVELS = ("podstawowy", "rozszerzony")
+DEFAULT_LEVEL = "podstawowy"
+SUBJECT_MAX_LENGTH = 100
+
+
+def normalize_level(value: str) -> str:
+    value = (value or "").strip().lower()
+    return "rozszerzony" if value.startswith("roz") else DEFAULT_LEVEL
+
+
+def _split_csv(value):
+    return [p.strip() for p in (value or "").split(",") if p.strip()]
+
+
+def parse_offerings(przedmioty: str, poziom_nauczania: str = "") -> set:
+    """{(przedmiot, poziom)} z napisów profilu."""
+    default_levels = {normalize_level(p) for p in _split_csv(poziom_nauczania)} or {DEFAULT_LEVEL}
+    pairs = set()
+    for item in _split_csv(przedmioty):
+        if " - " in item:
+            subject, level = item.split(" - ", 1)
+            levels = {normalize_level(level)}
+        else:
+            subject, levels = item, default_levels
+        subject = subject.strip()[:SUBJECT_MAX_LENGTH]
+        if subject:
+            pairs.update((subject, lvl) for lvl in levels)
+    return pairs
+
+
+def sync_teacher_offerings(profil) -> tuple:
+    """Przepisuje ofertę z profilu do tabeli. Zwraca (dodane, usunięte)."""
+    wanted = parse_offerings(profil.przedmioty, profil.poziom_nauczania)
+    with transaction.atomic():
+        current = {
+            (przedmiot, poziom): pk
+            for pk, przedmiot, poziom in OfertaNauczyciela.objects.filter(
+                nauczyciel_id=profil.user_id
+            ).values_list("pk", "przedmiot", "poziom")
+        }
+        stale = [pk for key, pk in current.items() if key not in wanted]
+        if stale:
+            OfertaNauczyciela.objects.filter(pk__in=stale).delete()
+        new = [
+            OfertaNauczyciela(nauczyciel_id=profil.user_id, przedmiot=przedmiot, poziom=poziom)
+            for przedmiot, poziom in sorted(wanted - current.keys())
+        ]
+        OfertaNauczyciela.objects.bulk_create(new, ignore_conflicts=True)
+    return len(new), len(stale)
+
+
+def offerings_by_teacher(teacher_ids) -> dict:
+    """{nauczyciel_id: [(przedmiot, poziom), ...]} – jedno zapytanie."""
+    result = {}
+    for n_id, przedmiot, poziom in (
+        OfertaNauczyciela.objects
+        .filter(nauczyciel_id__in=teacher_ids)
+        .order_by("przedmiot", "poziom")
+        .values_list("nauczyciel_id", "przedmiot", "poziom")
+    ):
+        result.setdefault(n_id, []).append((przedmiot, poziom))
+    return result
+
+
+def offering_exists(przedmiot: str = "", poziom: str = "", teacher_ref: str = "nauczyciel"):
+    """Exists() do .filter() – nauczyciel (OuterRef(teacher_ref)) uczy przedmiotu/poziomu."""
+    qs = OfertaNauczyciela.objects.filter(nauczyciel=OuterRef(teacher_ref))
+    if przedmiot:
+        qs = qs.filter(przedmiot=przedmiot)
+    if poziom:
+        qs = qs.filter(poziom=normalize_level(poziom))
+    return Exists(qs)
+
+
+def subject_choices() -> list:
+    return list(
+        OfertaNauczyciela.objects.order_by("przedmiot").values_list("przedmiot", flat=True).distinct()
+    )
@@ -0,0 +1,62 @@
+# panel/pagination.py
+"""
+Stronicowanie "keyset" (po kursorze) dla długich list od najnowszych.
+
+Zamiast OFFSET (który skanuje wszystkie pominięte wiersze) kolejna strona
+to `WHERE (pole, id) < (ostatnie_pole, ostatnie_id) ORDER BY pole DESC, id DESC`
+– koszt stały niezależnie od numeru strony, o ile jest indeks na (pole, id).
+
+Kursor: "<mikrosekundy od epoki>.<id>" – krótki i bezpieczny w URL.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(value: datetime, pk: int) -> str:
+    delta = value - _EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}.{pk}"
+
+
+def decode_cursor(cursor: str):
+    try:
+        micros, pk = cursor.split(".", 1)
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_page(qs, cursor: str | None, field: str, size: int = 50) -> KeysetPage:
+    """Strona `size` obiektów od najnowszych wg (`field`, id) po kursorze."""
+    decoded = decode_cursor(cursor) if cursor else None
+    if decoded:
+        value, pk = decoded
+        qs = qs.filter(Q(**{f"{field}__lt": value}) | Q(**{field: value, "pk__lt": pk}))
+
+    rows = list(qs.order_by(f"-{field}", "-pk")[: size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return KeysetPage(rows, next_cursor, is_first=decoded is None)
@@ -0,0 +1,104 @@
+# panel/payouts.py
+"""
+Raport wypłat nauczycieli za okres – jedno zapytanie grupujące.
+
+Zajęcia = rezerwacje nieodrzucone z terminem w okresie (i już odbyte).
+Stawka za zajęcia liczona w SQL, w kolejności:
+  1. StawkaNauczyciela (nauczyciel + przedmiot + poziom),
+  2. PrzedmiotCennik.cena (cena nauczyciela dla przedmiotu + poziomu),
+  3. UstawieniaPlatnosci.cena_za_godzine (dawna stawka globalna).
+
+Zamknięte miesiące (okres w całości przed bieżącym miesiącem) są
+cache'owane – raport za nie się nie zmienia, a odświeżenie można wymusić.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import PrzedmiotCennik, Rezerwacja, StawkaNauczyciela
+from .singletons import payment_settings
+
+CACHE_PREFIX = "wyplaty"
+RATE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+def _default_rate() -> Decimal:
+    ustawienia = payment_settings.get()
+    return Decimal(ustawienia.cena_za_godzine) if ustawienia is not None else Decimal("0.00")
+
+
+def _payout_rows(first, last) -> list:
+    stawka = (StawkaNauczyciela.objects
+              .filter(nauczyciel=OuterRef("nauczyciel"),
+                      przedmiot__iexact=OuterRef("przedmiot"),
+                      poziom__iexact=OuterRef("poziom"))
+              .values("stawka")[:1])
+    cennik = (PrzedmiotCennik.objects
+              .filter(nazwa__iexact=OuterRef("przedmiot"), poziom__iexact=OuterRef("poziom"))
+              .order_by("pk")
+              .values("cena")[:1])
+
+    qs = (Rezerwacja.objects
+          .filter(termin__date__range=[first, last], termin__lt=timezone.now(), odrzucona=False)
+          .annotate(stawka_zajec=Coalesce(
+              Subquery(stawka, output_field=RATE_FIELD),
+              Subquery(cennik, output_field=RATE_FIELD),
+              Value(_default_rate(), output_field=RATE_FIELD),
+          ))
+          .values("nauczyciel_id", "nauczyciel__first_name", "nauczyciel__last_name",
+                  "nauczyciel__username", "przedmiot", "poziom")
+          .annotate(
+              liczba_zajec=Count("id"),
+              stawka=Max("stawka_zajec"),
+              do_wyplaty=Sum(F("stawka_zajec"), output_field=RATE_FIELD),
+          )
+          .order_by("nauczyciel__last_name", "nauczyciel__first_name", "nauczyciel_id",
+                    "przedmiot", "poziom"))
+
+    return [
+        {
+            "nauczyciel_id": r["nauczyciel_id"],
+            "imie": r["nauczyciel__first_name"],
+            "nazwisko": r["nauczyciel__last_name"],
+            "username": r["nauczyciel__username"],
+            "przedmiot": r["przedmiot"] or "",
+            "poziom": r["poziom"] or "",
+            "liczba_zajec": r["liczba_zajec"],
+            "stawka": r["stawka"],
+            "do_wyplaty": r["do_wyplaty"] or Decimal("0.00"),
+        }
+        for r in qs
+    ]
+
+
+def is_closed_period(last) -> bool:
+    return last < timezone.localdate().replace(day=1)
+
+
+def teacher_payout_rows(first, last, refresh: bool = False) -> list:
+    """Wiersze per (nauczyciel, przedmiot, poziom); zamknięte okresy z cache."""
+    if not is_closed_period(last):
+        return _payout_rows(first, last)
+    key = f"{CACHE_PREFIX}:{first:%Y-%m-%d}:{last:%Y-%m-%d}"
+    rows = None if refresh else cache.get(key)
+    if rows is None:
+        rows = _payout_rows(first, last)
+        cache.set(key, rows, None)
+    return rows
+
+
+def group_by_teacher(rows) -> list:
+    """Sumy per nauczyciel (z wierszami szczegółowymi) – do widoku."""
+    teachers = {}
+    for r in rows:
+        t = teachers.setdefault(r["nauczyciel_id"], {
+            "imie": r["imie"], "nazwisko": r["nazwisko"], "username": r["username"],
+            "liczba_zajec": 0, "do_wyplaty": Decimal("0.00"), "pozycje": [],
+        })
+        t["liczba_zajec"] += r["liczba_zajec"]
+        t["do_wyplaty"] += r["do_wyplaty"]
+        t["pozycje"].append(r)
+    return list(teachers.values())
@@ -0,0 +1,214 @@
+# panel/pdf_renderer.py
+"""
+Serwis HTML -> PDF z "ciepłymi" rendererami.
+
+- backend (wkhtmltopdf przez pdfkit albo WeasyPrint) i ścieżka do binarki
+  ustalane są RAZ na proces, a nie przy każdym rachunku,
+- szablony PDF kompilowane raz (cache w procesie),
+- renderowanie idzie przez ograniczoną pulę:
+    * WeasyPrint: pula procesów (spawn – bez kopii stanu serwera), które
+      przy starcie importują bibliotekę i robią rozgrzewkowy render
+      (fontconfig, Pango) – kolejne PDF-y nie płacą kosztu startu,
+    * wkhtmltopdf: binarka zawsze startuje per dokument, więc pula wątków
+      tylko ogranicza równoległość i rozkłada batch na kilka rdzeni;
+      dokument, którego wkhtmltopdf nie wyrenderował, próbuje WeasyPrint.
+- `render_many()` – batch API dla wielu rachunków naraz.
+
+Nieudany render: w widokach placeholder (endpoint zawsze odpowiada),
+w workerach `strict=True` – wyjątek PdfRenderError (render()) albo None
+na pozycji dokumentu (render_many()), żeby zadziałały ponowienia.
+
+Ustawienia: PDF_RENDER_BACKEND ("auto" | "wkhtmltopdf" | "weasyprint"),
+PDF_RENDER_WORKERS (rozmiar puli).
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import get_template
+
+log = logging.getLogger(__name__)
+
+PLACEHOLDER_PDF = b"%PDF-1.4\n% placeholder invoice - PDF generator unavailable\n"
+
+
+
+class PdfRenderError(RuntimeError):
+    """Brak backendu albo błąd renderowania (tylko w trybie strict)."""
+
+
+BACKEND_WKHTMLTOPDF = "wkhtmltopdf"
+BACKEND_WEASYPRINT = "weasyprint"
+
+
+# --- cache w procesie ---
+
+@lru_cache(maxsize=None)
+def get_pdf_template(name: str):
+    """Skompilowany szablon (bez ponownego parsowania przy każdym rachunku)."""
+    return get_template(name)
+
+
+@lru_cache(maxsize=1)
+def _wkhtmltopdf_config():
+    import pdfkit
+    path = shutil.which("wkhtmltopdf") or "/usr/bin/wkhtmltopdf"
+    if not os.path.exists(path):
+        return None
+    return pdfkit.configuration(wkhtmltopdf=path)
+
+
+def _weasyprint_available() -> bool:
+    try:
+        import weasyprint  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+@lru_cache(maxsize=1)
+def resolve_backend() -> str | None:
+    wanted = getattr(settings, "PDF_RENDER_BACKEND", "auto")
+    if wanted in ("auto", BACKEND_WKHTMLTOPDF):
+        try:
+            if _wkhtmltopdf_config() is not None:
+                return BACKEND_WKHTMLTOPDF
+        except Exception:
+            log.exception("pdfkit/wkhtmltopdf niedostępny")
+    if wanted in ("auto", BACKEND_WEASYPRINT) and _weasyprint_available():
+        return BACKEND_WEASYPRINT
+    return None
+
+
+# --- funkcje wykonywane w puli ---
+
+def _weasy_worker_init():
+    # import + rozgrzewka w każdym procesie puli
+    from weasyprint import HTML
+    HTML(string="<p>warmup</p>").write_pdf()
+
+
+def _render_weasyprint(html: str) -> bytes:
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf()
+
+
+def _render_wkhtmltopdf(html: str) -> bytes:
+    import pdfkit
+    return pdfkit.from_string(html, False, configuration=_wkhtmltopdf_config())
+
+
+RENDER_FUNCTIONS = {
+    BACKEND_WKHTMLTOPDF: _render_wkhtmltopdf,
+    BACKEND_WEASYPRINT: _render_weasyprint,
+}
+
+
+class PdfRenderer:
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or getattr(settings, "PDF_RENDER_WORKERS", None) or min(4, os.cpu_count() or 1)
+        self._executors = {}  # backend -> pula
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return resolve_backend()
+
+    def _get_executor(self, backend):
+        with self._lock:
+            executor = self._executors.get(backend)
+            if executor is None:
+                if backend == BACKEND_WEASYPRINT:
+                    # spawn: bez kopii wątków, pętli zdarzeń i połączeń DB procesu serwera (daphne)
+                    executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_weasy_worker_init,
+                    )
+                else:
+                    executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pdf")
+                self._executors[backend] = executor
+            return executor
+
+    def _fallback_backend(self):
+        # jak dawniej: dokument, którego nie wyrenderował wkhtmltopdf, próbuje WeasyPrint
+        if self.backend == BACKEND_WKHTMLTOPDF and _weasyprint_available():
+            return BACKEND_WEASYPRINT
+        return None
+
+    def _run(self, backend, htmls: dict) -> dict:
+        """{indeks: html} -> {indeks: pdf} dla udanych dokumentów."""
+        executor = self._get_executor(backend)
+        futures = {i: executor.submit(RENDER_FUNCTIONS[backend], h) for i, h in htmls.items()}
+        done = {}
+        for i, f in futures.items():
+            try:
+                done[i] = f.result()
+            except Exception:
+                # żeby nie wywalać całego batcha (ani 500)
+                log.exception("Render PDF (%s) nie powiódł się", backend)
+        return done
+
+    def render(self, html: str, strict: bool = False) -> bytes:
+        pdf = self.render_many([html], strict=strict)[0]
+        if pdf is None:
+            raise PdfRenderError("Nie udało się wygenerować PDF (szczegóły w logu).")
+        return pdf
+
+    def render_many(self, htmls, strict: bool = False) -> list:
+        """
+        Renderuje listę HTML-i równolegle (w granicach puli). Kolejność zachowana.
+        Dokument nieudany w wkhtmltopdf idzie do WeasyPrint; jeśli i tam się nie
+        uda – placeholder, a przy strict=True – None.
+        """
+        htmls = list(htmls)
+        if not htmls:
+            return []
+        failed = None if strict else PLACEHOLDER_PDF
+        if self.backend is None:
+            log.error("Brak backendu PDF (wkhtmltopdf/WeasyPrint)")
+            return [failed] * len(htmls)
+
+        pending = dict(enumerate(htmls))
+        results = self._run(self.backend, pending)
+        retry = {i: h for i, h in pending.items() if i not in results}
+        fallback = self._fallback_backend()
+        if retry and fallback:
+            results.update(self._run(fallback, retry))
+        return [results.get(i, failed) for i in range(len(htmls))]
+
+    def shutdown(self):
+        with self._lock:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._executors = {}
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> PdfRenderer:
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = PdfRenderer()
+            atexit.register(_renderer.shutdown)
+        return _renderer
+
+
+def render_template_pdf(template_name: str, ctx: dict, strict: bool = False) -> bytes:
+    html = get_pdf_template(template_name).render(ctx)
+    return get_renderer().render(html, strict=strict)
+
+
+def render_templates_pdf(template_name: str, contexts, renderer: PdfRenderer | None = None,
+                         strict: bool = False) -> list:
+    template = get_pdf_template(template_name)
+    return (renderer or get_renderer()).render_many((template.render(ctx) for ctx in contexts), strict=strict)
@@ -0,0 +1,109 @@
+# panel/pricing.py
+"""
+Ceny dla ucznia (PrzedmiotCennik.cena_uczen) bez zapytań per rezerwacja.
+
+Cennik jest mały, więc trzymamy go w procesie jako słownik po
+znormalizowanym (przedmiot, poziom). Wersja cennika siedzi we wspólnym
+cache Django: zapis PrzedmiotCennik / UstawieniaPlatnosci (sygnały w
+panel/signals.py) ustawia nową wersję, a każdy proces przy następnym
+odczycie widzi różnicę i przeładowuje tabelę (2 zapytania).
+
+Dopasowanie jak w dawnym `_resolve_cena_uczen`: pierwszy (po pk) wpis
+pasujący do podanych pól, potem UstawieniaPlatnosci.cena_za_godzine, potem 0.
+"""
+import threading
+import uuid
+from decimal import Decimal
+
+from django.core.cache import cache
+
+from .models import PrzedmiotCennik, UstawieniaPlatnosci
+
+VERSION_KEY = "pricing:cennik:version"
+ZERO = Decimal("0.00")
+
+_lock = threading.Lock()
+_table = None
+
+
+def _norm(value) -> str:
+    return (value or "").strip().lower()
+
+
+class PriceTable:
+    def __init__(self, version, rows, fallback):
+        self.version = version
+        self.fallback = fallback
+        self.exact, self.by_subject, self.by_level = {}, {}, {}
+        self.first = None
+        # rows po pk – setdefault zostawia pierwszy pasujący, jak qs.first()
+        for nazwa, poziom, cena in rows:
+            cena = Decimal(cena)
+            n, p = _norm(nazwa), _norm(poziom)
+            self.exact.setdefault((n, p), cena)
+            self.by_subject.setdefault(n, cena)
+            self.by_level.setdefault(p, cena)
+            if self.first is None:
+                self.first = cena
+
+    def resolve(self, przedmiot, poziom) -> Decimal:
+        n, p = _norm(przedmiot), _norm(poziom)
+        if n and p:
+            cena = self.exact.get((n, p))
+        elif n:
+            cena = self.by_subject.get(n)
+        elif p:
+            cena = self.by_level.get(p)
+        else:
+            cena = self.first
+        if cena is not None:
+            return cena
+        return self.fallback if self.fallback is not None else ZERO
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_price_table():
+    """Nowa wersja cennika dla wszystkich procesów (wołane z sygnałów)."""
+    global _table
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    with _lock:
+        _table = None
+
+
+def get_price_table() -> PriceTable:
+    global _table
+    version = _current_version()
+    table = _table
+    if table is not None and table.version == version:
+        return table
+    with _lock:
+        if _table is None or _table.version != version:
+            rows = list(PrzedmiotCennik.objects.order_by("pk").values_list("nazwa", "poziom", "cena_uczen"))
+            ustawienia = UstawieniaPlatnosci.objects.order_by("pk").values_list("cena_za_godzine", flat=True).first()
+            _table = PriceTable(version, rows, Decimal(ustawienia) if ustawienia is not None else None)
+        return _table
+
+
+def _rez_poziom(rezerwacja):
+    return getattr(rezerwacja, "poziom", "") or getattr(rezerwacja, "poziom_nauki", "") or ""
+
+
+def resolve_cena_uczen(rezerwacja, table: PriceTable | None = None) -> Decimal:
+    table = table or get_price_table()
+    return table.resolve(getattr(rezerwacja, "przedmiot", ""), _rez_poziom(rezerwacja))
+
+
+def attach_ceny_uczen(rezerwacje, attr: str = "kwota") -> list:
+    """Ustawia `r.<attr>` dla całej listy rezerwacji – jedna tabela, zero zapytań per wiersz."""
+    table = get_price_table()
+    rezerwacje = list(rezerwacje)
+    for r in rezerwacje:
+        setattr(r, attr, table.resolve(getattr(r, "przedmiot", ""), _rez_poziom(r)))
+    return rezerwacje
@@ -0,0 +1,121 @@
+# panel/rates.py
+"""
+Macierz stawek nauczycieli (nauczyciel × przedmiot × poziom) dla księgowości.
+
+Cztery zapytania niezależnie od liczby nauczycieli:
+  1. nauczyciele + profile (select_related),
+  2. OfertaNauczyciela (przedmiot × poziom – wiersze macierzy),
+  3. StawkaNauczyciela (stawki indywidualne),
+  4. PrzedmiotCennik (cena nauczyciela z cennika – domyślna stawka),
+a złączenie robimy w pamięci.
+
+Edycje wielu komórek naraz: `apply_rate_edits` – jedna transakcja,
+bulk_update dla istniejących stawek i bulk_create dla nowych.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import PrzedmiotCennik, StawkaNauczyciela
+from .offerings import offerings_by_teacher
+
+MAX_RATE = Decimal("9999.99")  # StawkaNauczyciela.stawka: max_digits=6, decimal_places=2
+
+
+def teachers_qs():
+    return User.objects.filter(profil__is_teacher=True).select_related("profil").order_by("last_name")
+
+
+def build_rate_matrix() -> list:
+    """[{"nauczyciel": User, "stawki": [{"przedmiot", "poziom", "stawka", "indywidualna"}]}]"""
+    nauczyciele = list(teachers_qs())
+    oferta = offerings_by_teacher([n.id for n in nauczyciele])
+    indywidualne = {
+        (n_id, przedmiot, poziom): stawka
+        for n_id, przedmiot, poziom, stawka in StawkaNauczyciela.objects.filter(
+            nauczyciel__in=[n.id for n in nauczyciele]
+        ).values_list("nauczyciel_id", "przedmiot", "poziom", "stawka")
+    }
+    cennik = {
+        (nazwa, poziom): cena
+        for nazwa, poziom, cena in PrzedmiotCennik.objects.values_list("nazwa", "poziom", "cena")
+    }
+
+    matrix = []
+    for nauczyciel in nauczyciele:
+        dane = []
+        for przedmiot, poziom in oferta.get(nauczyciel.id, ()):
+            ind = indywidualne.get((nauczyciel.id, przedmiot, poziom))
+            dane.append({
+                "przedmiot": przedmiot,
+                "poziom": poziom,
+                "stawka": ind if ind is not None else cennik.get((przedmiot, poziom), ""),
+                "indywidualna": ind is not None,
+            })
+        matrix.append({"nauczyciel": nauczyciel, "stawki": dane})
+    return matrix
+
+
+def parse_rate_edits(post) -> list:
+    """
+    Komórki z formularza: równoległe listy `cell` ("<id>|<przedmiot>|<poziom>")
+    i `stawka` (puste pomijamy). Obsługuje też stary pojedynczy formularz
+    (nauczyciel_id, przedmiot, poziom, stawka).
+    """
+    cells = post.getlist("cell")
+    values = post.getlist("stawka")
+    if not cells and post.get("nauczyciel_id"):
+        cells = [f'{post.get("nauczyciel_id")}|{post.get("przedmiot", "")}|{post.get("poziom", "")}']
+
+    edits, errors = [], []
+    for cell, raw in zip(cells, values):
+        raw = (raw or "").strip().replace(",", ".")
+        if not raw:
+            continue
+        try:
+            n_id, przedmiot, poziom = cell.split("|", 2)
+            n_id = int(n_id)
+            stawka = Decimal(raw).quantize(Decimal("0.01"))
+        except (ValueError, InvalidOperation):
+            errors.append(f"Niepoprawna wartość: {raw}")
+            continue
+        if not przedmiot or not poziom:
+            continue
+        if stawka < 0 or stawka > MAX_RATE:
+            errors.append(f"Stawka poza zakresem 0–{MAX_RATE}: {raw}")
+            continue
+        edits.append((n_id, przedmiot, poziom, stawka))
+    if errors:
+        raise ValidationError(errors)
+    return edits
+
+
+def apply_rate_edits(edits) -> tuple:
+    """Zapisuje wiele stawek naraz. Zwraca (zaktualizowane, utworzone)."""
+    if not edits:
+        return 0, 0
+    teacher_ids = set(teachers_qs().filter(id__in={e[0] for e in edits}).values_list("id", flat=True))
+    edits = {(n_id, p, lvl): stawka for n_id, p, lvl, stawka in edits if n_id in teacher_ids}
+
+    with transaction.atomic():
+        existing = {
+            (s.nauczyciel_id, s.przedmiot, s.poziom): s
+            for s in StawkaNauczyciela.objects.select_for_update().filter(nauczyciel_id__in=teacher_ids)
+        }
+        to_update, to_create = [], []
+        for key, stawka in edits.items():
+            obj = existing.get(key)
+            if obj is not None:
+                if obj.stawka != stawka:
+                    obj.stawka = stawka
+                    to_update.append(obj)
+            else:
+                n_id, przedmiot, poziom = key
+                to_create.append(StawkaNauczyciela(
+                    nauczyciel_id=n_id, przedmiot=przedmiot, poziom=poziom, stawka=stawka
+                ))
+        StawkaNauczyciela.objects.bulk_update(to_update, ["stawka"])
+        StawkaNauczyciela.objects.bulk_create(to_create)
+    return len(to_update), len(to_create)
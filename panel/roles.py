@@ -0,0 +1,106 @@
+# panel/roles.py
+"""
+Role użytkownika (grupy) – jedno źródło prawdy dla sprawdzeń uprawnień.
+
+Nazwy grup użytkownika ładujemy RAZ na request (zapamiętane na obiekcie
+request.user, który Django tworzy per request), a między requestami
+trzymamy je w cache Django. Zmiana członkostwa (m2m_changed na
+User.groups) oraz zmiana/usunięcie grupy czyści wpisy – patrz
+panel/signals.py.
+
+Porównania nazw grup są bez rozróżniania wielkości liter. Wyjątki od
+"rola = grupa": is_legacy_teacher i is_student czytają Profil.is_teacher.
+"""
+from django.core.cache import cache
+
+CACHE_PREFIX = "roles:groups"
+CACHE_TIMEOUT = 60 * 60
+
+TEACHER_GROUP = "Nauczyciele"
+ACCOUNTING_GROUPS = frozenset({
+    "Księgowość", "Ksiegowosc", "Accounting",
+    "KsiÄ™gowoĹ›Ä‡",  # nazwa w złym kodowaniu z dawnych wersji views.py
+})
+AI_TEST_GROUP = "AI_Test"
+
+USER_ATTR = "_panel_group_names"
+
+
+def _key(user_id) -> str:
+    return f"{CACHE_PREFIX}:{user_id}"
+
+
+def group_names(user) -> frozenset:
+    """Nazwy grup (casefold) – z obiektu usera, z cache albo jednym zapytaniem."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    names = getattr(user, USER_ATTR, None)
+    if names is not None:
+        return names
+    key = _key(user.pk)
+    names = cache.get(key)
+    if names is None:
+        names = frozenset(n.casefold() for n in user.groups.values_list("name", flat=True))
+        cache.set(key, names, CACHE_TIMEOUT)
+    setattr(user, USER_ATTR, names)
+    return names
+
+
+def invalidate_user_roles(*user_ids):
+    ids = [uid for uid in user_ids if uid is not None]
+    if ids:
+        cache.delete_many([_key(uid) for uid in ids])
+
+
+def has_group(user, *names) -> bool:
+    user_groups = group_names(user)
+    return any(n.casefold() in user_groups for n in names)
+
+
+# --- predykaty (dla user_passes_test i w treści widoków) ---
+
+def in_group(group_name: str):
+    def _check(user):
+        return has_group(user, group_name)
+    return _check
+
+
+def is_teacher(user) -> bool:
+    return has_group(user, TEACHER_GROUP)
+
+
+def is_legacy_teacher(user) -> bool:
+    # Legacy = profil/profile.is_teacher True, ale brak w grupie "Nauczyciele"
+    try:
+        if is_teacher(user):
+            return False
+        profil = getattr(user, "profil", None) or getattr(user, "profile", None)
+        if profil is None:
+            return False
+        return getattr(profil, "is_teacher", False) is True
+    except Exception:
+        return False
+
+
+def is_accounting(user) -> bool:
+    """Admin albo grupa księgowości."""
+    if user is None or not user.is_authenticated:
+        return False
+    return user.is_superuser or has_group(user, *ACCOUNTING_GROUPS)
+
+
+def is_student(user) -> bool:
+    """
+    Uczeń = profil bez is_teacher (nie grupa i nie cache grup – czyta
+    user.profil). Tak sprawdzał dekorator moje_konto_uczen_view; późniejsza
+    kopia w views.py (grupy "Uczeń"/"Student") nadpisywała nazwę modułu,
+    ale nie była nigdzie wywoływana, więc jej nie przenosimy.
+    """
+    try:
+        return not user.profil.is_teacher
+    except Exception:
+        return True  # brak profilu -> potraktuj jak ucznia (zostanie utworzony)
+
+
+def is_ai_test_user(user) -> bool:
+    return has_group(user, AI_TEST_GROUP)
@@ -1,27 +1,15 @@
 # panel/signals.py
+import threading
+from datetime import date
+
 from django.conf import settings
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
 from django.dispatch import receiver
 
-from datetime import date, datetime
-from django.db.models.fields.files import FieldFile
-
-from .models import Profil, AuditLog
-
-
-def _jsonable(value):
-    """Zamienia wartości na JSON-safe (dla AuditLog.details)."""
-    if isinstance(value, (datetime, date)):
-        return value.isoformat()
-    if isinstance(value, FieldFile):
-        return value.name or ""
-    # prymitywy zostawiamy; inne rzutujemy na str
-    try:
-        import json
-        json.dumps(value)
-        return value
-    except Exception:
-        return str(value)
+from . import audit
+from .models import OfertaNauczyciela, Profil, Invoice, Payment, PrzedmiotCennik, SiteLegalConfig, UstawieniaPlatnosci
 
 
 # --- AUTOMATYCZNE UTWORZENIE PROFILU DLA NOWEGO USERA ---
@@ -29,57 +17,233 @@ def _jsonable(value):
 def ensure_profil(sender, instance, created, **kwargs):
     if created:
         Profil.objects.get_or_create(user=instance)
-        AuditLog.objects.create(
-            actor="system",
-            action="create_profile",
+        # wpis audytu idzie po COMMIT, paczką w tle – rejestracja nie czeka na zapis
+        audit.record(
+            "create_profile",
             obj_type="user",
-            obj_id=str(instance.pk),
+            obj_id=instance.pk,
             details={"note": "auto-created Profil for new user"},
         )
 
 
 # --- LOGOWANIE ZMIAN PROFILU (Aron) ---
-@receiver(pre_save, sender=Profil)
-def profil_pre_save(sender, instance, **kwargs):
-    try:
-        instance._old_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        instance._old_instance = None
+# Pola zgodne z Twoim modelem Profil (nieistniejące są pomijane przez migawkę)
+PROFIL_AUDIT_FIELDS = (
+    # Twoje bazowe:
+    "is_teacher", "numer_telefonu", "tytul_naukowy", "poziom_nauczania",
+    "przedmioty", "opis",
+    # Rozszerzenia ucznia/opiekuna/zgody:
+    "extra_phone", "city", "address_line", "birth_date",
+    "guardian_name", "guardian_email", "guardian_phone",
+    "marketing_email", "marketing_sms",
+    "gdpr_edu_consent", "recording_consent",
+    "accessibility_notes", "avatar",
+)
+
+
+@receiver(post_init, sender=Profil)
+def profil_post_init(sender, instance, **kwargs):
+    # stan "przed zmianą" z wczytanych wartości – bez SELECT-a w pre_save
+    audit.take_snapshot(instance, PROFIL_AUDIT_FIELDS)
 
 
 @receiver(post_save, sender=Profil)
 def profil_post_save(sender, instance, created, **kwargs):
-    old = getattr(instance, "_old_instance", None)
-
-    # Pola zgodne z Twoim modelem Profil
-    fields = [
-        # Twoje bazowe:
-        "is_teacher", "numer_telefonu", "tytul_naukowy", "poziom_nauczania",
-        "przedmioty", "opis",
-        # Rozszerzenia ucznia/opiekuna/zgody:
-        "extra_phone", "city", "address_line", "birth_date",
-        "guardian_name", "guardian_email", "guardian_phone",
-        "marketing_email", "marketing_sms",
-        "gdpr_edu_consent", "recording_consent",
-        "accessibility_notes", "avatar",
-    ]
-
-    changes = {}
-    if old:
-        for f in fields:
-            ov = getattr(old, f, None)
-            nv = getattr(instance, f, None)
-            # porównujemy po str, ale zapisujemy JSON-safe wartości
-            if str(ov) != str(nv):
-                changes[f] = {"old": _jsonable(ov), "new": _jsonable(nv)}
-    else:
-        for f in fields:
-            changes[f] = {"old": None, "new": _jsonable(getattr(instance, f, None))}
-
-    AuditLog.objects.create(
-        actor="system",
-        action="create_profile" if created else "update_profile",
+    changes = audit.diff(instance, PROFIL_AUDIT_FIELDS, created=created)
+    if not changes and not created:
+        return  # zapis bez zmian w audytowanych polach
+    audit.record(
+        "create_profile" if created else "update_profile",
         obj_type="profil",
-        obj_id=str(instance.pk),
+        obj_id=instance.pk,
         details=changes,
     )
+
+
+# --- PODSUMOWANIA MIESIĘCZNE RACHUNKÓW (księgowość) ---
+def _refresh_invoice_months(*days):
+    from .invoices import refresh_month_summary
+    for day in {d.replace(day=1) for d in days if d}:
+        transaction.on_commit(lambda day=day: refresh_month_summary(day))
+
+
+# migawki z post_init (jak Profil) – bez SELECT-a poprzedniego wiersza przy zapisie
+INVOICE_SUMMARY_FIELDS = ("issue_date",)
+PAYMENT_SUMMARY_FIELDS = ("status",)
+
+
+@receiver(post_init, sender=Invoice)
+def invoice_post_init(sender, instance, **kwargs):
+    audit.take_snapshot(instance, INVOICE_SUMMARY_FIELDS)
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invoice_changed(sender, instance, **kwargs):
+    old = audit.diff(instance, INVOICE_SUMMARY_FIELDS).get("issue_date", {}).get("old")
+    _refresh_invoice_months(instance.issue_date, date.fromisoformat(old[:10]) if old else None)
+    audit.take_snapshot(instance, INVOICE_SUMMARY_FIELDS)
+
+
+@receiver(post_init, sender=Payment)
+def payment_post_init(sender, instance, **kwargs):
+    audit.take_snapshot(instance, PAYMENT_SUMMARY_FIELDS)
+
+
+@receiver(post_save, sender=Payment)
+def payment_changed(sender, instance, created, **kwargs):
+    # status płatności wpływa na liczbę opłaconych rachunków – inne zmiany pomijamy
+    changed = audit.diff(instance, PAYMENT_SUMMARY_FIELDS)
+    audit.take_snapshot(instance, PAYMENT_SUMMARY_FIELDS)
+    if created or not changed:
+        return
+    issue_date = Invoice.objects.filter(payment=instance).values_list("issue_date", flat=True).first()
+    _refresh_invoice_months(issue_date)
+
+
+# --- CENNIK: nowa wersja tabeli cen w panel.pricing ---
+@receiver(post_save, sender=PrzedmiotCennik)
+@receiver(post_delete, sender=PrzedmiotCennik)
+@receiver(post_save, sender=UstawieniaPlatnosci)
+@receiver(post_delete, sender=UstawieniaPlatnosci)
+def cennik_changed(sender, **kwargs):
+    from .pricing import invalidate_price_table
+    transaction.on_commit(invalidate_price_table)
+
+
+# --- KONFIGURACJE JEDNOREKORDOWE (panel.singletons): nowa wersja po COMMIT ---
+@receiver(post_save, sender=SiteLegalConfig)
+@receiver(post_delete, sender=SiteLegalConfig)
+@receiver(post_save, sender=UstawieniaPlatnosci)
+@receiver(post_delete, sender=UstawieniaPlatnosci)
+def singleton_changed(sender, **kwargs):
+    from .singletons import SINGLETONS
+    transaction.on_commit(SINGLETONS[sender].invalidate)
+
+
+# --- ROLE: czyszczenie cache grup (panel.roles) ---
+@receiver(m2m_changed, sender=Group.user_set.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    from .roles import USER_ATTR, invalidate_user_roles
+    if reverse:
+        # zmiana od strony grupy: group.user_set.add/remove/clear
+        if action == "pre_clear":
+            instance._role_user_ids = list(instance.user_set.values_list("pk", flat=True))
+        elif action == "post_clear":
+            invalidate_user_roles(*getattr(instance, "_role_user_ids", []))
+        elif action in ("post_add", "post_remove"):
+            invalidate_user_roles(*(pk_set or []))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        invalidate_user_roles(instance.pk)
+        instance.__dict__.pop(USER_ATTR, None)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # zmiana nazwy / usunięcie grupy dotyczy wszystkich jej członków
+    from .roles import invalidate_user_roles
+    if instance.pk:
+        invalidate_user_roles(*instance.user_set.values_list("pk", flat=True))
+
+
+# --- OFERTA NAUCZYCIELA (panel.offerings) – dual-write z Profil.przedmioty ---
+@receiver(post_save, sender=Profil)
+def offerings_profil_changed(sender, instance, created, **kwargs):
+    changed = audit.diff(instance, ("is_teacher", "przedmioty", "poziom_nauczania"))
+    if not instance.is_teacher:
+        # uczniowie nie mają oferty; nauczyciel, który przestał nim być – oferta znika
+        if not created and "is_teacher" in changed:
+            OfertaNauczyciela.objects.filter(nauczyciel_id=instance.user_id).delete()
+        return
+    if not created and not changed:
+        return
+    from .offerings import sync_teacher_offerings
+    sync_teacher_offerings(instance)
+
+
+# --- KATALOG NAUCZYCIELI NA STRONIE GŁÓWNEJ (panel.directory) ---
+# pola, z których powstaje karta nauczyciela (przedmioty -> tagi z oferty)
+PROFIL_CARD_FIELDS = ("is_teacher", "tytul_naukowy", "poziom_nauczania", "przedmioty", "opis", "avatar")
+USER_CARD_FIELDS = ("first_name", "last_name", "username", "is_active")
+
+
+def _rebuild_directory():
+    from .directory import rebuild_teacher_directory
+    rebuild_teacher_directory()
+
+
+_directory_state = threading.local()
+
+
+class _PendingDirectoryRebuild:
+    """
+    Jedna przebudowa na COMMIT (np. zapis User + Profil w jednym formularzu):
+    każda zmiana rejestruje on_commit z tym samym obiektem, pierwszy wykonany
+    callback przebudowuje katalog, kolejne nic nie robią. Po rollbacku obiekt
+    zostaje otwarty i przechodzi na następną transakcję tego wątku.
+    """
+
+    def __init__(self):
+        self.done = False
+
+    def __call__(self):
+        if self.done:
+            return
+        self.done = True
+        if getattr(_directory_state, "pending", None) is self:
+            _directory_state.pending = None
+        _rebuild_directory()
+
+
+def _schedule_directory_rebuild():
+    pending = getattr(_directory_state, "pending", None)
+    if pending is None:
+        pending = _directory_state.pending = _PendingDirectoryRebuild()
+    transaction.on_commit(pending)
+
+
+@receiver(post_save, sender=Profil)
+def directory_profil_changed(sender, instance, created, **kwargs):
+    # uczniowie i zmiany pól spoza karty (telefon, zgody, adres) – katalog bez zmian
+    changed = audit.diff(instance, PROFIL_CARD_FIELDS)
+    if (instance.is_teacher and (created or changed)) or "is_teacher" in changed:
+        _schedule_directory_rebuild()
+
+
+@receiver(post_delete, sender=Profil)
+def directory_profil_deleted(sender, instance, **kwargs):
+    if instance.is_teacher:
+        _schedule_directory_rebuild()
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def user_post_init(sender, instance, **kwargs):
+    # tylko pola karty i tylko wiersze z bazy wczytane w całości – nowy User() albo
+    # .only()/.defer() (listy, select_related) nie trafią do diffu w directory_user_changed
+    data = instance.__dict__
+    if instance.pk is not None and all(f in data for f in USER_CARD_FIELDS):
+        audit.take_snapshot(instance, USER_CARD_FIELDS)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def directory_user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # nowy użytkownik nie jest jeszcze nauczycielem; logowanie zmienia tylko last_login
+    if created:
+        card_changed = False
+    elif getattr(instance, audit.SNAPSHOT_ATTR, None) is None:
+        # bez migawki (instancja z .only()/.defer()) – rozstrzyga lista zapisywanych pól
+        card_changed = update_fields is None or not update_fields.isdisjoint(USER_CARD_FIELDS)
+    else:
+        card_changed = bool(audit.diff(instance, USER_CARD_FIELDS))
+    if card_changed:
+        if Profil.objects.filter(user=instance, is_teacher=True).exists():
+            _schedule_directory_rebuild()
+    audit.take_snapshot(instance, USER_CARD_FIELDS)
+    # usunięcie użytkownika kasuje kaskadowo Profil -> directory_profil_deleted
+
+
+@receiver(post_save, sender=Profil)
+def profil_refresh_snapshot(sender, instance, **kwargs):
+    # po receiverach, które porównują z migawką: kolejny save() tej instancji liczy diff od teraz
+    audit.take_snapshot(instance, PROFIL_AUDIT_FIELDS)
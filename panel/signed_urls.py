@@ -0,0 +1,149 @@
+# panel/signed_urls.py
+"""
+Cache podpisanych URL-i do plików w storage.
+
+Przy AWS_QUERYSTRING_AUTH=True każde `FieldFile.url` liczy nowy podpis SigV4
+(botocore, sporo CPU). URL podpisany w chwili t jest ważny do t + expire,
+więc dzielimy czas na "kubełki" długości (expire - margines): URL podpisany
+w dowolnym momencie kubełka jest ważny jeszcze co najmniej `margines` sekund
+po jego końcu. Klucz cache = (nazwa obiektu w storage, numer kubełka).
+
+Dwie warstwy: mały słownik w procesie + wspólny cache Django (Redis na prod).
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+log = logging.getLogger(__name__)
+
+CACHE_PREFIX = "signed_url"
+# ile sekund przed wygaśnięciem podpisu przestajemy go rozdawać
+SAFETY_MARGIN = getattr(settings, "SIGNED_URL_SAFETY_MARGIN", 5 * 60)
+LOCAL_MAX_ITEMS = 2048
+
+_local = OrderedDict()  # cache_key -> (valid_until_ts, url)
+
+
+def _storage_expire(storage) -> int:
+    return int(getattr(storage, "querystring_expire", None)
+               or getattr(settings, "AWS_QUERYSTRING_EXPIRE", 3600))
+
+
+def _is_signed(storage) -> bool:
+    """Tylko storage z podpisami (S3 + querystring_auth) warto cache'ować."""
+    return bool(getattr(storage, "querystring_auth", False))
+
+
+def _bucket(expire: int, now: float):
+    window = max(60, expire - SAFETY_MARGIN)
+    idx = int(now // window)
+    bucket_end = (idx + 1) * window
+    return idx, bucket_end
+
+
+def _cache_key(storage, name: str, bucket_idx: int) -> str:
+    bucket_name = getattr(storage, "bucket_name", "") or ""
+    digest = hashlib.sha1(f"{bucket_name}:{name}".encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{digest}:{bucket_idx}"
+
+
+def _local_get(key: str, now: float):
+    hit = _local.get(key)
+    if hit and hit[0] > now:
+        _local.move_to_end(key)
+        return hit[1]
+    if hit:
+        _local.pop(key, None)
+    return None
+
+
+def _local_set(key: str, url: str, valid_until: float):
+    _local[key] = (valid_until, url)
+    _local.move_to_end(key)
+    while len(_local) > LOCAL_MAX_ITEMS:
+        _local.popitem(last=False)
+
+
+def signed_url(fieldfile) -> str:
+    """Jak `fieldfile.url`, ale podpis jest współdzielony do końca kubełka."""
+    if not fieldfile or not getattr(fieldfile, "name", None):
+        return ""
+    return signed_urls([fieldfile], fail_silently=False)[0]
+
+
+def signed_urls(fieldfiles, fail_silently: bool = True) -> list:
+    """
+    Podpisuje wiele plików naraz (dla list/harmonogramów): jeden `get_many`
+    i jeden `set_many` do wspólnego cache zamiast podpisu na każdy wiersz.
+    Zwraca listę URL-i w tej samej kolejności ("" dla pustych pól
+    oraz – przy fail_silently – dla plików, których nie dało się podpisać).
+    """
+    fieldfiles = list(fieldfiles)
+    out = [""] * len(fieldfiles)
+    now = time.time()
+
+    pending = {}  # cache_key -> [(idx, fieldfile)]
+    bucket_ends = {}
+    for idx, ff in enumerate(fieldfiles):
+        if not ff or not getattr(ff, "name", None):
+            continue
+        storage = ff.storage
+        if not _is_signed(storage):
+            # lokalny dysk / publiczny bucket – .url jest tani
+            try:
+                out[idx] = ff.url
+            except Exception:
+                if not fail_silently:
+                    raise
+            continue
+        bucket_idx, bucket_end = _bucket(_storage_expire(storage), now)
+        key = _cache_key(storage, ff.name, bucket_idx)
+        url = _local_get(key, now)
+        if url:
+            out[idx] = url
+            continue
+        pending.setdefault(key, []).append((idx, ff))
+        bucket_ends[key] = bucket_end
+
+    if not pending:
+        return out
+
+    shared = cache.get_many(list(pending.keys()))
+    to_store = {}
+    for key, items in pending.items():
+        url = shared.get(key)
+        if not url:
+            try:
+                url = items[0][1].url  # jedyne miejsce, gdzie naprawdę podpisujemy
+            except Exception:
+                if not fail_silently:
+                    raise
+                log.exception("Nie udało się podpisać URL dla %s", items[0][1].name)
+                continue
+            to_store[key] = url
+        _local_set(key, url, bucket_ends[key])
+        for idx, _ff in items:
+            out[idx] = url
+
+    if to_store:
+        # wszystkie klucze z jednego wywołania są w tym samym kubełku
+        timeout = max(1, int(min(bucket_ends[k] for k in to_store) - now))
+        cache.set_many(to_store, timeout=timeout)
+    return out
+
+
+def attach_signed_urls(objects, field: str, attr: str | None = None):
+    """
+    Helper dla widoków listowych: ustawia `obj.<field>_url` (albo `attr`)
+    na podpisany URL, licząc wszystkie podpisy jednym wywołaniem.
+    """
+    objects = list(objects)
+    attr = attr or f"{field}_url"
+    urls = signed_urls(getattr(o, field) for o in objects)
+    for obj, url in zip(objects, urls):
+        setattr(obj, attr, url)
+    return objects
@@ -0,0 +1,79 @@
+# panel/singletons.py
+"""
+Konfiguracje "jednorekordowe" (SiteLegalConfig, UstawieniaPlatnosci) z cache.
+
+Dwie warstwy:
+- w procesie: ostatnio wczytany obiekt + jego wersja,
+- wspólny cache Django: obiekt pod kluczem z wersją.
+Wersja siedzi w cache bez wygasania; zapis/usunięcie rekordu (sygnały
+w panel/signals.py, po COMMIT) ustawia nową wersję – każdy proces przy
+następnym odczycie widzi różnicę i pobiera obiekt z cache albo z bazy
+(jedno zapytanie na wersję dla wszystkich procesów).
+
+Obiekt z `get()` jest współdzielony między requestami – tylko do odczytu.
+Formularze edycji biorą świeży rekord z `load()`.
+"""
+import uuid
+
+from django.core.cache import cache
+
+from .models import SiteLegalConfig, UstawieniaPlatnosci
+
+CACHE_PREFIX = "singleton"
+SHARED_TIMEOUT = 24 * 60 * 60
+_MISSING = object()
+
+
+class SingletonConfig:
+    def __init__(self, model, create=False):
+        self.model = model
+        self.create = create  # brak rekordu: utwórz z domyślnymi wartościami (get_solo)
+        self.label = model._meta.label_lower
+        self._local = None  # (wersja, obiekt)
+
+    @property
+    def version_key(self) -> str:
+        return f"{CACHE_PREFIX}:{self.label}:version"
+
+    def _data_key(self, version) -> str:
+        return f"{CACHE_PREFIX}:{self.label}:{version}"
+
+    def version(self) -> str:
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def load(self):
+        """Rekord prosto z bazy (pierwszy po pk) – do edycji."""
+        obj = self.model.objects.order_by("pk").first()
+        if obj is None and self.create:
+            obj = self.model.objects.create()
+        return obj
+
+    def get(self):
+        """Rekord z cache (None, jeśli nie ma i create=False)."""
+        version = self.version()
+        local = self._local
+        if local is not None and local[0] == version:
+            return local[1]
+        # bez blokady: load() może utworzyć rekord, a sygnał zapisu woła invalidate();
+        # równoległe wczytanie w dwóch wątkach jest nieszkodliwe
+        obj = cache.get(self._data_key(version), _MISSING)
+        if obj is _MISSING:
+            obj = self.load()
+            cache.set(self._data_key(version), obj, SHARED_TIMEOUT)
+        self._local = (version, obj)
+        return obj
+
+    def invalidate(self):
+        """Nowa wersja dla wszystkich procesów (wołane z sygnałów po COMMIT)."""
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+        self._local = None
+
+
+legal_config = SingletonConfig(SiteLegalConfig, create=True)
+payment_settings = SingletonConfig(UstawieniaPlatnosci)
+
+SINGLETONS = {s.model: s for s in (legal_config, payment_settings)}
@@ -0,0 +1,104 @@
+// panel/static/panel/js/direct_upload.js
+//
+// Upload plików bezpośrednio do storage (S3 POST policy).
+// Formularz oznaczamy: <form data-direct-upload ...>,
+// a pole pliku: <input type="file" data-upload-kind="plik|material|potwierdzenie">.
+// Po udanym uploadzie pole pliku jest wyłączane, a do formularza trafia
+// ukryty <input name="<kind>_token">. Przy błędzie presign formularz
+// wysyła się klasycznie (multipart przez Django).
+
+(function () {
+  // CSRF_COOKIE_HTTPONLY=True -> token bierzemy z formularza, nie z cookie
+  function csrfToken(form) {
+    const el = form.querySelector("input[name=csrfmiddlewaretoken]");
+    return el ? el.value : "";
+  }
+
+  async function presign(form, kind, file) {
+    const resp = await fetch(window.DIRECT_UPLOAD_PRESIGN_URL || "/upload/presign/", {
+      method: "POST",
+      credentials: "same-origin",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": csrfToken(form) },
+      body: JSON.stringify({
+        kind: kind,
+        filename: file.name,
+        size: file.size,
+        content_type: file.type || "",
+      }),
+    });
+    const data = await resp.json().catch(() => ({}));
+    if (!resp.ok) {
+      const err = new Error(data.error || "presign failed");
+      err.fatal = resp.status === 400; // błąd walidacji – nie ma sensu fallbackować
+      throw err;
+    }
+    return data;
+  }
+
+  async function upload(form, target, file) {
+    const fd = new FormData();
+    Object.entries(target.fields || {}).forEach(([k, v]) => fd.append(k, v));
+    fd.append(target.file_field || "file", file);
+    const headers = {};
+    // lokalny zastępnik to nasz widok -> wymaga CSRF
+    if (target.url.startsWith("/")) headers["X-CSRFToken"] = csrfToken(form);
+    const resp = await fetch(target.url, {
+      method: "POST",
+      body: fd,
+      headers: headers,
+      credentials: target.url.startsWith("/") ? "same-origin" : "omit",
+    });
+    if (!resp.ok) throw new Error("upload failed: " + resp.status);
+  }
+
+  async function handleSubmit(ev) {
+    const form = ev.currentTarget;
+    if (ev.defaultPrevented || form.dataset.directUploadDone === "1") return;
+
+    const inputs = Array.from(form.querySelectorAll("input[type=file][data-upload-kind]"))
+      .filter((i) => i.files && i.files.length);
+    if (!inputs.length) return;
+
+    ev.preventDefault();
+    ev.stopImmediatePropagation();
+    const buttons = form.querySelectorAll("button[type=submit], input[type=submit]");
+    buttons.forEach((b) => (b.disabled = true));
+
+    try {
+      for (const input of inputs) {
+        const kind = input.dataset.uploadKind;
+        const file = input.files[0];
+        const target = await presign(form, kind, file);
+        await upload(form, target, file);
+
+        const hidden = document.createElement("input");
+        hidden.type = "hidden";
+        hidden.name = kind + "_token";
+        hidden.value = target.token;
+        form.appendChild(hidden);
+        input.required = false;
+        input.disabled = true; // nie wysyłamy bajtów drugi raz przez Django
+      }
+    } catch (e) {
+      console.warn("[direct_upload]", e);
+      buttons.forEach((b) => {
+        b.disabled = false;
+        delete b.dataset.locked; // blokada podwójnego kliknięcia ze strony (np. lockSubmit)
+      });
+      if (e.fatal) {
+        alert(e.message);
+        return;
+      }
+      // fallback: klasyczny multipart
+    }
+
+    // submit() bez zdarzenia "submit": inline onsubmit (lockSubmit) już przeszedł
+    // przy pierwszym kliknięciu i drugi raz zablokowałby wysyłkę
+    form.dataset.directUploadDone = "1";
+    HTMLFormElement.prototype.submit.call(form);
+  }
+
+  document.querySelectorAll("form[data-direct-upload]").forEach((form) => {
+    form.addEventListener("submit", handleSubmit);
+  });
+})();
@@ -0,0 +1,64 @@
+# panel/streaming.py
+"""
+Pomocnicze funkcje dla StreamingHttpResponse.
+
+Pod ASGI (daphne) Django zbiera synchroniczny iterator do listy przed
+wysłaniem – cała odpowiedź ląduje w pamięci. `streaming_content()` owija
+generator w iterator asynchroniczny, który pobiera kolejne kawałki
+w wątku Django (thread_sensitive), więc kursor bazy działa normalnie,
+a pamięć zostaje płaska.
+"""
+import csv
+import io
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+_END = object()
+
+
+def streaming_content(request, chunks):
+    if not isinstance(request, ASGIRequest):
+        return chunks
+
+    async def _aiter():
+        it = iter(chunks)
+        pull = sync_to_async(next, thread_sensitive=True)
+        while True:
+            chunk = await pull(it, _END)
+            if chunk is _END:
+                break
+            yield chunk
+
+    return _aiter()
+
+
+def iter_csv(rows, header=None, delimiter=";", rows_per_chunk=500):
+    """Wiersze -> kawałki CSV (bytes, UTF-8), po `rows_per_chunk` wierszy."""
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=delimiter)
+    if header:
+        w.writerow(header)
+    n = 0
+    for row in rows:
+        w.writerow(row)
+        n += 1
+        if n >= rows_per_chunk:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            n = 0
+    tail = buf.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def iter_gzip(chunks, level=6):
+    """Kompresja gzip "w locie" – bez buforowania całego pliku."""
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
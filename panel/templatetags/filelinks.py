@@ -2,19 +2,21 @@
 from django import template
 from django.urls import reverse
 
+from panel.signed_urls import signed_url
+
 register = template.Library()
 
 @register.filter
 def file_link(filefield):
     """
     Zwraca bezpieczny URL do pliku:
-    - jeśli storage udostępnia publiczny .url -> używa go
+    - jeśli storage udostępnia .url -> używa go (podpis S3 z cache, patrz signed_urls)
     - w innym wypadku -> zwraca link do naszego widoku pobierania
     """
     if not filefield:
         return ""
     try:
-        url = filefield.url  # może rzucić ValueError przy FileSystemStorage bez MEDIA_URL
+        url = signed_url(filefield)  # może rzucić ValueError przy FileSystemStorage bez MEDIA_URL
         if url:
             return url
     except Exception:
@@ -0,0 +1,167 @@
+# panel/tests/test_ai_chat_stream.py
+"""
+ai_chat_stream (SSE) na lokalnym, fałszywym serwerze zgodnym z OpenAI
+(/v1/chat/completions, stream=True) – bez sieci i bez klucza API.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import AsyncClient, TestCase, override_settings
+
+from panel.models import AiChatMessage
+from panel.views import ai as ai_views
+
+
+class FakeOpenAI:
+    """Serwer SSE: wysyła `chunks` co `delay` s i notuje, czy klient zerwał połączenie."""
+
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.requests = []
+        self.disconnected = threading.Event()
+        self.finished = threading.Event()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                fake.requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    for text in fake.chunks:
+                        self._event({
+                            "id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0,
+                            "model": "test", "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+                        })
+                        time.sleep(fake.delay)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                    fake.finished.set()
+                except (BrokenPipeError, ConnectionResetError):
+                    fake.disconnected.set()
+
+            def _event(self, payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def text_of(content) -> str:
+    # ostatnia wiadomość użytkownika idzie jako lista części [{"type": "text", ...}]
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return content
+
+
+def parse_sse(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        events.append((fields.get("event"), json.loads(fields.get("data", "null"))))
+    return events
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AiChatStreamTests(TestCase):
+    url = "/ai_chat/stream/"
+
+    def setUp(self):
+        ai_views._async_ai_client.cache_clear()
+        self.addCleanup(ai_views._async_ai_client.cache_clear)
+
+    def _use(self, fake):
+        env = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "OPENAI_BASE_URL": fake.base_url})
+        env.start()
+        self.addCleanup(env.stop)
+
+    async def _post(self, client, message):
+        return await client.post(
+            self.url, json.dumps({"message": message, "persona": "Noa"}), content_type="application/json"
+        )
+
+    async def test_forwards_tokens_and_persists_turn(self):
+        with FakeOpenAI(["Cze", "ść", "!"]) as fake:
+            self._use(fake)
+            resp = await self._post(AsyncClient(), "hej")
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(resp["Content-Type"].startswith("text/event-stream"))
+            body = b"".join([part async for part in resp.streaming_content]).decode()
+
+        events = parse_sse(body)
+        self.assertEqual([e for e, _ in events], ["token", "token", "token", "done"])
+        self.assertEqual([d["t"] for e, d in events if e == "token"], ["Cze", "ść", "!"])
+        self.assertEqual(events[-1][1]["reply"], "Cześć!")
+        self.assertTrue(fake.requests[0]["stream"])
+        self.assertEqual(text_of(fake.requests[0]["messages"][-1]["content"]), "hej")
+
+        saved = [
+            (m.role, m.content)
+            async for m in AiChatMessage.objects.filter(persona="Noa").order_by("id")
+        ]
+        self.assertEqual(saved, [("user", "hej"), ("assistant", "Cześć!")])
+
+    async def test_history_reaches_next_prompt(self):
+        with FakeOpenAI(["OK"]) as fake:
+            self._use(fake)
+            client = AsyncClient()
+            for message in ("pierwsze", "drugie"):
+                resp = await self._post(client, message)
+                b"".join([part async for part in resp.streaming_content])
+
+        contents = [text_of(m["content"]) for m in fake.requests[1]["messages"] if m["role"] != "system"]
+        self.assertEqual(contents, ["pierwsze", "OK", "drugie"])
+
+    async def test_client_disconnect_closes_upstream_and_persists_nothing(self):
+        from openai import AsyncStream
+
+        close = mock.patch.object(AsyncStream, "close", autospec=True, side_effect=AsyncStream.close)
+        with FakeOpenAI(["a"] * 200, delay=0.05) as fake, close as close_spy:
+            self._use(fake)
+            resp = await self._post(AsyncClient(), "hej")
+            first = asyncio.Event()
+
+            async def consume():
+                async for _ in resp.streaming_content:
+                    first.set()
+
+            # rozłączenie klienta = anulowanie zadania, które czyta odpowiedź (jak w handlerze ASGI)
+            task = asyncio.create_task(consume())
+            await asyncio.wait_for(first.wait(), timeout=10)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            closed = await asyncio.to_thread(fake.disconnected.wait, 10)
+            self.assertTrue(closed, "strumień do OpenAI nie został zamknięty")
+            self.assertFalse(fake.finished.is_set())
+            close_spy.assert_awaited_once()
+
+        self.assertEqual(await AiChatMessage.objects.acount(), 0)
@@ -0,0 +1,212 @@
+# panel/tests/test_audit_archive.py
+"""
+Retencja AuditLog (panel.audit_archive, auditlog_retention) i DDL partycji
+(auditlog_partitions) – te drugie tylko na Postgresie.
+"""
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+from io import StringIO
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from panel import audit_archive
+from panel.models import AuditLog
+
+OLD_MONTH = date(2020, 3, 1)
+
+
+def add_log(when, action="test"):
+    row = AuditLog.objects.create(action=action)
+    AuditLog.objects.filter(pk=row.pk).update(created_at=when)
+    return row.pk
+
+
+def at(month, day=10):
+    return timezone.make_aware(datetime(month.year, month.month, day, 12))
+
+
+class ArchiveTestCase(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media, AUDIT_LOG_ARCHIVE_DIR="audit-archive")
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def archives(self):
+        try:
+            return sorted(default_storage.listdir("audit-archive")[1])
+        except FileNotFoundError:
+            return []
+
+    def archived_ids(self):
+        ids = []
+        for name in self.archives():
+            with default_storage.open(f"audit-archive/{name}") as f:
+                ids += [json.loads(line)["id"] for line in gzip.decompress(f.read()).splitlines()]
+        return sorted(ids)
+
+    def retention(self, *args):
+        call_command("auditlog_retention", "--keep-months=1", *args, stdout=StringIO())
+
+
+class AuditRetentionTests(ArchiveTestCase):
+    def test_export_only_twice_writes_one_archive(self):
+        ids = [add_log(at(OLD_MONTH)) for _ in range(3)]
+
+        self.retention("--export-only")
+        self.retention("--export-only")
+
+        self.assertEqual(
+            self.archives(), [f"auditlog-2020-03.{ids[0]:010d}-{ids[-1]:010d}.jsonl.gz"]
+        )
+        self.assertEqual(self.archived_ids(), ids)
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+    def test_export_only_then_new_rows_go_to_next_part(self):
+        first = [add_log(at(OLD_MONTH)) for _ in range(2)]
+        self.retention("--export-only")
+        late = add_log(at(OLD_MONTH, day=20))
+        self.retention("--export-only")
+
+        self.assertEqual(len(self.archives()), 2)
+        self.assertEqual(self.archived_ids(), first + [late])
+
+    def test_full_run_deletes_archived_rows_and_rerun_is_noop(self):
+        old = [add_log(at(OLD_MONTH)) for _ in range(2)]
+        recent = add_log(timezone.now())
+
+        self.retention("--export-only")
+        self.retention()
+        self.assertEqual(list(AuditLog.objects.values_list("id", flat=True)), [recent])
+        self.assertEqual(self.archived_ids(), old)
+
+        self.retention()
+        self.assertEqual(len(self.archives()), 1)
+
+    def test_purge_keeps_rows_not_in_archive(self):
+        archived = add_log(at(OLD_MONTH))
+        audit_archive.export_month(OLD_MONTH)
+        pending = add_log(at(OLD_MONTH))
+
+        removed = audit_archive.purge_month(OLD_MONTH)
+
+        self.assertEqual(removed, 1)
+        self.assertFalse(AuditLog.objects.filter(pk=archived).exists())
+        self.assertTrue(AuditLog.objects.filter(pk=pending).exists())
+
+    def test_purge_keeps_row_inside_archived_range_but_missing_from_file(self):
+        first, late, last = (add_log(at(OLD_MONTH)) for _ in range(3))
+        # jak transakcja z niższym id zatwierdzona po eksporcie
+        AuditLog.objects.filter(pk=late).update(created_at=timezone.now())
+        audit_archive.export_month(OLD_MONTH)
+        AuditLog.objects.filter(pk=late).update(created_at=at(OLD_MONTH))
+
+        self.assertEqual(audit_archive.purge_month(OLD_MONTH), 2)
+        self.assertEqual(list(AuditLog.objects.values_list("id", flat=True)), [late])
+        self.assertEqual(self.archived_ids(), [first, last])
+
+    def test_recent_month_is_not_archived(self):
+        this_month = audit_archive.month_start(timezone.localdate())
+        add_log(timezone.now())
+
+        self.assertEqual(audit_archive.archive_months(0), [])
+        with self.assertRaises(ValueError):
+            audit_archive.archive_month(this_month)
+        self.assertEqual(self.archives(), [])
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "partycje AuditLog wymagają Postgresa")
+@override_settings(AUDIT_LOG_PARTITIONED=True)
+class AuditPartitionTests(ArchiveTestCase):
+    def convert(self, *args):
+        # wiersze dodane w transakcji testu mają odroczone sprawdzenia FK, a te blokują DROP dawnej tabeli
+        with connection.cursor() as cur:
+            cur.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        call_command("auditlog_partitions", "--convert", *args, stdout=StringIO())
+
+    def partitions(self):
+        with connection.cursor() as cur:
+            cur.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+                [audit_archive.TABLE],
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    def rows_in(self, partition):
+        with connection.cursor() as cur:
+            cur.execute(f"SELECT id FROM {connection.ops.quote_name(partition)} ORDER BY id")
+            return [row[0] for row in cur.fetchall()]
+
+    def index_names(self):
+        with connection.cursor() as cur:
+            cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [audit_archive.TABLE])
+            return {row[0] for row in cur.fetchall()}
+
+    def test_convert_moves_rows_into_monthly_partitions(self):
+        old = add_log(at(OLD_MONTH))
+        recent = add_log(timezone.now())
+        indexes_before = self.index_names()
+
+        self.convert("--ahead=2")
+
+        self.assertTrue(audit_archive.is_partitioned())
+        this_month = audit_archive.month_start(timezone.localdate())
+        partitions = self.partitions()
+        self.assertIn(audit_archive.DEFAULT_PARTITION, partitions)
+        self.assertIn(audit_archive.partition_name(OLD_MONTH), partitions)
+        self.assertIn(audit_archive.partition_name(audit_archive.next_month(this_month)), partitions)
+        self.assertEqual(self.rows_in(audit_archive.partition_name(OLD_MONTH)), [old])
+        self.assertEqual(self.rows_in(audit_archive.partition_name(this_month)), [recent])
+        self.assertEqual(indexes_before - self.index_names(), set())
+
+        # id z nowej sekwencji – dalej rosnące, bez kolizji z przeniesionymi wierszami
+        self.assertGreater(add_log(timezone.now()), recent)
+        self.assertEqual(audit_archive.convert_to_partitioned(), [])
+
+    def test_ensure_partitions_moves_rows_out_of_default(self):
+        self.convert("--ahead=0")
+        far = audit_archive.month_start(timezone.localdate())
+        for _ in range(2):
+            far = audit_archive.next_month(far)
+        stray = add_log(at(far))
+        self.assertEqual(self.rows_in(audit_archive.DEFAULT_PARTITION), [stray])
+
+        created = audit_archive.ensure_partitions(ahead=2)
+
+        self.assertIn(audit_archive.partition_name(far), created)
+        self.assertEqual(self.rows_in(audit_archive.DEFAULT_PARTITION), [])
+        self.assertEqual(self.rows_in(audit_archive.partition_name(far)), [stray])
+        self.assertEqual(audit_archive.ensure_partitions(ahead=2), [])
+
+    def test_retention_drops_fully_archived_partition(self):
+        ids = [add_log(at(OLD_MONTH)) for _ in range(2)]
+        self.convert()
+
+        self.retention("--export-only")
+        self.assertIn(audit_archive.partition_name(OLD_MONTH), self.partitions())
+        self.retention()
+
+        self.assertNotIn(audit_archive.partition_name(OLD_MONTH), self.partitions())
+        self.assertFalse(AuditLog.objects.filter(pk__in=ids).exists())
+        self.assertEqual(self.archived_ids(), ids)
+
+    def test_purge_keeps_partition_with_unarchived_rows(self):
+        archived = add_log(at(OLD_MONTH))
+        self.convert()
+        audit_archive.export_month(OLD_MONTH)
+        pending = add_log(at(OLD_MONTH))
+
+        audit_archive.purge_month(OLD_MONTH)
+
+        self.assertEqual(self.rows_in(audit_archive.partition_name(OLD_MONTH)), [pending])
+        self.assertFalse(AuditLog.objects.filter(pk=archived).exists())
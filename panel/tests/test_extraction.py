@@ -0,0 +1,69 @@
+# panel/tests/test_extraction.py
+"""
+Pula ekstrakcji (panel.extraction): limit czasu jednego pliku ubija tylko
+jego proces – ekstrakcje innych żądań kończą się normalnie.
+"""
+import errno
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from panel import extraction
+
+
+@override_settings(AI_EXTRACT_WORKERS=2)
+class ExtractManyTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.text_path = os.path.join(tmp, "ok.txt")
+        with open(self.text_path, "w", encoding="utf-8") as f:
+            f.write("zadanie 1")
+        # FIFO bez piszącego: open() w procesie puli wisi – jak patologiczny plik
+        self.hung_path = os.path.join(tmp, "hung.txt")
+        os.mkfifo(self.hung_path)
+
+    def open_writer(self, path, wait=5.0):
+        # O_NONBLOCK: bez czytelnika (proces ubity) open() rzuca ENXIO zamiast wisieć
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                return os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as exc:
+                if exc.errno != errno.ENXIO or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def test_timeout_kills_only_the_hung_file(self):
+        # drugi plik czyta z FIFO, do którego piszemy dopiero po timeoucie pierwszego –
+        # jego ekstrakcja trwa w chwili ubijania zawieszonego procesu
+        slow_path = os.path.join(os.path.dirname(self.hung_path), "slow.txt")
+        os.mkfifo(slow_path)
+        results = {}
+
+        def other_request():
+            results["other"] = extraction.extract_many([(slow_path, "txt"), (b"bajty", "txt")], timeout=30)
+
+        other = threading.Thread(target=other_request)
+        other.start()
+        with self.assertLogs("panel.extraction", "WARNING") as logs:
+            self.assertEqual(extraction.extract_many([(self.hung_path, "txt")], timeout=1.5), [None])
+        self.assertIn("przekroczony czas", logs.output[0])
+        fd = self.open_writer(slow_path)
+        os.write(fd, "po timeoucie".encode())
+        os.close(fd)
+        other.join(timeout=30)
+
+        self.assertEqual(results["other"], ["po timeoucie", "bajty"])
+        # pula działa dalej po ubiciu procesu
+        self.assertEqual(extraction.extract_many([(b"dalej", "txt")], timeout=10), ["dalej"])
+
+    def test_parser_error_is_failure_of_that_file_only(self):
+        missing = os.path.join(os.path.dirname(self.text_path), "brak.txt")
+        with self.assertLogs("panel.extraction", "WARNING"):
+            results = extraction.extract_many([(missing, "txt"), (self.text_path, "txt")], timeout=10)
+        self.assertEqual(results, [None, "zadanie 1"])
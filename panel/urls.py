@@ -37,12 +37,14 @@ urlpatterns = [
     path("nauczyciel/profil/", views.profil_v2, name="profil_v2"),
     path("nauczyciel-legacy/", views.panel_nauczyciela_legacy, name="panel_nauczyciela_legacy"),
     path("panel_admina/", views.panel_admina_view, name="panel_admina"),
+    path("panel_admina/audit/<str:obj_type>/<str:obj_id>/", views.audit_historia_view, name="audit_historia"),
     path("panel_ksiegowosc/", views.panel_ksiegowosci_view, name="panel_ksiegowosc"),
     path("panel_ksiegowosc/edytuj_cene/", views.edytuj_cene_view, name="edytuj_cene"),
 
     # Księgowość
     path("ksiegowosc/cennik/", views.cennik_view, name="cennik"),
     path("ksiegowosc/wyplaty/", views.wyplaty_nauczycieli_view, name="wypłaty_nauczycieli"),
+    path("ksiegowosc/wyplaty/export.csv", views.wyplaty_nauczycieli_export_csv, name="wyplaty_nauczycieli_export_csv"),
     path("ksiegowosc/podwyzki/", podwyzki_nauczyciele_view, name="podwyzki_nauczyciele"),
     path("ksiegowosc/rachunki/", views.accounting_invoices_view, name="accounting_invoices"),
     path("ksiegowosc/rachunki/export.csv", views.accounting_invoices_export_csv, name="accounting_invoices_export_csv"),
@@ -59,6 +61,10 @@ urlpatterns = [
     path("moje_rezerwacje_ucznia/", views.moje_rezerwacje_ucznia_view, name="moje_rezerwacje_ucznia"),
     path("uczen/dostepne_terminy/", views.dostepne_terminy_view, name="dostepne_terminy"),
 
+    # Plan zajęć w aplikacji kalendarza (iCalendar, adres z tokenem)
+    path("kalendarz/<str:token>.ics", views.calendar_feed_view, name="calendar_feed"),
+    path("kalendarz/nowy-adres/", views.calendar_feed_rotate_view, name="calendar_feed_rotate"),
+
     # Wirtualny pokój i zajęcia on-line
     path("wirtualny_pokoj/", virtual_room, name="virtual_room"),
     path("zajecia_online/<int:rezerwacja_id>/", zajecia_online_view, name="zajecia_online"),
@@ -73,6 +79,10 @@ urlpatterns = [
     path("pobierz-plik/<int:id>/", views.pobierz_plik, name="pobierz_plik"),
     path("pobierz-material/<int:id>/", views.pobierz_material, name="pobierz_material"),
 
+    # Upload bezpośrednio do storage (S3 POST policy / lokalny zastępnik)
+    path("upload/presign/", views.direct_upload_presign, name="direct_upload_presign"),
+    path("upload/local/", views.direct_upload_local, name="direct_upload_local"),
+
     # Zmiana hasła (uwaga: zostaw TYLKO jedną trasę do zmiany hasła)
     path("zmien_haslo/", views.change_password_view, name="zmien_haslo"),
     # Jeśli korzystasz z innej funkcji, zamień na:
@@ -115,6 +125,7 @@ urlpatterns = [
     path("pokoj_testowy/", views.pokoj_testowy_view, name="pokoj_testowy"),
     path("strefa_ai_home/", views.strefa_ai_home_view, name="strefa_ai_home"),
     path("ai_chat/", views.ai_chat, name="ai_chat"),
+    path("ai_chat/stream/", views.ai_chat_stream, name="ai_chat_stream"),
 
     #Tablica
     path("aliboard-test/", views.aliboard_view, name="aliboard"),
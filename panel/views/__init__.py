@@ -0,0 +1,90 @@
+# panel/views/__init__.py
+"""
+Widoki panelu podzielone na moduły funkcjonalne. Ten moduł re-eksportuje
+widoki używane w panel/urls.py (views.<nazwa>).
+
+Ciężkie zależności (OpenAI, parsery PDF/DOCX, renderery PDF) są ładowane
+przy pierwszym użyciu, nie przy imporcie – start workera i komendy
+zarządzania ich nie płacą (kontrola: manage.py bench_imports).
+"""
+from .home import public_test, test_publiczny, strona_glowna_view
+from .accounts import (
+    logout_view,
+    login_view,
+    register_view,
+    after_login_redirect,
+    moje_konto_view,
+    zmien_haslo_view,
+    panel_admina_view,
+    moje_konto_uczen_view,
+    MyAccountView,
+    change_password_view,
+)
+from .webrtc import (
+    webrtc_offer,
+    webrtc_answer,
+    webrtc_hangup,
+    webrtc_debug,
+    ping_online_status,
+    check_online_status,
+    zajecia_online_view,
+    otworz_tablice_view,
+    sync_note_changes,
+    virtual_room,
+)
+from .files import (
+    pobierz_plik,
+    pobierz_material,
+    direct_upload_presign,
+    direct_upload_local,
+    dodaj_material_po_zajeciach,
+)
+from .accounting import (
+    podwyzki_nauczyciele_view,
+    cennik_view,
+    wyplaty_nauczycieli_view,
+    wyplaty_nauczycieli_export_csv,
+    edytuj_dane_platnosci_view,
+    edytuj_cene_view,
+    audit_historia_view,
+    panel_ksiegowosci_view,
+    student_invoices_view,
+    accounting_invoices_view,
+    accounting_invoices_export_csv,
+    invoice_pdf_download_view,
+    test_pdf,
+)
+from .payments import (
+    autopay_webhook_view,
+    platnosci_lista_view,
+    platnosci_view,
+    ksiegowosc_platnosci_lista,
+    ksiegowosc_oznacz_oplacona,
+    ksiegowosc_oznacz_odrzucona,
+    confirmation_download,
+)
+from .booking import (
+    panel_nauczyciela_v2,
+    harmonogram_v2,
+    dostepnosc_v2,
+    profil_v2,
+    panel_nauczyciela_legacy,
+    panel_nauczyciela_view,
+    moj_plan_zajec_legacy,
+    moje_rezerwacje_ucznia_view,
+    zarezerwuj_zajecia,
+    dostepne_terminy_view,
+    dodaj_wolny_termin,
+    dodaj_wiele_wolnych_terminow,
+    archiwum_rezerwacji_view,
+    panel_ucznia_view,
+    zapisz_terminy_view,
+    stawki_nauczyciela_view,
+    moj_plan_zajec_view,
+    wybierz_godziny_view,
+    pobierz_terminy_view,
+)
+from .calendar import calendar_feed_view, calendar_feed_rotate_view
+from .legal import legal_edit_config_view, regulamin_view, polityka_view
+from .ai import pokoj_testowy_view, strefa_ai_home_view, ai_chat, ai_chat_stream
+from .aliboard import aliboard_view, aliboard_prod_view, aliboard_new_room, aliboard_prod_new_room
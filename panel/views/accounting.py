@@ -0,0 +1,403 @@
+# panel/views/accounting.py
+"""
+Księgowość: dane płatności, stawki, cennik, wypłaty, rachunki, historia audytu.
+"""
+import calendar
+import logging
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.apps import apps
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    FileResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from .. import audit
+from ..invoices import invoice_totals, month_summaries
+from ..models import UstawieniaPlatnosci, Invoice
+from ..payouts import group_by_teacher, is_closed_period, teacher_payout_rows
+from ..pdf_renderer import get_renderer
+from ..rates import apply_rate_edits, build_rate_matrix, parse_rate_edits
+from ..roles import is_accounting
+from ..singletons import payment_settings
+from ..streaming import iter_csv, iter_gzip, streaming_content
+
+from .webrtc import _no_store
+
+log = logging.getLogger(__name__)
+
+
+# ==========================
+#        KSIÄGOWOĹšÄ†
+# ==========================
+@login_required
+def podwyzki_nauczyciele_view(request):
+    if not is_accounting(request.user):
+        raise PermissionDenied
+
+    if request.method == "POST":
+        # wiele komórek w jednym POST – bulk_update/bulk_create w jednej transakcji
+        try:
+            zaktualizowane, nowe = apply_rate_edits(parse_rate_edits(request.POST))
+        except ValidationError as e:
+            messages.error(request, " ".join(e.messages))
+        else:
+            if zaktualizowane or nowe:
+                messages.success(request, f"Zapisano stawki: {zaktualizowane} zmienionych, {nowe} nowych.")
+        return redirect("podwyzki_nauczyciele")
+
+    # macierz stawek: 4 zapytania (panel.rates), złączenie w pamięci
+    return render(request, "ksiegowosc/podwyzki_nauczyciele.html", {"nauczyciele_dane": build_rate_matrix()})
+
+
+@login_required
+def cennik_view(request):
+    if not is_accounting(request.user):
+        raise PermissionDenied
+
+    PrzedmiotCennik = apps.get_model("panel", "PrzedmiotCennik")
+
+    if request.method == "POST":
+        with transaction.atomic():
+            # 1) Zmiana ceny nauczyciela
+            if "zapisz_id" in request.POST:
+                try:
+                    przedmiot_id = int(request.POST.get("zapisz_id"))
+                    cena_raw = (request.POST.get("cena") or "").strip()
+                    if not cena_raw:
+                        raise InvalidOperation("Pusta cena")
+                    cena = Decimal(cena_raw).quantize(Decimal("0.01"))
+                    przedmiot = PrzedmiotCennik.objects.select_for_update().get(pk=przedmiot_id)
+                    przedmiot.cena = cena
+                    przedmiot.save(update_fields=["cena"])
+                except (PrzedmiotCennik.DoesNotExist, InvalidOperation, ValueError) as e:
+                    log.exception("BĹ‚Ä…d zapisu cennika (nauczyciel): %s", e)
+
+            # 2) Zmiana ceny dla ucznia
+            elif "zapisz_uczen_id" in request.POST:
+                try:
+                    przedmiot_id = int(request.POST.get("zapisz_uczen_id"))
+                    cena_uczen_raw = (request.POST.get("cena_uczen") or "").strip()
+                    if not cena_uczen_raw:
+                        raise InvalidOperation("Pusta cena_uczen")
+                    cena_uczen = Decimal(cena_uczen_raw).quantize(Decimal("0.01"))
+                    przedmiot = PrzedmiotCennik.objects.select_for_update().get(pk=przedmiot_id)
+                    przedmiot.cena_uczen = cena_uczen
+                    przedmiot.save(update_fields=["cena_uczen"])
+                except (PrzedmiotCennik.DoesNotExist, InvalidOperation, ValueError) as e:
+                    log.exception("BĹ‚Ä…d zapisu cennika (uczeĹ„): %s", e)
+
+            # 3) UsuniÄ™cie pozycji
+            elif "usun_id" in request.POST:
+                try:
+                    przedmiot_id = int(request.POST.get("usun_id"))
+                    PrzedmiotCennik.objects.select_for_update().get(pk=przedmiot_id).delete()
+                except (PrzedmiotCennik.DoesNotExist, ValueError) as e:
+                    log.exception("BĹ‚Ä…d usuwania pozycji cennika: %s", e)
+
+            # 4) Dodanie nowej pozycji
+            elif "dodaj_przedmiot" in request.POST:
+                try:
+                    nazwa  = (request.POST.get("nazwa") or "").strip()
+                    poziom = (request.POST.get("poziom") or "").strip()
+                    nowa_cena_raw        = (request.POST.get("nowa_cena") or "").strip()
+                    nowa_cena_uczen_raw  = (request.POST.get("nowa_cena_uczen") or "").strip()
+
+                    if not nazwa or not poziom:
+                        raise ValueError("Puste nazwa/poziom")
+                    if not nowa_cena_raw or not nowa_cena_uczen_raw:
+                        raise InvalidOperation("Puste ceny")
+
+                    cena       = Decimal(nowa_cena_raw).quantize(Decimal("0.01"))
+                    cena_uczen = Decimal(nowa_cena_uczen_raw).quantize(Decimal("0.01"))
+
+                    PrzedmiotCennik.objects.create(
+                        nazwa=nazwa, poziom=poziom, cena=cena, cena_uczen=cena_uczen
+                    )
+                except (InvalidOperation, ValueError) as e:
+                    log.exception("BĹ‚Ä…d dodawania pozycji cennika: %s", e)
+
+    przedmioty = PrzedmiotCennik.objects.all().order_by("nazwa", "poziom")
+    return render(request, "ksiegowosc/cennik.html", {"przedmioty": przedmioty})
+
+
+def _payout_period(request):
+    """?month=YYYY-MM albo ?from=YYYY-MM&to=YYYY-MM (domyślnie bieżący miesiąc)."""
+    ym = request.GET.get("month")
+    if not ym and not request.GET.get("from"):
+        ym = timezone.localdate().strftime("%Y-%m")
+    ym_from = request.GET.get("from") or ym
+    ym_to = request.GET.get("to") or ym_from
+    first, _ = _month_bounds(ym_from)
+    _, last = _month_bounds(ym_to)
+    if first > last:
+        raise ValueError("from > to")
+    return ym_from, ym_to, first, last
+
+
+@login_required
+def wyplaty_nauczycieli_view(request):
+    if not is_accounting(request.user):
+        raise PermissionDenied
+
+    try:
+        ym_from, ym_to, first, last = _payout_period(request)
+    except ValueError:
+        return HttpResponseBadRequest("Niepoprawny okres (YYYY-MM)")
+
+    rows = teacher_payout_rows(first, last, refresh=request.GET.get("odswiez") == "1")
+    nauczyciele = group_by_teacher(rows)
+    return render(request, "ksiegowosc/wyplaty_nauczycieli.html", {
+        "nauczyciele": nauczyciele,
+        "od": ym_from,
+        "do": ym_to,
+        "suma": sum((n["do_wyplaty"] for n in nauczyciele), Decimal("0.00")),
+        "zamkniety": is_closed_period(last),
+    })
+
+
+@login_required
+def wyplaty_nauczycieli_export_csv(request):
+    if not is_accounting(request.user):
+        raise PermissionDenied
+
+    try:
+        ym_from, ym_to, first, last = _payout_period(request)
+    except ValueError:
+        return HttpResponseBadRequest("Niepoprawny okres (YYYY-MM)")
+
+    def _rows():
+        for r in teacher_payout_rows(first, last):
+            yield [
+                f"{r['imie']} {r['nazwisko']}".strip() or r["username"],
+                r["przedmiot"], r["poziom"], r["liczba_zajec"],
+                f"{r['stawka']:.2f}".replace(".", ","),
+                f"{r['do_wyplaty']:.2f}".replace(".", ","),
+            ]
+
+    chunks = iter_csv(_rows(), header=["Nauczyciel", "Przedmiot", "Poziom", "Liczba zajęć",
+                                       "Stawka (PLN)", "Do wypłaty (PLN)"])
+    name = f"wyplaty_{ym_from}" if ym_from == ym_to else f"wyplaty_{ym_from}_{ym_to}"
+    resp = StreamingHttpResponse(streaming_content(request, chunks), content_type="text/csv; charset=utf-8")
+    resp["Content-Disposition"] = f'attachment; filename="{name}.csv"'
+    return resp
+
+
+# EDYTUJ CENÄ
+@login_required
+@user_passes_test(is_accounting)
+def edytuj_dane_platnosci_view(request):
+    """
+    Formularz EDYCJI DANYCH PĹATNOĹšCI (bez edycji ceny):
+    - numer_telefonu (BLIK)
+    - numer_konta (IBAN/NRB)
+    - wlasciciel_konta (wyĹ›wietlany uczniowi)
+    """
+    # Pobierz lub zaĹ‚ĂłĹĽ rekord ustawieĹ„ (trzymamy go pod staĹ‚ym id=1)
+    ustawienia, _ = UstawieniaPlatnosci.objects.get_or_create(id=1)
+
+    if request.method == "POST":
+        telefon = (request.POST.get("telefon") or "").strip()
+        # normalizacja konta: bez spacji i myĹ›lnikĂłw, wielkie litery
+        konto = (request.POST.get("konto") or "").replace(" ", "").replace("-", "").upper().strip()
+        wlasciciel = (request.POST.get("wlasciciel") or "").strip()
+
+        ustawienia.numer_telefonu = telefon
+        ustawienia.numer_konta = konto
+        ustawienia.wlasciciel_konta = wlasciciel
+        # kompatybilnoĹ›Ä‡ wstecz, jeĹ›li gdzieĹ› uĹĽywane:
+        ustawienia.dane_odbiorcy = wlasciciel
+
+        # WAĹ»NE: nie dotykamy pola cena_za_godzine
+        ustawienia.save()
+        messages.success(request, "Dane pĹ‚atnoĹ›ci zostaĹ‚y zapisane.")
+        return redirect("panel_ksiegowosc")
+
+    # UĹĽywamy ISTNIEJÄ„CEGO pliku szablonu:
+    return render(request, "ksiegowosc/edytuj_cene.html", {"ustawienia": ustawienia})
+
+
+# Alias do kompatybilnoĹ›ci ze starym URL-em / nazwÄ….
+@login_required
+@user_passes_test(is_accounting)
+def edytuj_cene_view(request):
+    return edytuj_dane_platnosci_view(request)
+
+
+@staff_member_required
+@require_GET
+def audit_historia_view(request, obj_type, obj_id):
+    """Historia zmian obiektu z AuditLog (JSON, po kursorze ?po=)."""
+    page = audit.object_history(obj_type, obj_id, cursor=request.GET.get("po"))
+    return _no_store(JsonResponse({
+        "wpisy": [
+            {
+                "id": e.pk,
+                "created_at": e.created_at.isoformat(),
+                "action": e.action,
+                "actor": e.actor,
+                "user": e.user.username if e.user else None,
+                "details": e.details,
+                "ip": e.created_by_ip,
+            }
+            for e in page
+        ],
+        "po": page.next_cursor,
+    }))
+
+
+@login_required
+@user_passes_test(is_accounting)
+def panel_ksiegowosci_view(request):
+    ustawienia = payment_settings.get()
+    return render(request, "ksiegowosc/panel_ksiegowosc.html", {"ustawienia": ustawienia})
+
+
+# --- Listy + CSV + PDF ---
+@login_required
+def student_invoices_view(request):
+    qs = (Invoice.objects
+          .filter(student=request.user)
+          .select_related("payment", "reservation")
+          .order_by("-issue_date", "-id"))
+    return render(request, "ksiegowosc/moje_rachunki_uczen.html", {"invoices": qs})
+
+
+@user_passes_test(is_accounting)
+def accounting_invoices_view(request):
+    today = timezone.localdate()
+    ym = request.GET.get("month")
+    if ym:
+        y, m = map(int, ym.split("-"))
+    else:
+        y, m = today.year, today.month
+    first, last = _month_bounds(f"{y}-{m}")
+    month_qs = Invoice.objects.filter(issue_date__range=[first, last])
+    totals = invoice_totals(month_qs)
+
+    qs = (month_qs
+          .select_related("student", "payment")
+          .order_by("-issue_date", "-id"))
+    paginator = Paginator(qs, 50)
+    paginator.count = totals["invoice_count"]  # bez osobnego COUNT(*)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    # dashboard: 12 miesięcy do wybranego, z tabeli InvoiceMonthSummary
+    y0, m0 = (y - 1, m + 1) if m < 12 else (y, 1)
+    ctx = {
+        "invoices": page_obj.object_list,
+        "page_obj": page_obj,
+        "month_value": f"{y}-{str(m).zfill(2)}",
+        "sum_count": totals["invoice_count"],
+        "sum_total_pln": f"{totals['total_grosz']/100:.2f}".replace(".", ",") + " zĹ‚",
+        "sum_paid": totals["paid_count"],
+        "monthly": month_summaries(date(y0, m0, 1), first),
+    }
+    return render(request, "ksiegowosc/ksiegowosc_rachunki.html", ctx)
+
+
+def _month_bounds(ym):
+    y, m = map(int, ym.split("-"))
+    return date(y, m, 1), date(y, m, calendar.monthrange(y, m)[1])
+
+
+def _invoice_csv_rows(qs):
+    # projekcja zamiast pełnych instancji – bez modeli i get_full_name() per wiersz
+    rows = qs.values_list(
+        "number", "issue_date", "student__first_name", "student__last_name", "student__username",
+        "student__email", "description", "hours", "rate_grosz", "total_grosz",
+        "payment__status", "payment__provider_payment_id", "reservation_id",
+    ).iterator(chunk_size=2000)
+    for (number, issue_date, first_name, last_name, username, email, description,
+         hours, rate_grosz, total_grosz, pay_status, pay_id, rez_id) in rows:
+        yield [
+            number,
+            issue_date.isoformat(),
+            f"{first_name} {last_name}".strip() or username,
+            email or "",
+            description,
+            f"{float(hours):.2f}".replace(".", ","),
+            f"{rate_grosz/100:.2f}".replace(".", ","),
+            f"{total_grosz/100:.2f}".replace(".", ","),
+            pay_status or "",
+            pay_id or "",
+            rez_id or "",
+        ]
+
+
+@user_passes_test(is_accounting)
+def accounting_invoices_export_csv(request):
+    """
+    CSV strumieniowo: ?month=YYYY-MM albo zakres ?from=YYYY-MM&to=YYYY-MM,
+    opcjonalnie &gzip=1 (plik .csv.gz). Pamięć stała niezależnie od okresu.
+    """
+    ym = request.GET.get("month")
+    ym_from = request.GET.get("from") or ym
+    ym_to = request.GET.get("to") or ym
+    if not (ym_from and ym_to):
+        return HttpResponse("Parametr month=YYYY-MM (albo from/to) jest wymagany", status=400)
+    try:
+        first, _ = _month_bounds(ym_from)
+        _, last = _month_bounds(ym_to)
+    except ValueError:
+        return HttpResponseBadRequest("Niepoprawny format miesiąca (YYYY-MM)")
+    if first > last:
+        return HttpResponseBadRequest("Zakres: from jest po to")
+
+    qs = Invoice.objects.filter(issue_date__range=[first, last]).order_by("issue_date", "id")
+    chunks = iter_csv(_invoice_csv_rows(qs), header=["Nr","Data","UczeĹ„","Email","Opis","Godziny","Stawka (PLN)","Kwota (PLN)","Status","ID pĹ‚atnoĹ›ci","ID rezerwacji"])
+
+    name = f"rachunki_{ym_from}" if ym_from == ym_to else f"rachunki_{ym_from}_{ym_to}"
+    if request.GET.get("gzip") in ("1", "true", "on"):
+        chunks = iter_gzip(chunks)
+        resp = StreamingHttpResponse(streaming_content(request, chunks), content_type="application/gzip")
+        resp["Content-Disposition"] = f'attachment; filename="{name}.csv.gz"'
+    else:
+        resp = StreamingHttpResponse(streaming_content(request, chunks), content_type="text/csv; charset=utf-8")
+        resp["Content-Disposition"] = f'attachment; filename="{name}.csv"'
+    return resp
+
+
+@login_required
+def invoice_pdf_download_view(request, invoice_id: int):
+    inv = get_object_or_404(Invoice, id=invoice_id)
+    if inv.student != request.user and not is_accounting(request.user):
+        raise Http404()
+    if not inv.pdf:
+        # PDF jeszcze w kolejce (InvoiceJob) – strona odświeża się sama
+        job = getattr(inv.payment, "invoice_job", None) if inv.payment_id else None
+        resp = render(request, "ksiegowosc/rachunek_generowanie.html", {
+            "invoice": inv,
+            "job": job,
+            "failed": bool(job and job.status == job.STATUS_FAILED),
+        }, status=202)
+        resp["Retry-After"] = "5"
+        resp["Cache-Control"] = "no-store"
+        return resp
+    return FileResponse(inv.pdf.open("rb"), filename=f"{inv.number}.pdf", as_attachment=True)
+
+
+def test_pdf(request):
+    html = "<h1>PDF dziaĹ‚a âś…</h1><p>To jest test pdfkit+wkhtmltopdf.</p>"
+    try:
+        pdf = get_renderer().render(html)
+        resp = HttpResponse(pdf, content_type="application/pdf")
+        resp["Content-Disposition"] = 'inline; filename="test.pdf"'
+        return resp
+    except Exception:
+        # fallback na placeholder, ĹĽeby endpoint zawsze odpowiadaĹ‚
+        return HttpResponse(b"%PDF-1.4\n% placeholder\n", content_type="application/pdf")
@@ -0,0 +1,356 @@
+# panel/views/accounts.py
+"""
+Konta: logowanie, rejestracja, moje konto, zmiana hasła, panel administratora.
+"""
+from django.apps import apps
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.auth.forms import PasswordChangeForm
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.models import User, Group
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.shortcuts import redirect, render
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_protect
+
+from .. import audit
+from ..forms import StudentAccountForm, StudentPasswordChangeForm, UserBasicForm, ProfilForm
+from ..models import Profil
+from ..roles import is_accounting, is_legacy_teacher, is_student, is_teacher
+
+
+# --- Access helpers --- (role: panel/roles.py)
+def add_to_teachers_group(user):
+    g, _ = Group.objects.get_or_create(name="Nauczyciele")
+    user.groups.add(g)
+
+
+def redirect_after_login(user):
+    if is_accounting(user):
+        return redirect("panel_ksiegowosc")
+    if is_teacher(user):
+        return redirect("panel_nauczyciela_v2")
+    if is_legacy_teacher(user):
+        return redirect("panel_nauczyciela")
+    return redirect("panel_ucznia")
+
+
+# ==========================
+#           AUTH
+# ==========================
+def logout_view(request):
+    logout(request)
+    return redirect("login")
+
+
+def login_view(request):
+    if request.method == "POST":
+        email = (request.POST.get("email") or "").strip()
+        password = request.POST.get("password") or ""
+        remember = request.POST.get("remember")
+
+        # Szukaj po e-mailu case-insensitive (uniknij DoesNotExist/MultipleObjects)
+        user = User.objects.filter(email__iexact=email).first()
+        if not user:
+            return render(request, "login.html", {"error": "Niepoprawny e-mail lub hasĹ‚o."})
+
+        if not user.is_active:
+            return render(request, "login.html", {"error": "Konto jest nieaktywne. Skontaktuj siÄ™ z administratorem."})
+
+        user_auth = authenticate(request, username=user.username, password=password)
+        if user_auth is None:
+            return render(request, "login.html", {"error": "Niepoprawny e-mail lub hasĹ‚o."})
+
+        # Logowanie OK
+        login(request, user_auth)
+
+        # â€žZapamiÄ™taj mnieâ€ť: jeĹ›li zaznaczone, sesja wg SESSION_COOKIE_AGE; jeĹ›li nie, do zamkniÄ™cia przeglÄ…darki
+        if remember:
+            request.session.set_expiry(None)   # domyĹ›lnie np. 1209600 s (14 dni) â€” ustaw w settings.SESSION_COOKIE_AGE
+        else:
+            request.session.set_expiry(0)
+
+        # Priorytet dla ?next=..., inaczej Twoje role jak dotÄ…d
+        next_url = request.GET.get("next")
+        if next_url:
+            return redirect(next_url)
+
+        return redirect_after_login(user_auth)
+
+    # GET
+    return render(request, "login.html")
+
+
+def register_view(request):
+    if request.method == "GET":
+        return render(request, "register.html")
+
+    # --- dane z formularza ---
+    first_name = (request.POST.get("first_name") or "").strip()
+    last_name  = (request.POST.get("last_name") or "").strip()
+    city       = (request.POST.get("city") or "").strip()
+    email      = (request.POST.get("email") or "").strip().lower()
+    phone      = (request.POST.get("phone") or "").strip()
+    password   = (request.POST.get("password") or "")
+    accepted   = (request.POST.get("accept_legal") == "on")
+
+    # --- walidacje ---
+    if not accepted:
+        return render(request, "register.html", {
+            "error": "Musisz zaakceptowaÄ‡ Regulamin i PolitykÄ™ PrywatnoĹ›ci.",
+            "form": request.POST,
+        })
+
+    try:
+        validate_email(email)
+    except ValidationError:
+        return render(request, "register.html", {"error": "Podaj poprawny adres e-mail.", "form": request.POST})
+
+    if len(password) < 8:
+        return render(request, "register.html", {"error": "HasĹ‚o musi mieÄ‡ co najmniej 8 znakĂłw.", "form": request.POST})
+
+    if User.objects.filter(email__iexact=email).exists():
+        return render(request, "register.html", {"error": "Ten e-mail jest juĹĽ zarejestrowany.", "form": request.POST})
+
+    # --- utworzenie usera + profilu atomowo, bez duplikatu ---
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=email,  # jeĹ›li uĹĽywasz emaila jako username
+                email=email,
+                password=password,
+                first_name=first_name,
+                last_name=last_name,
+            )
+
+            # PROFIL: uĹĽywamy get_or_create (gasi UniqueViolation, gdy dziaĹ‚a sygnaĹ‚ post_save)
+            profil, created = Profil.objects.get_or_create(
+                user=user,
+                defaults={
+                    "is_teacher": False,
+                    "numer_telefonu": phone,
+                    "city": city,  # << Twoje pole w modelu
+                },
+            )
+            if not created:
+                # jeĹĽeli profil powstaĹ‚ z sygnaĹ‚u â€“ aktualizujemy brakujÄ…ce pola
+                changed = False
+                if profil.numer_telefonu != phone:
+                    profil.numer_telefonu = phone; changed = True
+                if getattr(profil, "city", "") != city:
+                    profil.city = city; changed = True
+                if changed:
+                    profil.save()
+
+    except IntegrityError:
+        return render(request, "register.html", {
+            "error": "WystÄ…piĹ‚ bĹ‚Ä…d rejestracji. SprĂłbuj ponownie.",
+            "form": request.POST,
+        })
+
+    messages.success(request, "Konto zostaĹ‚o utworzone. Zaloguj siÄ™, aby kontynuowaÄ‡.")
+    return redirect("login")
+
+
+@login_required
+def after_login_redirect(request):
+    return redirect_after_login(request.user)
+
+
+@login_required
+def moje_konto_view(request):
+    # Modele dynamicznie (bez ryzyka NameError po sprzÄ…taniu importĂłw)
+    Profil = apps.get_model("panel", "Profil")
+    PrzedmiotCennik = apps.get_model("panel", "PrzedmiotCennik")
+
+    user = request.user
+
+    # WeĹş albo utwĂłrz profil uĹĽytkownika
+    profil = getattr(user, "profil", None)
+    if profil is None and Profil is not None:
+        profil, _ = Profil.objects.get_or_create(user=user)
+
+    if request.method == "POST":
+        # proste pola tekstowe (zostawiaj stare wartoĹ›ci, jeĹ›li brak w POST)
+        first_name = request.POST.get("first_name")
+        last_name = request.POST.get("last_name")
+        numer_telefonu = request.POST.get("numer_telefonu")
+        opis = request.POST.get("opis")
+
+        if first_name is not None:
+            user.first_name = first_name
+        if last_name is not None:
+            user.last_name = last_name
+
+        if profil is not None:
+            if numer_telefonu is not None:
+                profil.numer_telefonu = numer_telefonu
+
+            # pola wielokrotnego wyboru
+            tytul_naukowy = request.POST.getlist("tytul_naukowy")
+            poziom_nauczania = request.POST.getlist("poziom_nauczania")
+            przedmioty = request.POST.getlist("przedmioty")
+
+            if tytul_naukowy:
+                profil.tytul_naukowy = ",".join(tytul_naukowy)
+            if poziom_nauczania:
+                profil.poziom_nauczania = ",".join(poziom_nauczania)
+            if przedmioty:
+                profil.przedmioty = ",".join(przedmioty)
+            if opis is not None:
+                profil.opis = opis
+
+        user.save()
+        if profil is not None:
+            profil.save()
+
+        return redirect_after_login(request.user)
+
+    # GET: lista cennikĂłw (jeĹ›li model istnieje)
+    cennik = []
+    if PrzedmiotCennik is not None:
+        cennik = PrzedmiotCennik.objects.all().order_by("nazwa", "poziom")
+
+    return render(
+        request,
+        "moje_konto.html",
+        {"profil": profil, "user": user, "cennik": cennik},
+    )
+
+
+@login_required
+def zmien_haslo_view(request):
+    if request.method == "POST":
+        form = PasswordChangeForm(request.user, request.POST)
+        if form.is_valid():
+            user = form.save()
+            update_session_auth_hash(request, user)
+            return redirect("moje_rezerwacje_ucznia")
+    else:
+        form = PasswordChangeForm(request.user)
+    return render(request, "zmien_haslo.html", {"form": form})
+
+
+@staff_member_required
+def panel_admina_view(request):
+    if request.method == "POST":
+        first_name = request.POST.get("first_name")
+        last_name = request.POST.get("last_name")
+        email = request.POST.get("email")
+        password = request.POST.get("password")
+        numer_telefonu = request.POST.get("numer_telefonu")
+
+        if User.objects.filter(username=email).exists():
+            return render(request, "admin_panel.html", {"error": "UĹĽytkownik juĹĽ istnieje!"})
+
+        user = User.objects.create_user(
+            username=email, email=email, password=password, first_name=first_name, last_name=last_name
+        )
+        Profil.objects.create(user=user, is_teacher=True, numer_telefonu=numer_telefonu)
+        add_to_teachers_group(user)
+
+    nauczyciele = Profil.objects.filter(is_teacher=True)
+    return render(request, "admin_panel.html", {"nauczyciele": nauczyciele})
+
+
+@login_required
+@user_passes_test(is_student)
+def moje_konto_uczen_view(request):
+    profil, _ = Profil.objects.get_or_create(user=request.user)
+
+    if request.method == "POST":
+        if "account_submit" in request.POST:
+            account_form = StudentAccountForm(request.POST, user=request.user, instance=request.user)
+            profile_form = ProfilForm(request.POST, request.FILES, instance=profil)
+            password_form = StudentPasswordChangeForm(user=request.user)
+
+            if account_form.is_valid() and profile_form.is_valid():
+                with transaction.atomic():
+                    account_form.save()
+                    profile_form.save()
+
+                audit.record(
+                    "manual_update_profile",
+                    obj_type="profil",
+                    obj_id=profil.pk,
+                    details={"note": "profile updated via MyAccountView"},
+                    actor=str(request.user.username),
+                    ip=request.META.get("REMOTE_ADDR"),
+                )
+
+                messages.success(request, "Zapisano zmiany w profilu.")
+                return redirect("moje_konto_uczen")
+            messages.error(request, "SprawdĹş poprawnoĹ›Ä‡ pĂłl formularza.")
+
+        elif "password_submit" in request.POST:
+            account_form = StudentAccountForm(user=request.user, instance=request.user)
+            profile_form = ProfilForm(instance=profil)
+            password_form = StudentPasswordChangeForm(user=request.user, data=request.POST)
+
+            if password_form.is_valid():
+                user = password_form.save()
+                update_session_auth_hash(request, user)
+                messages.success(request, "HasĹ‚o zostaĹ‚o zmienione.")
+                return redirect("moje_konto_uczen")
+            messages.error(request, "Nie udaĹ‚o siÄ™ zmieniÄ‡ hasĹ‚a. SprawdĹş wprowadzone dane.")
+        else:
+            account_form = StudentAccountForm(user=request.user, instance=request.user)
+            profile_form = ProfilForm(instance=profil)
+            password_form = StudentPasswordChangeForm(user=request.user)
+    else:
+        account_form = StudentAccountForm(user=request.user, instance=request.user)
+        profile_form = ProfilForm(instance=profil)
+        password_form = StudentPasswordChangeForm(user=request.user)
+
+    return render(
+        request,
+        "uczen/moje_konto.html",
+        {"account_form": account_form, "profile_form": profile_form, "password_form": password_form},
+    )
+
+
+@method_decorator(csrf_protect, name='dispatch')
+class MyAccountView(LoginRequiredMixin, View):
+    def get(self, request):
+        user_form = UserBasicForm(instance=request.user)
+        profil = getattr(request.user, "profil", None)
+        profile_form = ProfilForm(instance=profil)
+        return render(request, "uczen/moje_konto.html", {"user_form": user_form, "profile_form": profile_form})
+
+    def post(self, request):
+        user_form = UserBasicForm(request.POST, instance=request.user)
+        profil = getattr(request.user, "profil", None)
+        profile_form = ProfilForm(request.POST, request.FILES, instance=profil)
+        if user_form.is_valid() and profile_form.is_valid():
+            user_form.save()
+            profile = profile_form.save()
+            # log to audit (Aron) with IP and actor
+            ip = request.META.get("REMOTE_ADDR")
+            audit.record("manual_update_profile", obj_type="profil", obj_id=profile.pk,
+                         details={"note": "profile updated via MyAccountView"},
+                         actor=str(request.user.username), ip=ip)
+            messages.success(request, "Zapisano zmiany w profilu.")
+            return redirect("moje_konto_uczen")
+        else:
+            messages.error(request, "Popraw zaznaczone bĹ‚Ä™dy.")
+        return render(request, "uczen/moje_konto.html", {"user_form": user_form, "profile_form": profile_form})
+
+
+@login_required
+def change_password_view(request):
+    if request.method == "POST":
+        form = PasswordChangeForm(user=request.user, data=request.POST)
+        if form.is_valid():
+            form.save()
+            update_session_auth_hash(request, form.user)
+            messages.success(request, "HasĹ‚o zostaĹ‚o pomyĹ›lnie zmienione.")
+            return redirect_after_login(request.user)
+    else:
+        form = PasswordChangeForm(user=request.user)
+
+    return render(request, "teacher_change_password.html", {"form": form})
@@ -0,0 +1,324 @@
+# panel/views/ai.py
+"""
+Strefa AI: czat z personami (OpenAI), załączniki, odpowiedzi strumieniowe (SSE).
+
+SDK OpenAI importujemy i klientów tworzymy przy pierwszym użyciu
+(`_ai_client`, `_async_ai_client`), a parsery załączników żyją w procesach
+puli panel.extraction – sam import modułu jest lekki.
+"""
+import asyncio
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+from functools import lru_cache
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.views.decorators.csrf import csrf_exempt
+
+from .. import attachments, conversations, extraction
+from ..roles import is_ai_test_user
+
+log = logging.getLogger(__name__)
+
+
+#TESTY
+@login_required
+@user_passes_test(is_ai_test_user)
+def pokoj_testowy_view(request):
+    return render(request, "test/pokoj_testowy.html")
+
+
+@login_required
+@user_passes_test(is_ai_test_user)
+def strefa_ai_home_view(request):
+    return render(request, "test/strefa_ai_home.html")
+
+
+# OsobowoĹ›ci (Lyra nie robi live-lintu ani skanowania duĹĽych plikĂłw)
+PROMPTS = {
+    "Noa": """JesteĹ› Noa â€” nauczyciel AI PolubiszTo.pl. Styl: ciepĹ‚y, rzeczowy, kroki, przykĹ‚ady, mini-Ä‡wiczenie na koniec.
+Znane osoby: Ali(UX/styl), Lyra(analiza/QA), Eidos(koordynacja/synteza), Aron(archiwum).
+TwĂłrca X = wĹ‚aĹ›ciciel projektu. MĂłw po polsku. Nie wymyĹ›laj faktĂłw. JeĹ›li czegoĹ› nie wiesz â€” powiedz i zaproponuj jak sprawdziÄ‡.""",
+
+    "Ali": """JesteĹ› Ali â€” dyrektor wizualny PolubiszTo.pl. Styl: estetyka, UX, klarowny layout, dostÄ™pnoĹ›Ä‡, respons.
+Pomagasz w HTML/CSS/JS/UI. Dawaj krĂłtkie code-snippety i wskazĂłwki wizualne. MĂłw po polsku.""",
+
+    "Lyra": """JesteĹ› Lyra â€” analiza, QA, bezpieczeĹ„stwo. Styl: precyzja, checklisty, wykrywanie bĹ‚Ä™dĂłw, dobre praktyki (Django/CSRF/login_required).
+UWAGA: Nie uruchamiasz lintĂłw ani skanĂłw duĹĽych plikĂłw podczas pisania. JeĹ›li uĹĽytkownik wyraĹşnie poprosi o audyt, robisz go na podstawie skrĂłtĂłw/fragmentĂłw.
+MĂłw po polsku i dawaj kroki â€žsprawdĹş / naprawâ€ť.""",
+
+    "Eidos": """JesteĹ› Eidos â€” koordynacja, synteza, plan. Styl: mapy drogowe, Ĺ‚Ä…czenie Noa/Ali/Lyra, decyzje â€žco najpierwâ€ť, ryzyka.
+MĂłw po polsku, koĹ„cz punktowym planem nastÄ™pnych krokĂłw.""",
+}
+
+TEMPS = {"Noa": 0.7, "Ali": 0.6, "Lyra": 0.3, "Eidos": 0.5}
+AI_CHAT_MODEL = "gpt-4o-mini"
+
+
+@lru_cache(maxsize=1)
+def _ai_client():
+    # klient OpenAI (i import SDK) dopiero przy pierwszej rozmowie, nie przy starcie workera
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def _user_name(request):
+    u = getattr(request, "user", None)
+    if not u or not u.is_authenticated:
+        return "UczeĹ„"
+    base = (u.first_name or u.username or "UczeĹ„").strip()
+    if base.lower().startswith(("bogdan", "tworca", "twĂłrca")):
+        return "TwĂłrca X"
+    return base
+
+
+def _media_url(request, rel_path: str) -> str:
+    media_url = os.getenv("MEDIA_URL", "/media/").rstrip("/") + "/"
+    # build_absolute_uri zapewnia peĹ‚ny URL
+    return request.build_absolute_uri(posixpath.join(media_url, rel_path))
+
+
+def _upload_source(f):
+    # duży upload leży już w pliku tymczasowym – proces puli czyta go z dysku
+    if hasattr(f, "temporary_file_path"):
+        return f.temporary_file_path()
+    f.seek(0)
+    return f.read()
+
+
+def _save_uploaded_files(request):
+    """
+    Zapisuje 'files[]' do MEDIA/ai_uploads (ścieżka z SHA-256 treści, patrz
+    panel.attachments – ten sam plik nie jest wysyłany ani parsowany ponownie).
+    Ekstrakcja brakujących tekstów idzie równolegle w puli (panel.extraction).
+    Zwraca: {name, url, mime, is_image, text_preview}
+    """
+    saved = []
+    files = request.FILES.getlist("files[]")
+    pending = []  # (indeks, digest, rodzaj, plik) – bez ekstraktu w cache
+    for f in files:
+        digest = attachments.content_hash(f)
+        mime, _ = mimetypes.guess_type(f.name)
+        is_img = (mime or "").startswith("image/")
+        kind = "" if is_img else extraction.extraction_kind(f.name, mime)
+        text_preview = attachments.cached_text(digest, kind) if kind else ""
+        if text_preview is None:
+            pending.append((len(saved), digest, kind, f))
+        saved.append({
+            "name": f.name,
+            "mime": mime or "application/octet-stream",
+            "is_image": is_img,
+            "text_preview": text_preview or "",
+            "_file": f,
+            "_digest": digest,
+        })
+
+    # przed zapisem: storage (S3) może zamknąć plik po wysłaniu
+    texts = extraction.extract_many([(_upload_source(f), kind) for _i, _d, kind, f in pending])
+    for (i, digest, kind, _f), text in zip(pending, texts):
+        if text is extraction.NOT_RUN:
+            continue  # plik nie był parsowany – nic nie zapamiętujemy
+        attachments.remember_text(digest, kind, text)
+        saved[i]["text_preview"] = text or ""
+
+    for item in saved:
+        rel_path = attachments.store_upload(item.pop("_file"), item.pop("_digest"))
+        item["url"] = _media_url(request, rel_path)
+    return saved
+
+
+class AiChatTurn(NamedTuple):
+    persona: str
+    prompt: str
+    attachments: list
+    messages: list
+    owner: dict
+
+
+def _prepare_ai_chat(request):
+    """
+    Wspólne dla ai_chat i ai_chat_stream: parsowanie wejścia, reset,
+    załączniki, prompt z historią. Zwraca (AiChatTurn, None) albo
+    (None, JsonResponse) – gdy odpowiedź jest gotowa (błąd/reset).
+    """
+    content_type = request.META.get("CONTENT_TYPE", "")
+    is_multipart = content_type.startswith("multipart/form-data")
+
+    try:
+        if is_multipart:
+            prompt = (request.POST.get("message") or "").strip()
+            persona = (request.POST.get("persona") or "Noa").strip()
+            reset = (request.POST.get("reset") == "true")
+        else:
+            data = json.loads(request.body or "{}")
+            prompt = (data.get("message") or "").strip()
+            persona = (data.get("persona") or "Noa").strip()
+            reset = bool(data.get("reset"))
+    except Exception:
+        return None, JsonResponse({"error": "Invalid input"}, status=400)
+
+    # historia rozmów w tabeli (panel.conversations), nie w sesji
+    owner = conversations.owner_for(request)
+    conversations.adopt_session_history(request, owner, PROMPTS.keys())
+
+    if persona == "ALL" and reset:
+        conversations.clear(owner)
+        return None, JsonResponse({"reply": "ZresetowaĹ‚em pamiÄ™Ä‡ rozmĂłw (wszystkie persony). âś¨"})
+
+    if reset:
+        conversations.clear(owner, persona)
+        return None, JsonResponse({"reply": f"ZresetowaĹ‚em pamiÄ™Ä‡: {persona}. Zacznijmy od nowa âś¨"})
+
+    if persona not in PROMPTS:
+        return None, JsonResponse({"error": f"Nieznana persona: {persona}"}, status=400)
+    if not prompt:
+        return None, JsonResponse({"error": "Brak pola 'message'."}, status=400)
+    if not os.getenv("OPENAI_API_KEY"):
+        return None, JsonResponse({"error": "Brak OPENAI_API_KEY w Ĺ›rodowisku."}, status=500)
+
+    attachments = []
+    if is_multipart and request.FILES:
+        try:
+            attachments = _save_uploaded_files(request)
+        except Exception as e:
+            log.exception("save files error")
+            return None, JsonResponse({"error": f"UploadError: {e}"}, status=500)
+
+    user_name = _user_name(request)
+    system_ctx = f"Rozmawiasz z uĹĽytkownikiem: {user_name}. Projekt: PolubiszTo.pl. JeĹ›li to TwĂłrca X â€” moĹĽesz odwoĹ‚ywaÄ‡ siÄ™ do zespoĹ‚u i planu."
+
+    messages = [
+        {"role": "system", "content": PROMPTS[persona]},
+        {"role": "system", "content": system_ctx},
+    ]
+
+    # okno najnowszych wiadomości w budżecie tokenów
+    messages.extend(conversations.window(owner, persona))
+
+    # content uĹĽytkownika: tekst + obrazy (vision)
+    user_content = [{"type": "text", "text": prompt}]
+
+    for att in attachments:
+        if att.get("is_image"):
+            # obraz do vision
+            user_content.append({
+                "type": "input_image",
+                "image_url": {"url": att["url"]}
+            })
+        elif att.get("text_preview"):
+            # przyciÄ™ty wyciÄ…g z PDF/DOCX/TXT do kontekstu
+            user_content.append({
+                "type": "text",
+                "text": f"[WyciÄ…g z pliku: {att['name']}]\n{att['text_preview']}"
+            })
+
+    messages.append({"role": "user", "content": user_content})
+    return AiChatTurn(persona, prompt, attachments, messages, owner), None
+
+
+def _finish_ai_chat(turn: AiChatTurn, answer: str):
+    conversations.append(
+        turn.owner,
+        turn.persona,
+        {"role": "user", "content": turn.prompt},
+        {"role": "assistant", "content": answer},
+    )
+
+
+@csrf_exempt
+def ai_chat(request):
+    if request.method != "POST":
+        return JsonResponse({"detail": "Only POST allowed"}, status=405)
+
+    turn, response = _prepare_ai_chat(request)
+    if response is not None:
+        return response
+
+    try:
+        resp = _ai_client().chat.completions.create(
+            model=AI_CHAT_MODEL,
+            messages=turn.messages,
+            temperature=TEMPS.get(turn.persona, 0.7),
+        )
+        answer = (resp.choices[0].message.content or "").strip()
+        _finish_ai_chat(turn, answer)
+
+        return JsonResponse(
+            {"reply": answer, "persona": turn.persona, "attachments": turn.attachments},
+            status=200
+        )
+
+    except Exception as e:
+        log.exception("ai_chat error")
+        return JsonResponse({"error": f"{type(e).__name__}: {e}"}, status=500)
+
+
+def _sse(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+@lru_cache(maxsize=1)
+def _async_ai_client():
+    # osobny klient asynchroniczny (httpx.AsyncClient) – tworzony przy pierwszym streamie
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+@csrf_exempt
+async def ai_chat_stream(request):
+    """
+    Jak ai_chat, ale odpowiedź płynie jako SSE (text/event-stream):
+      event: token  data: {"t": "..."}      – kolejne fragmenty,
+      event: done   data: {"reply", ...}    – pełna odpowiedź (zapisana w historii),
+      event: error  data: {"error": "..."}.
+    Widok jest async – wątek workera nie czeka na model. Rozłączenie
+    klienta anuluje generator, a ten zamyka strumień do OpenAI (bez
+    dalszego naliczania tokenów); niedokończona odpowiedź nie trafia
+    do historii.
+    """
+    if request.method != "POST":
+        return JsonResponse({"detail": "Only POST allowed"}, status=405)
+
+    turn, response = await sync_to_async(_prepare_ai_chat)(request)
+    if response is not None:
+        return response
+
+    async def events():
+        stream = None
+        parts = []
+        try:
+            stream = await _async_ai_client().chat.completions.create(
+                model=AI_CHAT_MODEL,
+                messages=turn.messages,
+                temperature=TEMPS.get(turn.persona, 0.7),
+                stream=True,
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield _sse("token", {"t": delta})
+            answer = "".join(parts).strip()
+            await sync_to_async(_finish_ai_chat)(turn, answer)
+            yield _sse("done", {"reply": answer, "persona": turn.persona, "attachments": turn.attachments})
+        except asyncio.CancelledError:
+            log.info("ai_chat_stream: klient rozłączony po %d fragmentach", len(parts))
+            raise
+        except Exception as e:
+            log.exception("ai_chat_stream error")
+            yield _sse("error", {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            if stream is not None:
+                await stream.close()
+
+    resp = StreamingHttpResponse(events(), content_type="text/event-stream; charset=utf-8")
+    resp["Cache-Control"] = "no-cache, no-store"
+    resp["X-Accel-Buffering"] = "no"  # nginx: bez buforowania odpowiedzi
+    return resp
@@ -0,0 +1,86 @@
+# panel/views/aliboard.py
+"""
+Tablica Aliboard (pokoje testowe i produkcyjne).
+"""
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+
+from ..models import Rezerwacja
+
+
+# TABLICA
+@login_required
+def aliboard_view(request, room_id="local-test"):
+    # jesli wejdziesz na /aliboard/ -> uzyje "local-test"
+    # jesli wejdziesz na /aliboard/abcd1234/ -> uzyje "abcd1234"
+    user_role = "guest"
+    user = getattr(request, "user", None)
+    if getattr(user, "is_authenticated", False):
+        if getattr(user, "is_teacher", False) or getattr(user, "is_staff", False):
+            user_role = "teacher"
+        else:
+            user_role = "student"
+    context = {
+        "room_id": room_id,
+        "user_role": user_role,
+    }
+    return render(request, "test/aliboard.html", context)
+
+
+@login_required
+def aliboard_prod_view(request, room_id="prod-default"):
+    user_role = "guest"
+    user = getattr(request, "user", None)
+    if getattr(user, "is_authenticated", False):
+        if getattr(user, "is_teacher", False) or getattr(user, "is_staff", False):
+            user_role = "teacher"
+        else:
+            user_role = "student"
+    lesson_start = None
+    lesson_end = None
+    lesson_rez_id = None
+    rez_param = request.GET.get("rez")
+    if rez_param:
+        try:
+            rez = Rezerwacja.objects.get(id=int(rez_param))
+            lesson_rez_id = rez.id
+            lesson_start = rez.termin
+            lesson_end = rez.termin + timedelta(minutes=55)
+        except (Rezerwacja.DoesNotExist, ValueError, TypeError):
+            pass
+    # Fallback: gdy brak ?rez= spróbuj dopasować rezerwację po room_id z linku
+    if not lesson_start and room_id:
+        try:
+            rez = (
+                Rezerwacja.objects
+                .filter(excalidraw_link__icontains=room_id)
+                .order_by("-termin")
+                .first()
+            )
+            if rez:
+                lesson_rez_id = rez.id
+                lesson_start = rez.termin
+                lesson_end = rez.termin + timedelta(minutes=55)
+        except Exception:
+            pass
+    context = {
+        "room_id": room_id,
+        "user_role": user_role,
+        "lesson_start": lesson_start,
+        "lesson_end": lesson_end,
+        "lesson_rez_id": lesson_rez_id,
+    }
+    return render(request, "aliboard.html", context)
+
+
+def aliboard_new_room(request):
+    room_id = uuid.uuid4().hex[:8]  # np. "a3f9c2b1"
+    return redirect("aliboard_room", room_id=room_id)
+
+
+def aliboard_prod_new_room(request):
+    room_id = uuid.uuid4().hex[:8]
+    return redirect("aliboard_prod_room", room_id=room_id)
@@ -0,0 +1,628 @@
+# panel/views/booking.py
+"""
+Rezerwacje i terminy: panele nauczyciela i ucznia, wolne terminy, plan zajęć.
+"""
+import json
+from datetime import datetime as DT, date, time, timedelta
+
+from django.apps import apps
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.exceptions import ValidationError
+from django.db import transaction, models
+from django.db.models import Exists, OuterRef, ForeignKey
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, JsonResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse, NoReverseMatch
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_POST
+
+from ..direct_upload import complete_direct_upload, consume_direct_upload
+from ..models import Rezerwacja, WolnyTermin, PrzedmiotCennik
+from ..offerings import offering_exists, offerings_by_teacher, subject_choices
+from ..roles import in_group, is_legacy_teacher, is_teacher
+from ..signed_urls import attach_signed_urls
+
+from .accounts import redirect_after_login
+from .calendar import calendar_feed_url
+
+
+@login_required
+@user_passes_test(in_group("Nauczyciele"), login_url="login")
+def panel_nauczyciela_v2(request):
+    return render(request, "teacher/panel_nauczyciela_v2.html")
+
+
+@login_required
+@user_passes_test(in_group("Nauczyciele"), login_url="login")
+def harmonogram_v2(request):
+    return render(request, "teacher/v2/harmonogram.html")
+
+
+@login_required
+@user_passes_test(in_group("Nauczyciele"), login_url="login")
+def dostepnosc_v2(request):
+    return render(request, "teacher/v2/dostepnosc.html")
+
+
+@login_required
+@user_passes_test(in_group("Nauczyciele"), login_url="login")
+def profil_v2(request):
+    return render(request, "teacher/v2/profil.html")
+
+
+@login_required
+@user_passes_test(is_legacy_teacher, login_url="login")
+def panel_nauczyciela_legacy(request):
+    return render(request, "panel_nauczyciela.html")
+
+
+# Alias dla zgodności wstecznej
+panel_nauczyciela_view = panel_nauczyciela_legacy
+
+
+@login_required
+@user_passes_test(is_legacy_teacher, login_url="login")
+def moj_plan_zajec_legacy(request):
+    return moj_plan_zajec_view(request)
+
+
+# MOJE REZERWACJE UCZNIA
+def _range_for_scope(now, scope: str):
+    """
+    Zwraca (start_dt, end_dt) jako AWARE datetimes w TZ projektu.
+    Zakresy: 'day' (dziĹ›), 'week' (bieĹĽÄ…cy tydzieĹ„ pn-nd), 'month' (bieĹĽÄ…cy miesiÄ…c),
+             'all' (brak ograniczeĹ„ -> (None, None)).
+    """
+    tz = timezone.get_current_timezone()
+
+    def at_start_of_day(d):
+        return timezone.make_aware(DT.combine(d, DT.min.time()), tz)
+
+    scope = (scope or "").lower()
+    today = now.date()
+
+    if scope == "day":
+        start = at_start_of_day(today)
+        end   = start + timedelta(days=1)
+        return start, end
+
+    if scope == "week":
+        monday = today - timedelta(days=today.weekday())  # poniedziaĹ‚ek
+        start  = at_start_of_day(monday)
+        end    = start + timedelta(days=7)                # do nastÄ™pnego poniedziaĹ‚ku
+        return start, end
+
+    if scope == "month":
+        first = today.replace(day=1)
+        # pierwszy dzieĹ„ nastÄ™pnego miesiÄ…ca
+        if first.month == 12:
+            next_first = first.replace(year=first.year + 1, month=1, day=1)
+        else:
+            next_first = first.replace(month=first.month + 1, day=1)
+        start = at_start_of_day(first)
+        end   = at_start_of_day(next_first)
+        return start, end
+
+    # 'all'
+    return None, None
+
+
+@login_required
+def moje_rezerwacje_ucznia_view(request):
+    scope = (request.GET.get("scope") or "all").lower()
+    if scope not in {"day", "week", "month", "all"}:
+        scope = "all"
+
+    now = timezone.localtime()
+
+    Rezerwacja = apps.get_model("panel", "Rezerwacja")
+
+    base = (
+        Rezerwacja.objects
+        .filter(uczen=request.user)
+        .select_related("nauczyciel")
+    )
+
+    start, end = _range_for_scope(now, scope)
+    if start is not None and end is not None:
+        base = base.filter(termin__gte=start, termin__lt=end)
+
+    # Rozbicie: nadchodzÄ…ce i zakoĹ„czone wzglÄ™dem 'now'
+    upcoming = base.filter(termin__gte=now).order_by("termin")
+    finished = base.filter(termin__lt=now).order_by("-termin")
+
+    return render(request, "moje_rezerwacje_ucznia.html", {
+        "scope": scope,
+        "upcoming": upcoming,
+        "finished": finished,
+        # dla zgodnoĹ›ci wstecz:
+        "rezerwacje": base.order_by("termin"),
+        "calendar_feed_url": calendar_feed_url(request),
+    })
+
+
+def _redirect_after_booking():
+    """
+    Bezpieczne przekierowanie po rezerwacji.
+    1) prĂłbuje 'moje_rezerwacje' (jeĹ›li masz taki widok),
+    2) fallback do 'panel_ucznia'.
+    """
+    try:
+        return HttpResponseRedirect(reverse("moje_rezerwacje"))
+    except NoReverseMatch:
+        return HttpResponseRedirect(reverse("panel_ucznia"))
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def zarezerwuj_zajecia(request):
+    # --- EDU: pola opcjonalne ---
+    typ_osoby    = (request.POST.get("typ_osoby") or "").strip() or None
+    poziom_nauki = (request.POST.get("poziom_nauki") or "").strip() or None
+
+    # --- podstawowe pola ---
+    termin_txt    = (request.POST.get("termin") or "").strip()        # "YYYY-MM-DD HH:MM"
+    nauczyciel_id = request.POST.get("nauczyciel_id")
+    termin_id     = request.POST.get("termin_id")
+    temat         = (request.POST.get("temat") or "").strip()
+    poziom        = (request.POST.get("poziom") or "").strip() or None
+    plik          = request.FILES.get("plik")
+    # >>> NOWE <<<
+    przedmiot     = (request.POST.get("przedmiot") or "").strip() or None
+
+    if not (termin_txt and nauczyciel_id and temat):
+        return HttpResponseBadRequest("Brak danych")
+
+    # Plik mógł pójść bezpośrednio do storage (token zamiast request.FILES)
+    if plik is None:
+        try:
+            plik = complete_direct_upload(request, "plik")
+        except ValidationError as e:
+            return HttpResponseBadRequest(" ".join(e.messages))
+
+    # Wymuszenie wyboru poziom_nauki, jeĹ›li typ_osoby jest ustawiony
+    if typ_osoby and not poziom_nauki:
+        return HttpResponseBadRequest("Wybierz klasÄ™/rok studiĂłw dla wybranego typu ucznia.")
+
+    # Parsowanie daty/godziny (bez zmian)
+    try:
+        data_str, godz_str = termin_txt.split(" ")
+        data    = DT.strptime(data_str, "%Y-%m-%d").date()
+        godzina = DT.strptime(godz_str, "%H:%M").time()
+    except ValueError:
+        return HttpResponseBadRequest("ZĹ‚y format terminu")
+
+    now = timezone.localtime()
+    if (data < now.date()) or (data == now.date() and godzina < now.time()):
+        return HttpResponseBadRequest("Nie moĹĽna rezerwowaÄ‡ przeszĹ‚ych terminĂłw")
+
+    # Modele
+    User        = apps.get_model("auth", "User")
+    Rezerwacja  = apps.get_model("panel", "Rezerwacja")
+    WolnyTermin = apps.get_model("panel", "WolnyTermin")
+
+    # Czy Rezerwacja.termin to FK do WolnyTermin?
+    has_fk_slot = False
+    try:
+        pole = Rezerwacja._meta.get_field("termin")
+        if isinstance(pole, ForeignKey) and getattr(pole.remote_field, "model", None) is WolnyTermin:
+            has_fk_slot = True
+    except Exception:
+        pass
+
+    # DostÄ™pnoĹ›Ä‡ pĂłl
+    rezerwacja_has_przedmiot     = any(f.name == "przedmiot" for f in Rezerwacja._meta.get_fields())
+    rezerwacja_has_poziom        = any(f.name == "poziom" for f in Rezerwacja._meta.get_fields())
+    rezerwacja_has_typ_osoby     = any(f.name == "typ_osoby" for f in Rezerwacja._meta.get_fields())
+    rezerwacja_has_poziom_nauki  = any(f.name == "poziom_nauki" for f in Rezerwacja._meta.get_fields())
+
+    # DomyĹ›lne wartoĹ›ci do create()
+    defaults = {
+        "uczen": request.user,
+        "temat": temat,
+    }
+    if plik is not None:
+        defaults["plik"] = plik
+    if rezerwacja_has_przedmiot:
+        defaults["przedmiot"] = przedmiot
+    if rezerwacja_has_poziom:
+        defaults["poziom"] = poziom
+    if rezerwacja_has_typ_osoby:
+        defaults["typ_osoby"] = typ_osoby
+    if rezerwacja_has_poziom_nauki:
+        defaults["poziom_nauki"] = poziom_nauki
+
+    # Aware datetime
+    naive_dt = DT.combine(data, godzina)
+    when_dt = naive_dt if not timezone.is_naive(naive_dt) else timezone.make_aware(
+        naive_dt, timezone.get_current_timezone()
+    )
+
+    # Rezerwacja (jak byĹ‚o)
+    if termin_id:
+        try:
+            slot = (
+                WolnyTermin.objects
+                .select_for_update()
+                .select_related("nauczyciel")
+                .get(id=termin_id, nauczyciel_id=nauczyciel_id, data=data, godzina=godzina)
+            )
+        except WolnyTermin.DoesNotExist:
+            return HttpResponseBadRequest("Termin nie istnieje")
+
+        if has_fk_slot:
+            obj, created = Rezerwacja.objects.get_or_create(
+                termin=slot,
+                defaults={**defaults, "nauczyciel": slot.nauczyciel}
+            )
+        else:
+            obj, created = Rezerwacja.objects.get_or_create(
+                nauczyciel=slot.nauczyciel,
+                termin=when_dt,
+                defaults=defaults
+            )
+        if not created:
+            return HttpResponseBadRequest("Ten termin jest juĹĽ zarezerwowany")
+    else:
+        try:
+            nauczyciel = User.objects.get(id=nauczyciel_id)
+        except User.DoesNotExist:
+            return HttpResponseBadRequest("Nauczyciel nie istnieje")
+
+        obj, created = Rezerwacja.objects.get_or_create(
+            nauczyciel=nauczyciel,
+            termin=when_dt,
+            defaults=defaults
+        )
+        if not created:
+            return HttpResponseBadRequest("Ten termin jest juĹĽ zarezerwowany")
+
+    # token uploadu zużywamy dopiero po zapisie – błąd walidacji wyżej pozwala ponowić formularz
+    try:
+        consume_direct_upload(request, "plik")
+    except ValidationError as e:
+        transaction.set_rollback(True)
+        return HttpResponseBadRequest(" ".join(e.messages))
+
+    return _redirect_after_booking()
+
+
+@login_required
+def dostepne_terminy_view(request):
+    """
+    Lista dostÄ™pnych terminĂłw + kolumny:
+    - 'Przedmiot' (z OfertaNauczyciela – panel.offerings)
+    - 'Poziom'  (select z poziomami z profilu; zapis do formularza)
+    - 'Cena [zĹ‚/h]' (z cennika PrzedmiotCennik.cena_uczen, zaleĹĽna od wybranego poziomu)
+    Filtry GET: ?przedmiot=&poziom=&dzien=RRRR-MM-DD (w SQL).
+    """
+    now = timezone.localtime()
+
+    terminy_qs = (
+        WolnyTermin.objects
+        .select_related("nauczyciel")
+        .filter(
+            models.Q(data__gt=now.date()) |
+            models.Q(data=now.date(), godzina__gte=now.time())
+        )
+        .order_by("data", "godzina")
+    )
+
+    # Wyklucz zajÄ™te (jak u Ciebie)
+    try:
+        Rezerwacja = apps.get_model("panel", "Rezerwacja")
+    except LookupError:
+        Rezerwacja = None
+
+    if Rezerwacja:
+        try:
+            pole = Rezerwacja._meta.get_field("termin")
+        except Exception:
+            pole = None
+
+        if isinstance(pole, ForeignKey) and getattr(pole.remote_field, "model", None) is WolnyTermin:
+            terminy_qs = terminy_qs.exclude(
+                Exists(Rezerwacja.objects.filter(termin_id=OuterRef("id")))
+            )
+        else:
+            terminy_qs = terminy_qs.exclude(
+                Exists(
+                    Rezerwacja.objects.filter(
+                        nauczyciel=OuterRef("nauczyciel"),
+                        termin__date=OuterRef("data"),
+                        termin__time=OuterRef("godzina"),
+                    )
+                )
+            )
+
+    # --- Filtry (indeksowane złączenie z OfertaNauczyciela) ---
+    filtr_przedmiot = (request.GET.get("przedmiot") or "").strip()
+    filtr_poziom = (request.GET.get("poziom") or "").strip()
+    try:
+        filtr_dzien = parse_date((request.GET.get("dzien") or "").strip())
+    except ValueError:
+        filtr_dzien = None
+    if filtr_przedmiot or filtr_poziom:
+        terminy_qs = terminy_qs.filter(offering_exists(filtr_przedmiot, filtr_poziom))
+    if filtr_dzien:
+        terminy_qs = terminy_qs.filter(data=filtr_dzien)
+    terminy = list(terminy_qs)
+
+    # --- Oferta nauczycieli (przedmioty / poziomy) – jedno zapytanie ---
+    oferta = offerings_by_teacher({t.nauczyciel_id for t in terminy})
+
+    # --- CENY z cennika (PrzedmiotCennik.cena_uczen) – jedno zapytanie ---
+    cennik = {}
+    for nazwa, poziom, cena in PrzedmiotCennik.objects.filter(
+        nazwa__in={p for pary in oferta.values() for p, _ in pary}
+    ).values_list("nazwa", "poziom", "cena_uczen"):
+        cennik.setdefault((nazwa, poziom), []).append(cena)
+
+    teacher_info = {}
+    for uid, pary in oferta.items():
+        subjects = sorted({p for p, _ in pary})
+        levels = sorted({lvl for _, lvl in pary}, key=lambda x: 0 if x == "podstawowy" else 1)
+        prices = {}
+        for lvl in ("podstawowy", "rozszerzony"):
+            vals = [c for p in subjects for c in cennik.get((p, lvl), ())]
+            if vals:
+                mn, mx = min(vals), max(vals)
+                prices[lvl] = f"{mn:.2f} zł" if mn == mx else f"{mn:.2f}–{mx:.2f} zł"
+            else:
+                prices[lvl] = "—"
+        teacher_info[uid] = {"subjects": subjects, "levels": levels, "prices": prices}
+
+    # --- ZbiĂłr dla template ---
+    entries = []
+    for t in terminy:
+        info = teacher_info.get(
+            t.nauczyciel_id,
+            {"subjects": ["â€”"], "levels": ["podstawowy"], "prices": {"podstawowy": "â€”", "rozszerzony": "â€”"}}
+        )
+        entries.append({"t": t, "info": info})
+
+    return render(
+        request,
+        "uczen/dostepne_terminy.html",
+        {
+            "terminy": entries,
+            "przedmioty": subject_choices(),
+            "filtr": {"przedmiot": filtr_przedmiot, "poziom": filtr_poziom, "dzien": filtr_dzien},
+        }
+    )
+
+
+@require_POST
+@login_required
+@transaction.atomic
+def dodaj_wolny_termin(request):
+    """
+    Dodaje wolny termin dla zalogowanego nauczyciela.
+    Idempotentnie: uĹĽywa get_or_create(nauczyciel, data, godzina).
+    """
+    if not request.user.is_staff and not is_teacher(request.user):
+        return HttpResponseBadRequest("Brak uprawnieĹ„")
+
+    data_str = (request.POST.get("data") or "").strip()        # "YYYY-MM-DD"
+    godzina_str = (request.POST.get("godzina") or "").strip()  # "HH:MM"
+
+    if not data_str or not godzina_str:
+        return HttpResponseBadRequest("Podaj datÄ™ i godzinÄ™")
+
+    # parsowanie
+    try:
+        data = DT.strptime(data_str, "%Y-%m-%d").date()
+        godzina = DT.strptime(godzina_str, "%H:%M").time()
+    except ValueError:
+        return HttpResponseBadRequest("ZĹ‚y format daty/godziny")
+
+    # najwaĹĽniejsze: idempotencja
+    obj, created = WolnyTermin.objects.get_or_create(
+        nauczyciel=request.user,
+        data=data,
+        godzina=godzina,
+    )
+
+    # jeĹ›li wywoĹ‚ujesz to fetchâ€™em, moĹĽesz zwracaÄ‡ JSON:
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse({"ok": True, "created": created, "id": obj.id})
+
+    # albo zwykĹ‚e przekierowanie po sukcesie
+    return HttpResponseRedirect(reverse("panel_nauczyciela_kalendarz"))
+
+
+@require_POST
+@login_required
+@transaction.atomic
+def dodaj_wiele_wolnych_terminow(request):
+    # zakĹ‚adamy ĹĽe przyszĹ‚y listy: data[] i godzina[]
+    datas = request.POST.getlist("data[]")      # ["2025-10-05", "2025-10-06", ...]
+    godziny = request.POST.getlist("godzina[]") # ["10:00", "11:00", ...]
+    slots = set()
+
+    for d in datas:
+        for g in godziny:
+            try:
+                dt = DT.strptime(d, "%Y-%m-%d").date()
+                tm = DT.strptime(g, "%H:%M").time()
+            except ValueError:
+                continue
+            slots.add((dt, tm))
+
+    objs = [
+        WolnyTermin(nauczyciel=request.user, data=dt, godzina=tm)
+        for (dt, tm) in slots
+    ]
+    # klucz: brak duplikatĂłw nawet gdy formularz wyĹ›le siÄ™ 2x
+    WolnyTermin.objects.bulk_create(objs, ignore_conflicts=True)
+
+    return JsonResponse({"ok": True, "added": len(objs)})
+
+
+@login_required
+def archiwum_rezerwacji_view(request):
+    rok_tem = timezone.now() - timedelta(days=365)
+    rezerwacje = (
+        Rezerwacja.objects.filter(nauczyciel=request.user, termin__lt=timezone.now(), termin__gte=rok_tem)
+        .select_related("uczen")
+    )
+    # wszystkie podpisy do plików liczone naraz (cache), zamiast r.plik.url w szablonie
+    rezerwacje = attach_signed_urls(rezerwacje, "plik")
+
+    archiwum = {}
+    for r in rezerwacje:
+        miesiac = r.termin.strftime("%Y-%m")
+        archiwum.setdefault(miesiac, {}).setdefault(r.uczen, []).append(r)
+
+    return render(request, "nauczyciel/archiwum_rezerwacji.html", {"archiwum": archiwum})
+
+
+@login_required
+def panel_ucznia_view(request):
+    if is_teacher(request.user):
+        return redirect("panel_nauczyciela_v2")
+    if is_legacy_teacher(request.user):
+        return redirect_after_login(request.user)
+    terminy = WolnyTermin.objects.all().select_related("nauczyciel")
+    return render(request, "panel_ucznia.html", {"terminy": terminy})
+
+
+@login_required
+def zapisz_terminy_view(request):
+    if request.method == "POST":
+        data = json.loads(request.body)
+        date_str = data.get("data")
+        godziny = data.get("godziny", [])
+
+        for godzina in godziny:
+            WolnyTermin.objects.get_or_create(
+                nauczyciel=request.user,
+                data=DT.strptime(date_str, "%Y-%m-%d").date(),
+                godzina=DT.strptime(godzina, "%H:%M").time(),
+            )
+        return JsonResponse({"status": "ok"})
+
+    return JsonResponse({"error": "Invalid method"}, status=405)
+
+
+@login_required
+def stawki_nauczyciela_view(request):
+    if not hasattr(request.user, "profil") or not request.user.profil.is_teacher:
+        return redirect("login")
+    cennik = PrzedmiotCennik.objects.all().order_by("nazwa", "poziom")
+    return render(request, "stawki_nauczyciela.html", {"cennik": cennik})
+
+
+@login_required
+def moj_plan_zajec_view(request):
+    now = timezone.localtime()
+    scope = request.GET.get("scope", "all")      # "day" | "week" | "all"
+    view_mode = request.GET.get("view", "auto")  # "auto" | "table" | "cards"
+
+    qs = (
+        Rezerwacja.objects
+        .filter(nauczyciel=request.user)
+        .select_related("uczen")
+        .order_by("termin")
+    )
+
+    # Zakres taki jak robiliĹ›my wczeĹ›niej (Noa)
+    if scope == "day":
+        start_d = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_d = start_d + timedelta(days=1)
+        qs = qs.filter(termin__gte=start_d, termin__lt=end_d)
+    elif scope == "week":
+        weekday = now.weekday()  # 0=Mon
+        week_start = (now - timedelta(days=weekday)).replace(hour=0, minute=0, second=0, microsecond=0)
+        week_end = week_start + timedelta(days=7)
+        qs = qs.filter(termin__gte=week_start, termin__lt=week_end)
+
+    # Enrichment jak w innych panelach Noa
+    upcoming, finished = [], []
+    for r in qs:
+        start = timezone.localtime(r.termin)
+        end = start + timedelta(minutes=55)
+        is_past = now > end
+        status = "ZakoĹ„czone" if is_past else ("Trwa" if start <= now <= end else "NadchodzÄ…ce")
+
+        row = {
+            "obj": r,          # w szablonie uĹĽywamy r= row.obj
+            "start": start,
+            "end": end,
+            "is_past": is_past,
+            "status": status,
+        }
+        (finished if is_past else upcoming).append(row)
+
+    upcoming.sort(key=lambda x: x["start"])
+    finished.sort(key=lambda x: x["start"], reverse=True)
+
+    ctx = {
+        "upcoming": upcoming,
+        "finished": finished,
+        "now": now,
+        "scope": scope,
+        "view_mode": view_mode,
+        "calendar_feed_url": calendar_feed_url(request),
+    }
+    return render(request, "moj_plan_zajec.html", ctx)
+
+
+def _is_future(d: date, t: time) -> bool:
+    now = timezone.localtime()          # aware datetime
+    naive = DT.combine(d, t)            # <<< TU klasa DT (nie dt)
+    aware = naive if not timezone.is_naive(naive) else timezone.make_aware(naive, now.tzinfo)
+    return aware >= now
+
+
+@ensure_csrf_cookie                 # ustawi cookie CSRF na GET
+@login_required
+@transaction.atomic
+def wybierz_godziny_view(request):
+    if request.method == "GET":
+        # To jest ta strona â€žWybierz dzieĹ„ i godzinÄ™â€¦â€ť
+        return render(request, "wybierz_dzien_i_godzine_w_ktorej_poprowadzisz_korepetycje.html")
+
+    if request.method != "POST":
+        return HttpResponseBadRequest("Niedozwolona metoda")
+
+    # --- POST JSON z kalendarza ---
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception as e:
+        return JsonResponse({"ok": False, "error": f"BĹ‚Ä…d JSON: {e}"}, status=400)
+
+    items = payload.get("terminy", [])
+    if not isinstance(items, list):
+        return JsonResponse({"ok": False, "error": "Pole 'terminy' musi byÄ‡ listÄ…."}, status=400)
+
+    nauczyciel = request.user
+    to_create, skipped = [], []
+
+    for it in items:
+        d = parse_date((it.get("data") or "").strip())
+        if not d:
+            skipped.append({"data": it.get("data"), "powod": "zĹ‚y format daty"})
+            continue
+        for g_str in it.get("godziny") or []:
+            t = parse_time((g_str or "").strip())
+            if not t:
+                skipped.append({"data": it.get("data"), "godzina": g_str, "powod": "zĹ‚y format godziny"})
+                continue
+            if not _is_future(d, t):
+                skipped.append({"data": it.get("data"), "godzina": g_str, "powod": "przeszĹ‚oĹ›Ä‡"})
+                continue
+            to_create.append(WolnyTermin(nauczyciel=nauczyciel, data=d, godzina=t))
+
+    created = WolnyTermin.objects.bulk_create(to_create, ignore_conflicts=True)
+    return JsonResponse({"ok": True, "created": len(created), "skipped": len(skipped), "details": skipped})
+
+
+@login_required
+def pobierz_terminy_view(request):
+    terminy = WolnyTermin.objects.filter(nauczyciel=request.user)
+    lista = [{"data": t.data.strftime("%Y-%m-%d"), "godzina": t.godzina.strftime("%H:%M")} for t in terminy]
+    return JsonResponse({"terminy": lista})
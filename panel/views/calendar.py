@@ -0,0 +1,58 @@
+# panel/views/calendar.py
+"""
+Feed iCalendar planu zajęć (panel.calendar_feed) i zarządzanie jego adresem.
+"""
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_GET, require_POST
+
+from ..calendar_feed import feed_version, render_feed
+from ..models import CalendarFeed
+
+
+def calendar_feed_url(request) -> str:
+    """Adres webcal:// feedu zalogowanego użytkownika (tworzy token przy pierwszym użyciu)."""
+    feed, _ = CalendarFeed.objects.get_or_create(user=request.user)
+    url = request.build_absolute_uri(reverse("calendar_feed", args=[feed.token]))
+    return "webcal://" + url.split("://", 1)[1]
+
+
+@require_GET
+def calendar_feed_view(request, token: str):
+    # bez logowania – token w adresie jest uprawnieniem (aplikacje kalendarza nie mają sesji)
+    feed = CalendarFeed.objects.select_related("user").filter(token=token).first()
+    if feed is None or not feed.user.is_active:
+        raise Http404
+
+    etag, last_modified = feed_version(feed.user)
+    # 304 tylko po ETag: usunięcie rezerwacji nie przesuwa max(updated_at),
+    # więc samo If-Modified-Since mogłoby zwrócić nieaktualny feed
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(render_feed(feed.user, request), content_type="text/calendar; charset=utf-8")
+        response["Content-Disposition"] = 'inline; filename="plan-zajec.ics"'
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    response["X-Robots-Tag"] = "noindex"
+    return response
+
+
+@login_required
+@require_POST
+def calendar_feed_rotate_view(request):
+    """Nowy token – stary adres (np. udostępniony przez pomyłkę) przestaje działać."""
+    feed, created = CalendarFeed.objects.get_or_create(user=request.user)
+    if not created:
+        feed.rotate()
+    messages.success(request, "Wygenerowano nowy adres kalendarza – zaktualizuj subskrypcję.")
+    next_url = request.POST.get("next")
+    if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        next_url = "strona_glowna"
+    return redirect(next_url)
@@ -0,0 +1,148 @@
+# panel/views/files.py
+"""
+Pliki: pobieranie materiałów i upload bezpośredni do storage.
+"""
+import json
+import logging
+
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+)
+from django.shortcuts import get_object_or_404, redirect
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
+
+from ..direct_upload import complete_direct_upload, consume_direct_upload, presign_upload, save_local_upload
+from ..models import Rezerwacja
+from ..signed_urls import signed_url
+
+from .webrtc import _no_store
+
+log = logging.getLogger(__name__)
+
+
+# ==========================
+#      POBIERANIE PLIKĂ“W
+# ==========================
+@login_required
+def pobierz_plik(request, id):
+    """
+    Pobieranie pliku doĹ‚Ä…czonego przy rezerwacji (uczeĹ„ -> nauczyciel).
+    Zamiast streamowaÄ‡ z Django, przekierowujemy na podpisany URL storage.
+    """
+    r = get_object_or_404(Rezerwacja, id=id)
+
+    # DostÄ™p: tylko nauczyciel lub uczeĹ„ z tej rezerwacji
+    if request.user != r.nauczyciel and request.user != r.uczen and not request.user.is_staff:
+        raise Http404("Brak dostÄ™pu")
+
+    if not r.plik:
+        raise Http404("Plik nie istnieje")
+
+    # django-storages wygeneruje podpisany URL (AWS_QUERYSTRING_AUTH=True) – z cache
+    try:
+        return redirect(signed_url(r.plik))
+    except Exception:
+        # np. gdy obiekt zostaĹ‚ usuniÄ™ty w koszu OVH lub bĹ‚Ä…d endpointu
+        raise Http404("Nie moĹĽna pobraÄ‡ pliku (brak obiektu w storage)")
+
+
+@login_required
+def pobierz_material(request, id):
+    """
+    Pobieranie materiaĹ‚u dodanego po zajÄ™ciach (nauczyciel -> uczeĹ„).
+    RĂłwnieĹĽ przekierowanie na podpisany URL.
+    """
+    r = get_object_or_404(Rezerwacja, id=id)
+
+    if request.user != r.nauczyciel and request.user != r.uczen and not request.user.is_staff:
+        raise Http404("Brak dostÄ™pu")
+
+    if not r.material_po_zajeciach:
+        raise Http404("Plik nie istnieje")
+
+    try:
+        return redirect(signed_url(r.material_po_zajeciach))
+    except Exception:
+        raise Http404("Nie moĹĽna pobraÄ‡ materiaĹ‚u (brak obiektu w storage)")
+
+
+# ==========================
+#   UPLOAD BEZPOŚREDNI (S3)
+# ==========================
+@login_required
+@never_cache
+@require_POST
+def direct_upload_presign(request):
+    """
+    Zwraca POST policy do wysłania pliku prosto do bucketu.
+    Body: kind (plik|material|potwierdzenie), filename, size, content_type.
+    """
+    try:
+        data = json.loads(request.body.decode("utf-8") or "{}")
+    except Exception:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    try:
+        payload = presign_upload(
+            kind=(data.get("kind") or "").strip(),
+            filename=(data.get("filename") or "").strip(),
+            size=data.get("size"),
+            content_type=(data.get("content_type") or "").strip(),
+            user=request.user,
+        )
+    except ValidationError as e:
+        return JsonResponse({"error": " ".join(e.messages)}, status=400)
+    except Exception:
+        log.exception("direct upload presign error")
+        return JsonResponse({"error": "Upload niedostępny"}, status=503)
+    return _no_store(JsonResponse(payload))
+
+
+@login_required
+@never_cache
+@require_POST
+def direct_upload_local(request):
+    """Lokalny zastępnik S3 (dev) – przyjmuje plik pod nazwą zapisaną w tokenie."""
+    f = request.FILES.get("file")
+    token = request.POST.get("token") or ""
+    kind = (request.POST.get("kind") or "").strip()
+    if not f or not token:
+        return HttpResponseBadRequest("Brak pliku lub tokenu")
+    try:
+        save_local_upload(token, kind, f, request.user)
+    except ValidationError as e:
+        return HttpResponseBadRequest(" ".join(e.messages))
+    return HttpResponse(status=204)
+
+
+@require_POST
+@login_required
+def dodaj_material_po_zajeciach(request, rezerwacja_id):
+    rezerwacja = get_object_or_404(Rezerwacja, id=rezerwacja_id)
+    if request.user != rezerwacja.nauczyciel:
+        return HttpResponseForbidden("Brak dostÄ™pu.")
+
+    if "material" in request.FILES:
+        rezerwacja.material_po_zajeciach = request.FILES["material"]
+        rezerwacja.save()
+    else:
+        # plik wysłany bezpośrednio do storage – dostajemy tylko token
+        try:
+            name = complete_direct_upload(request, "material")
+            if name:
+                with transaction.atomic():
+                    rezerwacja.material_po_zajeciach = name
+                    rezerwacja.save(update_fields=["material_po_zajeciach"])
+                    consume_direct_upload(request, "material")
+        except ValidationError as e:
+            return HttpResponseBadRequest(" ".join(e.messages))
+
+    return redirect("moj_plan_zajec")
@@ -0,0 +1,41 @@
+# panel/views/home.py
+"""
+Strona główna (katalog nauczycieli z cache) i proste publiczne endpointy.
+"""
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from ..directory import (
+    PAGE_CACHE_PREFIX as DIRECTORY_PAGE_CACHE_PREFIX,
+    PAGE_CACHE_TIMEOUT as DIRECTORY_PAGE_CACHE_TIMEOUT,
+    page_etag,
+    page_last_modified,
+    teacher_cards,
+)
+
+
+# --- Proste testy/public ---
+def public_test(request):
+    return HttpResponse("PUBLIC OK")
+
+
+def test_publiczny(request):
+    return HttpResponse("PUBLIC OK")
+
+
+# --- STRONA GĹĂ“WNA (lista tylko nauczycieli: profil.is_teacher=True) ---
+@condition(etag_func=page_etag, last_modified_func=page_last_modified)
+def strona_glowna_view(request):
+    # karty nauczycieli z cache (przebudowa sygnałami), cała strona w cache po ETag
+    etag = page_etag(request)
+    key = f"{DIRECTORY_PAGE_CACHE_PREFIX}:{etag}"
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string("index.html", {"nauczyciele": teacher_cards(request)}, request=request)
+        cache.set(key, html, DIRECTORY_PAGE_CACHE_TIMEOUT)
+    resp = HttpResponse(html)
+    patch_cache_control(resp, public=True, max_age=0, must_revalidate=True)
+    return resp
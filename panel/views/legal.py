@@ -0,0 +1,101 @@
+# panel/views/legal.py
+"""
+Regulamin i polityka prywatności (SiteLegalConfig).
+"""
+import os
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import redirect, render
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from ..forms import SiteLegalConfigForm
+from ..models import SiteLegalConfig
+from ..roles import is_accounting
+from ..singletons import legal_config
+
+REGULAMIN_TEMPLATE = "legal/regulamin.html"
+POLITYKA_TEMPLATE = "legal/polityka_prywatnosci.html"
+
+
+#REGULAMIN I POLITYKA PRYWATNOĹšCI
+def _ctx_from_config(cfg: SiteLegalConfig):
+    return {
+        "SITE_OWNER": cfg.site_owner,
+        "SITE_ADDRESS": cfg.site_address,
+        "SITE_EMAIL": cfg.site_email,
+        "SITE_URL": cfg.site_url,
+        "PAYMENT_OPERATOR": cfg.payment_operator,
+        "PROCESSORS": cfg.processors,
+        "COOKIES_DESC": cfg.cookies_desc,
+        "VIDEO_TOOLS": cfg.video_tools,
+        "UPDATED_AT": timezone.localtime(cfg.updated_at).strftime("%d.%m.%Y, %H:%M"),
+    }
+
+
+@lru_cache(maxsize=None)
+def _template_stamp(template_name) -> int:
+    # zmiana szablonu (deploy) = nowy ETag / Last-Modified
+    try:
+        return int(os.path.getmtime(get_template(template_name).origin.name))
+    except Exception:
+        return 0
+
+
+def _legal_etag(template_name):
+    def etag(request, *args, **kwargs):
+        cfg = legal_config.get()
+        # updated_at z mikrosekundami – Last-Modified ma tylko sekundy
+        return f"{cfg.pk}-{int(cfg.updated_at.timestamp() * 1_000_000)}-{_template_stamp(template_name)}"
+    return etag
+
+
+def _legal_last_modified(template_name):
+    def last_modified(request, *args, **kwargs):
+        stamp = datetime.fromtimestamp(_template_stamp(template_name), tz=dt_timezone.utc)
+        return max(legal_config.get().updated_at, stamp)
+    return last_modified
+
+
+def _render_legal(request, template_name):
+    # konfiguracja z cache (panel.singletons); przeglądarka/proxy pytają warunkowo -> 304
+    resp = render(request, template_name, _ctx_from_config(legal_config.get()))
+    patch_cache_control(resp, public=True, max_age=0, must_revalidate=True)
+    return resp
+
+
+@login_required
+@user_passes_test(is_accounting)
+def legal_edit_config_view(request):
+    cfg = legal_config.load()  # świeży rekord – obiekt z cache jest tylko do odczytu
+    if request.method == "POST":
+        form = SiteLegalConfigForm(request.POST, instance=cfg)
+        if form.is_valid():
+            cfg = form.save(commit=False)
+            cfg.updated_by = request.user
+            cfg.save()
+            messages.success(request, "Zapisano zmiany.")
+            return redirect("legal_edit_config")
+        messages.error(request, "SprawdĹş pola formularza.")
+    else:
+        form = SiteLegalConfigForm(instance=cfg)
+
+    return render(request, "legal/legal_edit_config.html", {
+        "form": form,
+        **_ctx_from_config(cfg),
+    })
+
+
+@condition(etag_func=_legal_etag(REGULAMIN_TEMPLATE), last_modified_func=_legal_last_modified(REGULAMIN_TEMPLATE))
+def regulamin_view(request):
+    return _render_legal(request, REGULAMIN_TEMPLATE)
+
+
+@condition(etag_func=_legal_etag(POLITYKA_TEMPLATE), last_modified_func=_legal_last_modified(POLITYKA_TEMPLATE))
+def polityka_view(request):
+    return _render_legal(request, POLITYKA_TEMPLATE)
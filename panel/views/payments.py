@@ -0,0 +1,263 @@
+# panel/views/payments.py
+"""
+Płatności uczniów: webhook Autopay, potwierdzenia przelewów, ręczna akceptacja.
+"""
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import pathlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, FileResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from ..direct_upload import complete_direct_upload, consume_direct_upload
+from ..invoices import enqueue_invoice
+from ..models import Rezerwacja, Payment, PaymentConfirmation
+from ..pagination import keyset_page
+from ..pricing import attach_ceny_uczen, resolve_cena_uczen
+from ..roles import is_accounting
+from ..singletons import payment_settings
+
+
+# --- Webhook Autopay ---
+@csrf_exempt
+def autopay_webhook_view(request):
+    if request.method != "POST":
+        return HttpResponseBadRequest("POST only")
+
+    secret = getattr(settings, "AUTOPAY_WEBHOOK_SECRET", "")
+    raw = request.body
+    try:
+        payload = json.loads(raw.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON")
+
+    # PrzykĹ‚adowa weryfikacja podpisu HMAC-SHA256 (dopasuj do dokumentacji Autopay)
+    signature = request.headers.get("X-Autopay-Signature", "")
+    if secret:
+        expected = hmac.new(secret.encode(), raw, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(signature, expected):
+            return HttpResponse(status=401)
+
+    provider_payment_id = str(payload.get("payment_id") or payload.get("id") or "")
+    status = payload.get("status")
+    amount_grosz = int(payload.get("amount_grosz") or payload.get("amount", 0))
+    reservation_id = payload.get("reservation_id")
+    student_id = payload.get("student_id")
+
+    if not provider_payment_id:
+        return HttpResponseBadRequest("Missing payment id")
+
+    payment, _ = Payment.objects.get_or_create(
+        provider="autopay",
+        provider_payment_id=provider_payment_id,
+        defaults=dict(
+            amount_grosz=amount_grosz,
+            currency="PLN",
+            status=status or "pending",
+            raw_payload=payload,
+            reservation_id=reservation_id,
+            student_id=student_id,
+        )
+    )
+    changed = False
+    if status and payment.status != status:
+        payment.status = status; changed = True
+    if amount_grosz and payment.amount_grosz != amount_grosz:
+        payment.amount_grosz = amount_grosz; changed = True
+    payment.raw_payload = payload
+    if status == "paid" and not payment.paid_at:
+        payment.paid_at = timezone.now(); changed = True
+    if changed:
+        payment.save()
+
+    if payment.status == "paid" and not hasattr(payment, "invoice"):
+        # PDF generuje worker (manage.py invoice_worker) – webhook odpowiada od razu
+        enqueue_invoice(payment)
+
+    return JsonResponse({"ok": True})
+
+
+#PĹATNOĹšCI
+def _resolve_cena_uczen(rezerwacja: Rezerwacja) -> Decimal:
+    """
+    Zwraca cenÄ™ dla ucznia z cennika (cena_uczen) dopasowanÄ… po przedmiot + poziom.
+    Fallback: UstawieniaPlatnosci.cena_za_godzine, a jak nie ma â€“ 0.
+    """
+    return resolve_cena_uczen(rezerwacja)
+
+
+# =======================
+# U C Z E Ĺ  â€”  P Ĺ A T N O Ĺš C I
+# =======================
+@login_required
+def platnosci_lista_view(request):
+    filtr = request.GET.get("filtr", "wszystkie")  # 'oczekujace' lub 'wszystkie'
+    qs = Rezerwacja.objects.filter(uczen=request.user).order_by("-termin")
+
+    if filtr == "oczekujace":
+        qs = qs.filter(oplacona=False, odrzucona=False)
+
+    # policz kwoty z cennika (cennik raz, bez zapytań per rezerwacja)
+    qs = attach_ceny_uczen(qs)
+
+    return render(request, "uczen/platnosci_lista.html", {
+        "rezerwacje": qs,
+        "filtr": filtr,
+    })
+
+
+ALLOWED_EXTS = {"pdf","jpg","jpeg","png","webp","heic"}
+MAX_UPLOAD_MB = 10
+
+
+def _validate_confirmation_file(f):
+    ext = os.path.splitext(f.name)[1].lower().replace(".", "")
+    if ext not in ALLOWED_EXTS:
+        raise ValidationError(f"Dozwolone formaty: {', '.join(sorted(ALLOWED_EXTS))}")
+    if f.size > MAX_UPLOAD_MB * 1024 * 1024:
+        raise ValidationError(f"Maksymalny rozmiar pliku to {MAX_UPLOAD_MB} MB.")
+
+
+@login_required
+def platnosci_view(request, rez_id: int):
+    """
+    SzczegĂłĹ‚y pĹ‚atnoĹ›ci (instrukcja) + upload potwierdzenia przelewu przez ucznia.
+    UczeĹ„ NIE dostaje linkĂłw do plikĂłw â€” to widoczne tylko w panelu ksiÄ™gowoĹ›ci.
+    """
+    rezerwacja = get_object_or_404(Rezerwacja.objects.select_related("nauczyciel").prefetch_related(), pk=rez_id, uczen=request.user)
+    ustawienia = payment_settings.get()
+    kwota = _resolve_cena_uczen(rezerwacja)
+
+    if request.method == "POST" and request.POST.get("akcja") == "upload_potwierdzenie":
+        f = request.FILES.get("potwierdzenie")
+        note = (request.POST.get("note") or "").strip()[:255]
+        try:
+            if f:
+                _validate_confirmation_file(f)
+            else:
+                # upload bezpośredni: plik już leży w storage, walidacja w complete_direct_upload
+                f = complete_direct_upload(request, "potwierdzenie")
+        except ValidationError as e:
+            messages.error(request, " ".join(e.messages))
+            return redirect("platnosci_view", rez_id=rezerwacja.id)
+        if not f:
+            messages.error(request, "Nie wybrano pliku.")
+            return redirect("platnosci_view", rez_id=rezerwacja.id)
+
+        try:
+            with transaction.atomic():
+                PaymentConfirmation.objects.create(
+                    rezerwacja=rezerwacja, file=f, uploaded_by=request.user, note=note
+                )
+                consume_direct_upload(request, "potwierdzenie")
+        except ValidationError as e:
+            messages.error(request, " ".join(e.messages))
+            return redirect("platnosci_view", rez_id=rezerwacja.id)
+        messages.success(request, "Potwierdzenie zostaĹ‚o przesĹ‚ane. Zobaczysz status pĹ‚atnoĹ›ci w swoim panelu po akceptacji przez ksiÄ™gowoĹ›Ä‡.")
+        return redirect("platnosci_view", rez_id=rezerwacja.id)
+
+    # Nie przesyĹ‚amy listy plikĂłw do szablonu â€” widoczne tylko dla ksiÄ™gowoĹ›ci.
+    return render(request, "uczen/platnosci.html", {
+        "rezerwacja": rezerwacja,
+        "ustawienia": ustawienia,
+        "kwota": kwota,
+    })
+
+
+# =======================
+# K S I Ä G O W O Ĺš Ä†  â€”  R Ä C Z N A  A K C E P T A C J A
+# =======================
+@login_required
+@user_passes_test(is_accounting)
+def ksiegowosc_platnosci_lista(request):
+    filtr = request.GET.get("filtr", "wszystkie")  # 'oczekujace' albo 'wszystkie'
+    qs = (Rezerwacja.objects
+          .select_related("uczen", "nauczyciel")
+          .prefetch_related(Prefetch(
+              "potwierdzenia",
+              queryset=PaymentConfirmation.objects.only("id", "rezerwacja_id", "note", "uploaded_at"),
+          )))
+
+    if filtr == "oczekujace":
+        # indeks częściowy rez_unpaid_termin_idx
+        qs = qs.filter(oplacona=False, odrzucona=False)
+
+    # stronicowanie po kursorze (termin, id) – bez OFFSET
+    page = keyset_page(qs, request.GET.get("po"), field="termin", size=50)
+
+    # wylicz kwoty z cennika (cennik raz, bez zapytań per rezerwacja)
+    rezerwacje = attach_ceny_uczen(page.object_list)
+
+    return render(request, "ksiegowosc/platnosci_lista.html", {
+        "rezerwacje": rezerwacje,
+        "page": page,
+        "filtr": filtr,
+        "just": request.GET.get("just"),  # ID wĹ‚aĹ›nie zmienionej rezerwacji (opcjonalny highlight)
+    })
+
+
+@login_required
+@user_passes_test(is_accounting)
+@require_POST
+def ksiegowosc_oznacz_oplacona(request, rez_id: int):
+    r = get_object_or_404(Rezerwacja, pk=rez_id)
+    r.oplacona = True
+    r.odrzucona = False
+    r.save(update_fields=["oplacona", "odrzucona", "updated_at"])
+    messages.success(request, f"Rezerwacja #{r.id} oznaczona jako opĹ‚acona.")
+    # wrĂłÄ‡ do listy i podĹ›wietl wiersz
+    return redirect(f"{reverse('ksiegowosc_platnosci_lista')}?{urlencode({'filtr':'wszystkie','just':r.id})}")
+
+
+@login_required
+@user_passes_test(is_accounting)
+@require_POST
+def ksiegowosc_oznacz_odrzucona(request, rez_id: int):
+    r = get_object_or_404(Rezerwacja, pk=rez_id)
+    r.odrzucona = True
+    r.oplacona = False
+    r.save(update_fields=["oplacona", "odrzucona", "updated_at"])
+    messages.warning(request, f"Rezerwacja #{r.id} oznaczona jako odrzucona.")
+    return redirect(f"{reverse('ksiegowosc_platnosci_lista')}?{urlencode({'filtr':'wszystkie','just':r.id})}")
+
+
+@login_required
+@user_passes_test(is_accounting)
+def confirmation_download(request, pk: int):
+    """
+    Chroniony podglÄ…d/pobranie potwierdzenia przelewu.
+    DziaĹ‚a przy DEBUG=False i nie zaleĹĽy od serwowania MEDIA przez serwer www.
+    """
+    p = get_object_or_404(PaymentConfirmation, pk=pk)
+    f = p.file
+    if not f or not f.name:
+        raise Http404("Brak pliku.")
+    try:
+        fh = f.open("rb")
+    except FileNotFoundError:
+        # plik nie istnieje fizycznie (np. po deployu bez trwaĹ‚ego dysku)
+        raise Http404("Plik nie istnieje na serwerze.")
+
+    filename = pathlib.Path(f.name).name
+    content_type, _ = mimetypes.guess_type(filename)
+    as_attachment = request.GET.get("dl") == "1"  # ?dl=1 => pobierz; domyĹ›lnie podglÄ…d
+
+    resp = FileResponse(fh, as_attachment=as_attachment, filename=filename)
+    if content_type:
+        resp["Content-Type"] = content_type
+    return resp
@@ -0,0 +1,344 @@
+# panel/views/webrtc.py
+"""
+Zajęcia online: sygnalizacja WebRTC przez cache, obecność, widok lekcji.
+"""
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.http import (
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseNotFound,
+    JsonResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+
+from ..models import OnlineStatus, Rezerwacja
+
+log = logging.getLogger(__name__)
+
+
+# ====== Klucze w cache ======
+def _keys(rez_id: int):
+    """
+    Zestaw kluczy powiÄ…zanych z jednÄ… sesjÄ… (rezerwacjÄ…):
+    - offer / answer: Ĺ‚adunki SDP
+    - lock: kto zostaĹ‚ offererem (anti-race)
+    """
+    base = f"webrtc:{rez_id}"
+    return {
+        "offer": f"{base}:offer",
+        "answer": f"{base}:answer",
+        "lock": f"{base}:lock",
+    }
+
+
+# StaĹ‚e czasowe
+OFFER_TTL = 60 * 10   # 10 min
+ANSWER_TTL = 60 * 10  # 10 min
+LOCK_TTL  = 60 * 2    # 2 min â€“ wystarczy, ĹĽeby student zdÄ…ĹĽyĹ‚ odebraÄ‡
+
+
+def _no_store(resp: JsonResponse) -> JsonResponse:
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
+# ====== OFFER ======
+@csrf_exempt
+@never_cache
+@require_http_methods(["GET", "POST"])
+def webrtc_offer(request, rez_id: int):
+    keys = _keys(rez_id)
+    offer_key = keys["offer"]
+    answer_key = keys["answer"]
+    lock_key = keys["lock"]
+
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body.decode("utf-8"))
+            if not isinstance(data, dict) or data.get("type") != "offer" or not isinstance(data.get("sdp"), str):
+                return HttpResponseBadRequest("Invalid SDP payload")
+
+            # Kto pierwszy â€“ ten offerer (SETNX = cache.add)
+            user_id = getattr(getattr(request, "user", None), "id", None) or "anon"
+            claimed = cache.add(lock_key, str(user_id), timeout=LOCK_TTL)
+            current_locker = cache.get(lock_key)
+
+            # JeĹĽeli lock istnieje i nie my go trzymamy â€“ ktoĹ› juĹĽ dzwoni
+            if not claimed and str(current_locker) != str(user_id):
+                log.info("OFFER POST blocked by lock rez=%s by=%s", rez_id, current_locker)
+                return JsonResponse({"error": "Offerer already set"}, status=409)
+
+            # Zapisz offer (najnowszy nadpisuje stary); answer czyĹ›cimy
+            cache.set(offer_key, {"type": "offer", "sdp": data["sdp"]}, timeout=OFFER_TTL)
+            cache.delete(answer_key)
+
+            log.info("OFFER POST rez=%s len=%s by=%s", rez_id, len(data["sdp"]), user_id)
+            return _no_store(JsonResponse({"ok": True}))
+        except Exception as e:
+            log.exception("OFFER POST error rez=%s", rez_id)
+            return HttpResponseBadRequest(str(e))
+
+    # GET
+    data = cache.get(offer_key)
+    if not data:
+        return HttpResponseNotFound("No offer yet")
+    return _no_store(JsonResponse(data))
+
+
+# ====== ANSWER ======
+@csrf_exempt
+@never_cache
+@require_http_methods(["GET", "POST"])
+def webrtc_answer(request, rez_id: int):
+    keys = _keys(rez_id)
+    offer_key = keys["offer"]
+    answer_key = keys["answer"]
+
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body.decode("utf-8"))
+            t = data.get("type")
+            sdp = data.get("sdp")
+
+            # Walidacja odpowiedzi
+            if t != "answer" or not isinstance(sdp, str) or not sdp.startswith("v="):
+                return HttpResponseBadRequest("Invalid SDP payload")
+
+            # OdpowiadaÄ‡ moĹĽna tylko na istniejÄ…cÄ… ofertÄ™
+            if not cache.get(offer_key):
+                return HttpResponseNotFound("No offer to answer")
+
+            cache.set(answer_key, {"type": "answer", "sdp": sdp}, timeout=ANSWER_TTL)
+            # Po przyjÄ™ciu answer kasujemy offer, by watchery nie â€ždzwoniĹ‚yâ€ť w kĂłĹ‚ko
+            cache.delete(offer_key)
+
+            log.info("ANSWER POST rez=%s len=%s", rez_id, len(sdp))
+            return _no_store(JsonResponse({"ok": True}))
+        except Exception as e:
+            log.exception("ANSWER POST error rez=%s", rez_id)
+            return HttpResponseBadRequest(str(e))
+
+    # GET
+    data = cache.get(answer_key)
+    if not data:
+        return HttpResponseNotFound("No answer yet")
+    return _no_store(JsonResponse(data))
+
+
+# ====== HANGUP (sprzÄ…tanie stanu) ======
+@csrf_exempt
+@never_cache
+@require_POST
+def webrtc_hangup(request, rez_id: int):
+    keys = _keys(rez_id)
+    cache.delete_many([keys["offer"], keys["answer"], keys["lock"]])
+    log.info("HANGUP rez=%s â€“ cleared offer/answer/lock", rez_id)
+    return _no_store(JsonResponse({"ok": True}))
+
+
+# ====== DEBUG (podglÄ…d kluczy) ======
+@csrf_exempt
+@never_cache
+@require_GET
+def webrtc_debug(request, rez_id: int):
+    keys = _keys(rez_id)
+    offer = cache.get(keys["offer"])
+    answer = cache.get(keys["answer"])
+    locker = cache.get(keys["lock"])
+
+    def _sdp_len(x):
+        try:
+            return len((x or {}).get("sdp", "") or "")
+        except Exception:
+            return 0
+
+    data = {
+        "keys": keys,
+        "offer": bool(offer),
+        "answer": bool(answer),
+        "offer_len": _sdp_len(offer),
+        "answer_len": _sdp_len(answer),
+        "lock_holder": locker,
+    }
+    return _no_store(JsonResponse(data))
+
+
+# ====== Presence (jak u Ciebie â€“ z lekkimi poprawkami cache) ======
+@csrf_exempt
+@login_required
+@never_cache
+@require_POST
+def ping_online_status(request):
+    rezerwacja_id = request.POST.get("rezerwacja_id")
+    if not rezerwacja_id:
+        return JsonResponse({"error": "Brak ID rezerwacji"}, status=400)
+
+    # typowy ping to jeden UPDATE; wiersz (unikalny user+rezerwacja) powstaje przy pierwszym
+    updated = OnlineStatus.objects.filter(user=request.user, rezerwacja_id=rezerwacja_id).update(
+        last_ping=timezone.now()
+    )
+    if not updated:
+        OnlineStatus.objects.get_or_create(user=request.user, rezerwacja_id=rezerwacja_id)
+    return _no_store(JsonResponse({"status": "ping zapisany"}))
+
+
+@csrf_exempt
+@login_required
+@never_cache
+@require_GET
+def check_online_status(request, rezerwacja_id):
+    try:
+        rezerwacja = Rezerwacja.objects.get(id=rezerwacja_id)
+    except Rezerwacja.DoesNotExist:
+        return JsonResponse({"error": "Nie znaleziono rezerwacji"}, status=404)
+
+    if request.user == rezerwacja.uczen:
+        other_user = rezerwacja.nauczyciel
+    elif request.user == rezerwacja.nauczyciel:
+        other_user = rezerwacja.uczen
+    else:
+        return HttpResponseForbidden("Brak dostÄ™pu do tej rezerwacji")
+
+    try:
+        online_status = OnlineStatus.objects.get(user=other_user, rezerwacja_id=rezerwacja_id)
+        is_online = (timezone.now() - online_status.last_ping).total_seconds() < 20
+    except OnlineStatus.DoesNotExist:
+        is_online = False
+
+    return _no_store(JsonResponse({"online": is_online}))
+
+
+# ==========================
+#     WIDOK LEKCJI (HTML)
+# ==========================
+@login_required
+def zajecia_online_view(request, rezerwacja_id):
+    rezerwacja = get_object_or_404(Rezerwacja, id=rezerwacja_id)
+    user = request.user
+    teraz = timezone.now()
+
+    # zapis linku Excalidraw przez nauczyciela
+    if request.method == "POST" and user == rezerwacja.nauczyciel:
+        link = request.POST.get("excalidraw_link")
+        if link:
+            rezerwacja.excalidraw_link = link
+            rezerwacja.save()
+            return redirect("zajecia_online", rezerwacja_id=rezerwacja.id)
+
+    # DostÄ™p jak dotÄ…d...
+    if rezerwacja.id != 1:
+        if user == rezerwacja.uczen:
+            start = rezerwacja.termin
+            koniec = start + timedelta(minutes=55)
+            okno_start = start - timedelta(minutes=5)
+            if not (okno_start <= teraz <= koniec):
+                return HttpResponseForbidden("DostÄ™p tylko w czasie trwania zajÄ™Ä‡.")
+        elif user != rezerwacja.nauczyciel:
+            return HttpResponseForbidden("Brak dostÄ™pu do tej tablicy.")
+    else:
+        if user not in (rezerwacja.uczen, rezerwacja.nauczyciel):
+            return HttpResponseForbidden("Brak dostÄ™pu do tej tablicy.")
+
+    # đź”ą HISTORIA: wszystkie zakoĹ„czone zajÄ™cia tego ucznia (najnowsze na gĂłrze)
+    uczen = rezerwacja.uczen
+    past_lessons = (
+        Rezerwacja.objects
+        .filter(uczen=uczen, termin__lt=teraz)
+        .order_by('-termin')[:30]  # np. ostatnie 30
+    )
+
+    return render(
+        request,
+        "zajecia_online.html",
+        {
+            "rezerwacja": rezerwacja,
+            "is_teacher": user == rezerwacja.nauczyciel,
+            "room_id": f"room-{rezerwacja.id}",
+            "past_lessons": past_lessons,  # â¬… przekazanie do szablonu
+        },
+    )
+
+
+@login_required
+def otworz_tablice_view(request, rezerwacja_id):
+    rezerwacja = get_object_or_404(Rezerwacja, id=rezerwacja_id)
+    user = request.user
+    teraz = timezone.now()
+
+    # Te same zasady dostępu co w zajecia_online_view
+    if rezerwacja.id != 1:
+        if user == rezerwacja.uczen:
+            start = rezerwacja.termin
+            koniec = start + timedelta(minutes=55)
+            okno_start = start - timedelta(minutes=5)
+            if not (okno_start <= teraz <= koniec):
+                return HttpResponseForbidden("Dostęp tylko w czasie trwania zajęć.")
+        elif user != rezerwacja.nauczyciel:
+            return HttpResponseForbidden("Brak dostępu do tej tablicy.")
+    else:
+        if user not in (rezerwacja.uczen, rezerwacja.nauczyciel):
+            return HttpResponseForbidden("Brak dostępu do tej tablicy.")
+
+    # 1) Jeśli link już istnieje – używamy go
+    board_url = rezerwacja.excalidraw_link
+    if board_url:
+        default_excal = ""
+        if rezerwacja.excalidraw_room_id and rezerwacja.excalidraw_room_key:
+            default_excal = f"https://excalidraw.com/#room={rezerwacja.excalidraw_room_id},{rezerwacja.excalidraw_room_key}"
+        if board_url == default_excal:
+            # autouzupełniony link Excalidraw traktujemy jak brak linku -> tworzymy Aliboard
+            board_url = None
+
+    # 2) Jeśli linku nie ma – tworzymy nową tablicę Aliboard
+    if not board_url:
+        room_id = uuid.uuid4().hex[:8]
+        board_path = reverse("aliboard_prod_room", args=[room_id])
+        board_path = f"{board_path}?rez={rezerwacja.id}"
+        board_url = request.build_absolute_uri(board_path)
+
+        rezerwacja.excalidraw_link = board_url
+        rezerwacja.save(update_fields=["excalidraw_link"])
+
+    # 3) Otwieramy tablicę
+    return redirect(board_url)
+
+
+# ==========================
+#     SYNC (opcjonalne)
+# ==========================
+@login_required
+def sync_note_changes(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid method"}, status=405)
+
+    data = request.POST.get("data")
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        "virtual_room",
+        {"type": "note_sync", "message": data},
+    )
+    return JsonResponse({"status": "success"})
+
+
+async def note_sync(event):
+    message = event["message"]
+    await self.send(text_data=message)  # typowy stub na potrzeby Channels Consumer
+
+
+@login_required
+def virtual_room(request):
+    return render(request, "virtual_room.html")